@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
 from rdflib import Graph, RDF, RDFS, URIRef
 import os
@@ -7,16 +7,45 @@ import uuid
 import threading
 import time
 import math
+import random
 from datetime import datetime
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, List
 import requests
 from requests.auth import HTTPDigestAuth
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from urllib.parse import quote
-from virtuoso import storeDataToGraph, storeDataToGraphInBatches, query_sparql
+from batching import batch_sizer
+from virtuoso import storeDataToGraph, storeDataToGraphInBatches, query_sparql, query_cache, record_write, router
 from config import config
+from graph_artifacts import (store_artifact, get_artifact, get_artifact_entry, invalidate_graph, bump_graph_version,
+                             get_graph_version)
+from property_profile import profile_graph_object, profile_graph_via_sparql
+from approximate_analysis import analyze_graph_approximate
+from schema_summary import build_schema_summary
+from export import EXPORT_FORMATS, export_graph, gzip_stream
+from entity_details import MAX_BATCH_SIZE, entity_details_from_cards, get_entity_details_batch, is_safe_iri
+from paths import find_paths
+from neighborhood import (DEFAULT_MAX_GROUPS, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor,
+                          neighbor_page, neighborhood_summary, link)
+from labels import LABEL_PREDICATES, label_cache, resolve_labels, uri_fragment
+from compact import COMPACT_MEDIA_TYPE, build_known_prefixes, encode_graph_payload, wants_compact
+from compression import compress_response
+from layout import compute_layout, layout_available, layout_cache
+from mirror import graph_mirrors
+from cards import entity_cards
+from search import list_graph_names, search_all_graphs
+from ingest import UPLOAD_FORMATS, parse_upload, upload_format
+from class_hierarchy import class_hierarchy_from_graph, class_hierarchy_via_sparql, hierarchy_tree
+from http_cache import conditional_get
+from scheduler import precompute
+from query_log import query_log
+from profiling import (ActiveProfile, profile_stage, profile_store, render_collapsed, render_pstats,
+                       dump_pstats)
+from metrics import (observe_request, update_job_gauges, timed, rdf_parse_duration,
+                     metrics_available, render_metrics)
 
 app = Flask(__name__)
 CORS(app)
@@ -39,6 +68,16 @@ except:
     session = None
 
 # Upload Job Management
+@dataclass
+class GraphProgress:
+    """Progress of one target graph of an upload"""
+    graph_name: str
+    total_triples: int
+    processed_triples: int = 0
+    current_batch: int = 0
+    total_batches: int = 0
+    status: str = 'pending'  # 'pending', 'uploading', 'failed', 'success'
+
 @dataclass
 class UploadJob:
     job_id: str
@@ -53,6 +92,8 @@ class UploadJob:
     total_batches: int
     error_message: Optional[str] = None
     result_data: Optional[Dict] = None
+    profile_id: Optional[str] = None
+    graphs: List[GraphProgress] = field(default_factory=list)  # one entry per target graph
 
 # In-memory job queue
 upload_jobs: Dict[str, UploadJob] = {}
@@ -71,12 +112,133 @@ if os.path.exists(class_definitions_file):
         uri = class_info.get('uri')
         if uri:
             URI_TO_CLASS[uri] = class_info
+    
+    # Vocabulary terms never need a label lookup
+    label_cache.seed({uri: info.get('display_label') for uri, info in URI_TO_CLASS.items()})
+
+# Namespaces used to shorten IRIs in the compact wire format
+COMPACT_PREFIXES = build_known_prefixes(URI_TO_CLASS.keys())
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+def requested_profile_mode():
+    """Profiling mode for this request, or None when it isn't profiled"""
+    token = request.headers.get('X-Profile-Token')
+    if config.profiling_token and token == config.profiling_token:
+        return request.headers.get('X-Profile-Mode', 'sample')
+    if (config.profiling_sample_rate > 0 and random.random() < config.profiling_sample_rate and
+            not request.path.startswith(('/api/admin', '/metrics'))):
+        return 'sample'
+    return None
+
+@app.before_request
+def start_request_profile():
+    mode = requested_profile_mode()
+    if mode:
+        g.profile = ActiveProfile('request', f"{request.method} {request.full_path.rstrip('?')}", mode).start()
+
+@app.after_request
+def stop_request_profile(response):
+    profile = g.pop('profile', None)
+    if profile:
+        response.headers['X-Profile-Id'] = profile.stop(status=response.status_code)
+    return response
+
+@app.teardown_request
+def stop_failed_request_profile(exception):
+    # after_request is skipped for unhandled exceptions
+    profile = g.pop('profile', None)
+    if profile:
+        profile.stop(status=500, error=str(exception))
+
+@app.after_request
+def record_request_metrics(response):
+    """Per-route latency (the URL rule keeps label cardinality bounded)"""
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        observe_request(request.method, route, response.status_code, time.perf_counter() - start)
+    return response
+
+@app.after_request
+def compress_json_response(response):
+    """Compress JSON payloads (brotli or gzip) when the client accepts it"""
+    return compress_response(request, response)
+
+def graph_payload_response(payload):
+    """Return a nodes/edges payload as JSON or in the negotiated compact format"""
+    if wants_compact(request):
+        response = jsonify(encode_graph_payload(payload, COMPACT_PREFIXES))
+        response.mimetype = COMPACT_MEDIA_TYPE
+    else:
+        response = jsonify(payload)
+    response.vary.add('Accept')
+    return response
+
+def attach_layout(graph_name, seed_entity, payload):
+    """Add server-computed node positions to a nodes/edges payload (needs numpy)"""
+    if not layout_available() or len(payload['nodes']) > config.layout_max_nodes:
+        return payload
+    with profile_stage('layout'):
+        payload['positions'] = compute_layout(
+            graph_name, seed_entity, [node['id'] for node in payload['nodes']],
+            [(edge['source'], edge['target']) for edge in payload['edges']])
+    return payload
+
+def graph_labels(graph_uri, uris, mirror=None, card_graph=None):
+    """Labels from the entity card store or the graph's mirror when one served
+    the data, else via the label cache"""
+    if not mirror and not card_graph:
+        return resolve_labels(graph_uri, uris)
+    uris = set(uris)
+    labels = entity_cards.labels(card_graph, uris) if card_graph else mirror.labels(uris)
+    labels.update(label_cache.seeded(uris))  # Seeded vocabulary labels win, as in the label cache
+    return labels
+
+def card_links(entity_uri, card, limit):
+    """An entity card's links as (subject, predicate, object), or None if the card holds fewer than needed"""
+    links = ([(entity_uri, predicate, obj) for predicate, obj in card['outgoing']] +
+             [(subject, predicate, entity_uri) for subject, predicate in card['incoming']])
+    if len(links) < limit and (card['outgoingTruncated'] or card['incomingTruncated']):
+        return None
+    return links[:limit]
+
+def on_graph_changed(graph_name: str):
+    """Drop everything derived from a graph after its data changed"""
+    bump_graph_version(graph_name)
+    graph_uri = config.get_graph_uri(graph_name or 'default')
+    invalidate_graph(graph_name)
+    label_cache.invalidate(graph_uri)
+    query_cache.invalidate(graph_uri)
+    layout_cache.invalidate(graph_name)
+
+def graph_is_empty(graph_uri: str) -> bool:
+    """Whether a graph holds no triples (False if that can't be determined)"""
+    existing = query_sparql(f"SELECT ?s WHERE {{ GRAPH <{graph_uri}> {{ ?s ?p ?o }} }} LIMIT 1",
+                            use_cache=False, origin='graph_is_empty.probe')
+    return existing is not None and not existing
+
+def store_current_artifact(graph_name: str, kind: str, data: dict, version: int):
+    """Store an artifact unless the graph changed while it was being computed"""
+    if get_graph_version(graph_name) == version:
+        store_artifact(graph_name, kind, data)
 
 # Job Management Functions
-def create_upload_job(filename: str, graph_name: str, total_triples: int) -> str:
-    """Create a new upload job and return the job ID"""
+def create_upload_job(filename: str, graph_name: str, total_triples: int,
+                      graph_triples: Optional[Dict[str, int]] = None) -> str:
+    """Create a new upload job and return the job ID
+
+    ``graph_triples`` gives the triples per target graph of a multi-graph
+    upload; by default all triples go to ``graph_name``.
+    """
     job_id = str(uuid.uuid4())
-    total_batches = (total_triples + 1999) // 2000  # Ceiling division for batch size 2000
+    graph_triples = graph_triples or {graph_name: total_triples}
+    graphs = [GraphProgress(graph_name=name or 'default', total_triples=triples,
+                            total_batches=batch_sizer.estimate_batches(triples))  # Refined as batches are stored
+              for name, triples in graph_triples.items()]
+    total_batches = sum(progress.total_batches for progress in graphs)
     
     with job_lock:
         upload_jobs[job_id] = UploadJob(
@@ -89,19 +251,35 @@ def create_upload_job(filename: str, graph_name: str, total_triples: int) -> str
             total_triples=total_triples,
             processed_triples=0,
             current_batch=0,
-            total_batches=total_batches
+            total_batches=total_batches,
+            graphs=graphs
         )
+        update_job_gauges(list(upload_jobs.values()))
     
     return job_id
 
-def update_job_progress(job_id: str, current_batch: int, processed_triples: int):
-    """Update job progress"""
+def update_job_progress(job_id: str, graph_name: str, current_batch: Optional[int] = None,
+                        processed_triples: Optional[int] = None, total_batches: Optional[int] = None,
+                        status: Optional[str] = None):
+    """Update the progress of one target graph and the job totals"""
     with job_lock:
         if job_id in upload_jobs:
             job = upload_jobs[job_id]
-            job.current_batch = current_batch
-            job.processed_triples = processed_triples
-            job.progress = (processed_triples / job.total_triples) * 100.0
+            for progress in job.graphs:
+                if progress.graph_name == (graph_name or 'default'):
+                    if current_batch is not None:
+                        progress.current_batch = current_batch
+                    if processed_triples is not None:
+                        progress.processed_triples = processed_triples
+                    if total_batches is not None:
+                        progress.total_batches = total_batches
+                    if status:
+                        progress.status = status
+            job.current_batch = sum(progress.current_batch for progress in job.graphs)
+            job.total_batches = sum(progress.total_batches for progress in job.graphs)
+            job.processed_triples = sum(progress.processed_triples for progress in job.graphs)
+            job.progress = (job.processed_triples / job.total_triples) * 100.0 if job.total_triples else 100.0
+            update_job_gauges(list(upload_jobs.values()))
 
 def complete_job(job_id: str, result_data: Dict):
     """Mark job as completed with result data"""
@@ -111,6 +289,7 @@ def complete_job(job_id: str, result_data: Dict):
             job.status = 'success'
             job.progress = 100.0
             job.result_data = result_data
+            update_job_gauges(list(upload_jobs.values()))
 
 def fail_job(job_id: str, error_message: str):
     """Mark job as failed with error message"""
@@ -119,6 +298,7 @@ def fail_job(job_id: str, error_message: str):
             job = upload_jobs[job_id]
             job.status = 'failed'
             job.error_message = error_message
+            update_job_gauges(list(upload_jobs.values()))
 
 def get_job(job_id: str) -> Optional[UploadJob]:
     """Get job by ID"""
@@ -145,6 +325,99 @@ def health_check():
         "external_virtuoso_url": config.external_virtuoso_url
     })
 
+@app.route('/api/admin/caches', methods=['GET'])
+def get_cache_stats():
+    """Hit/miss/coalescing counters of the SPARQL query, label and layout caches"""
+    return jsonify({
+        'queryCache': query_cache.stats(),
+        'labelCache': label_cache.stats(),
+        'layoutCache': layout_cache.stats()
+    })
+
+@app.route('/api/admin/queries', methods=['GET', 'DELETE'])
+def get_query_stats():
+    """Top SPARQL query fingerprints by total time (DELETE resets the statistics)"""
+    if request.method == 'DELETE':
+        query_log.reset()
+        return jsonify({'success': True})
+    
+    sort = request.args.get('sort', 'totalMs')
+    if sort not in ('totalMs', 'avgMs', 'maxMs', 'count', 'slowCount', 'totalBytes', 'totalRows'):
+        return jsonify({'success': False, 'error': f'Unsupported sort: {sort}'}), 400
+    try:
+        top = max(1, min(int(request.args.get('top', 20)), 500))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'top must be an integer'}), 400
+    
+    return jsonify({'success': True, **query_log.top(top, sort)})
+
+@app.route('/api/admin/mirrors', methods=['GET'])
+def get_mirror_status():
+    """Hot graph mirrors: size, memory budget, loads in progress and hit counts"""
+    return jsonify({'success': True, **graph_mirrors.status()})
+
+@app.route('/api/admin/cards', methods=['GET'])
+def get_card_status():
+    """Entity card store: graphs with cards, whether they are complete, and hit counts"""
+    return jsonify({'success': True, **entity_cards.status()})
+
+@app.route('/api/admin/cards/<graph_name>/rebuild', methods=['POST'])
+def rebuild_cards(graph_name):
+    """Rebuild a graph's entity cards from Virtuoso (for data loaded outside this app)"""
+    if not entity_cards.enabled:
+        return jsonify({'success': False, 'error': 'Entity cards are disabled (set ENTITY_CARD_DB)'}), 400
+    started = entity_cards.rebuild(graph_name)
+    return jsonify({'success': True, 'started': started}), 202 if started else 200
+
+@app.route('/api/admin/upload-batching', methods=['GET'])
+def get_upload_batching():
+    """Adaptive upload batch size: current target, observed bytes per triple and failures"""
+    return jsonify({'success': True, **batch_sizer.status()})
+
+@app.route('/api/admin/warmer', methods=['GET'])
+def get_warmer_status():
+    """Background cache warmer: queue, running tasks and the last run of each task"""
+    return jsonify({'success': True, **precompute.status()})
+
+@app.route('/api/admin/replicas', methods=['GET'])
+def get_replica_status():
+    """Read replica health, load and the graphs each replica still lags behind on"""
+    return jsonify({'success': True, **router.status()})
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    """Stored request and upload job profiles, newest first"""
+    return jsonify({'success': True, 'profiles': profile_store.list()})
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """A stored profile as collapsed stacks (default), JSON, pstats text or a binary .prof file"""
+    entry = profile_store.get(profile_id)
+    if not entry:
+        return jsonify({'success': False, 'error': 'Profile not found'}), 404
+    
+    output_format = request.args.get('format', 'collapsed')
+    if output_format == 'collapsed':
+        return Response(render_collapsed(entry), mimetype='text/plain')
+    if output_format == 'json':
+        return jsonify({key: value for key, value in entry.items() if key != 'stats'})
+    if output_format in ('pstats', 'prof'):
+        if 'stats' not in entry:
+            return jsonify({'success': False, 'error': 'pstats output needs a cprofile mode profile'}), 400
+        if output_format == 'pstats':
+            return Response(render_pstats(entry, sort=request.args.get('sort', 'cumulative')), mimetype='text/plain')
+        return Response(dump_pstats(entry), mimetype='application/octet-stream',
+                        headers={'Content-Disposition': f'attachment; filename="{profile_id}.prof"'})
+    return jsonify({'success': False, 'error': f'Unsupported format: {output_format}'}), 400
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus exposition of request, SPARQL and ingest metrics"""
+    if not metrics_available():
+        return jsonify({'success': False, 'error': 'prometheus_client is not installed'}), 501
+    body, content_type = render_metrics()
+    return Response(body, mimetype=content_type.split(';')[0], content_type=content_type)
+
 @app.route('/upload/status/<job_id>', methods=['GET'])
 def get_upload_status(job_id):
     """Get upload job status and progress"""
@@ -163,9 +436,7 @@ def get_upload_status(job_id):
         try:
             # Use 'default' if graph_name is empty
             graph_name = job.graph_name if job.graph_name else 'default'
-            app.logger.info(f"Getting entity statistics for graph: {graph_name}")
             entity_stats = get_entity_statistics(graph_name)
-            app.logger.info(f"Entity statistics result: {entity_stats}")
             response_data['entityStats'] = entity_stats
         except Exception as e:
             app.logger.error(f"Failed to get entity statistics: {e}")
@@ -182,10 +453,14 @@ def get_upload_analysis_progress(job_id):
         return jsonify({"error": "No analysis progress found"}), 404
     return jsonify(progress)
 
-def get_entity_statistics(graph_name: str) -> dict:
-    """Get entity type statistics for a graph"""
+def get_entity_statistics(graph_name: str, refresh: bool = False) -> dict:
+    """Get entity type statistics for a graph (cached until the graph changes)"""
+    cached = None if refresh else get_artifact(graph_name, 'entityStats')
+    if cached is not None:
+        return cached
     try:
         graph_uri = config.get_graph_uri(graph_name)
+        version = get_graph_version(graph_name)
         
         # Query to get all types and their counts
         query = f"""SELECT ?type (COUNT(?entity) AS ?count) 
@@ -196,9 +471,7 @@ WHERE {{
 GROUP BY ?type
 ORDER BY DESC(?count)"""
         
-        app.logger.info(f"Executing entity statistics query: {query}")
-        results = query_sparql(query)
-        app.logger.info(f"Query results: {results}")
+        results = query_sparql(query, origin='get_entity_statistics.type_counts')
         entity_types = []
         
         if results:
@@ -215,11 +488,16 @@ ORDER BY DESC(?count)"""
                     'count': count
                 })
         
-        return {
+        if results is None:
+            raise RuntimeError("Entity type count query failed")
+        
+        entity_stats = {
             'entityTypes': entity_types,
             'totalTypes': len(entity_types),
             'totalEntities': sum(et['count'] for et in entity_types)
         }
+        store_current_artifact(graph_name, 'entityStats', entity_stats, version)
+        return entity_stats
         
     except Exception as e:
         app.logger.error(f"Error getting entity statistics: {e}")
@@ -230,6 +508,14 @@ ORDER BY DESC(?count)"""
             'error': str(e)
         }
 
+def cached_instance_count(graph_name: str, class_uri: str) -> Optional[int]:
+    """Instance total of a class from the cached entity statistics, or None if they aren't cached"""
+    entity_stats = get_artifact(graph_name, 'entityStats')
+    if entity_stats is None:
+        return None
+    return next((entity_type['count'] for entity_type in entity_stats['entityTypes']
+                 if entity_type['uri'] == class_uri), 0)
+
 def get_readable_type_name(type_uri: str) -> str:
     """Convert URI to readable name"""
     if '#' in type_uri:
@@ -240,6 +526,7 @@ def get_readable_type_name(type_uri: str) -> str:
         return type_uri
 
 @app.route('/api/entities/<graph_name>', methods=['GET'])
+@conditional_get
 def get_entities_by_type(graph_name):
     """Get entities of a specific type from a graph"""
     try:
@@ -259,26 +546,24 @@ def get_entities_by_type(graph_name):
         # Get search filter
         search = request.args.get('search', '').strip()
         
-        # Base query
+        # Base query - labels are resolved afterwards through the label cache
         base_query = f"""
         FROM <{graph_uri}>
         WHERE {{
             ?entity a <{type_uri}> .
-            OPTIONAL {{ ?entity rdfs:label ?label }} .
-            OPTIONAL {{ ?entity dc:title ?title }} .
-            OPTIONAL {{ ?entity foaf:name ?name }} .
-            OPTIONAL {{ ?entity skos:prefLabel ?prefLabel }} .
         """
         
         # Add search filter if provided
         if search:
+            escaped_search = search.replace('\\', '\\\\').replace('"', '\\"')
             base_query += f"""
             FILTER (
-                CONTAINS(LCASE(STR(?entity)), LCASE("{search}")) ||
-                CONTAINS(LCASE(STR(?label)), LCASE("{search}")) ||
-                CONTAINS(LCASE(STR(?title)), LCASE("{search}")) ||
-                CONTAINS(LCASE(STR(?name)), LCASE("{search}")) ||
-                CONTAINS(LCASE(STR(?prefLabel)), LCASE("{search}"))
+                CONTAINS(LCASE(STR(?entity)), LCASE("{escaped_search}")) ||
+                EXISTS {{
+                    ?entity ?labelPred ?label .
+                    FILTER(?labelPred IN ({label_predicates_sparql()}))
+                    FILTER(CONTAINS(LCASE(STR(?label)), LCASE("{escaped_search}")))
+                }}
             )
             """
         
@@ -286,31 +571,28 @@ def get_entities_by_type(graph_name):
         
         # Count query
         count_query = f"SELECT (COUNT(DISTINCT ?entity) AS ?total) {base_query}"
-        count_results = query_sparql(count_query)
+        count_results = query_sparql(count_query, origin='get_entities_by_type.count')
         total = int(count_results[0]['total']['value']) if count_results else 0
         
         # Data query
         data_query = f"""
-        SELECT DISTINCT ?entity ?label ?title ?name ?prefLabel 
+        SELECT DISTINCT ?entity
         {base_query}
         ORDER BY ?entity
         LIMIT {limit}
         OFFSET {offset}
         """
         
-        results = query_sparql(data_query)
+        results = query_sparql(data_query, origin='get_entities_by_type.page')
         entities = []
         
         if results:
-            for result in results:
-                entity_uri = str(result['entity']['value'])
-                
+            entity_uris = [str(result['entity']['value']) for result in results]
+            labels = resolve_labels(graph_uri, entity_uris)
+            
+            for entity_uri in entity_uris:
                 # Get the best available label
-                label = None
-                for label_key in ['label', 'title', 'name', 'prefLabel']:
-                    if result.get(label_key) and result[label_key].get('value'):
-                        label = str(result[label_key]['value'])
-                        break
+                label = labels.get(entity_uri)
                 
                 if not label:
                     # Use the last part of URI as fallback
@@ -319,7 +601,7 @@ def get_entities_by_type(graph_name):
                 entities.append({
                     'uri': entity_uri,
                     'label': label,
-                    'properties': {k: str(v['value']) for k, v in result.items() if v and v.get('value') and k != 'entity'}
+                    'properties': {'label': labels[entity_uri]} if entity_uri in labels else {}
                 })
         
         return jsonify({
@@ -379,45 +661,128 @@ def force_complete_job(job_id):
     except Exception as e:
         return jsonify({"error": f"Failed to complete job: {str(e)}"}), 500
 
-def process_upload_async(job_id: str, graph: Graph, graph_name: str):
-    """Process upload in background with progress updates"""
+def store_upload_graph(job_id: str, graph: Graph, graph_name: str) -> str:
+    """Store one target graph of an upload and refresh what is derived from it; returns its graph URI"""
+    # Create graph URI - use default if graph_name is empty
+    if not graph_name or graph_name.strip() == '':
+        graph_uri = config.default_graph_uri
+    else:
+        graph_uri = config.get_graph_uri(graph_name)
+    
+    # The graph starts changing with the first batch
+    bump_graph_version(graph_name)
+    graph_mirrors.begin_write(graph_name)
+    update_job_progress(job_id, graph_name, status='uploading')
+    try:
+        # Artifacts computed from the uploaded file describe the graph only if it held nothing before
+        was_empty = graph_is_empty(graph_uri)
+        cards_complete = entity_cards.begin_upload(graph_name or 'default', graph_uri)
+        
+        # Progress callback function
+        def progress_callback(batch_num, processed_triples, total_triples, total_batches):
+            update_job_progress(job_id, graph_name, batch_num, processed_triples, total_batches)
+        
+        # Upload data with progress tracking (batch sizes adapt to Virtuoso's latency)
+        with profile_stage('upload'):
+            success = storeDataToGraphInBatches(
+                graph_uri, 
+                graph, 
+                progress_callback=progress_callback
+            )
+        # One data version marker per upload (a failed one may have stored some batches)
+        record_write(graph_uri)
+        
+        if not success:
+            raise RuntimeError(f"Failed to upload data to Virtuoso graph {graph_name or 'default'}")
+        
+        # Graph content changed - update the mirror and entity cards, drop derived artifacts and, for a
+        # new graph, profile the upload and extract its class hierarchy (appends are recomputed via
+        # SPARQL when next needed)
+        with profile_stage('mirror'):
+            graph_mirrors.apply_upload(graph_name, graph)
+        with profile_stage('cards'):
+            entity_cards.apply_upload(graph_name or 'default', graph, cards_complete)
+        on_graph_changed(graph_name)
+        if was_empty:
+            with profile_stage('profile'):
+                property_profile = profile_graph_object(graph, graph_uri)
+            store_artifact(graph_name, 'propertyProfile', property_profile)
+            store_artifact(graph_name, 'schemaSummary', build_schema_summary(property_profile))
+            with profile_stage('hierarchy'):
+                store_artifact(graph_name, 'classHierarchy', class_hierarchy_from_graph(graph, graph_uri))
+    except Exception:
+        graph_mirrors.drop(graph_name)
+        entity_cards.drop_graph(graph_name or 'default')
+        update_job_progress(job_id, graph_name, status='failed')
+        raise
+    
+    update_job_progress(job_id, graph_name, status='success')
+    precompute.enqueue(graph_name or 'default', *GRAPH_WARM_TASKS)
+    return graph_uri
+
+def store_upload_graph_profiled(profile, job_id, graph, graph_name):
+    """store_upload_graph on an executor thread, its stages recorded in the upload's profile"""
+    if profile is None:
+        return store_upload_graph(job_id, graph, graph_name)
+    with profile.attached():
+        return store_upload_graph(job_id, graph, graph_name)
+
+def process_upload_async(job_id: str, graph: Graph, graph_name: str, profile_mode: Optional[str] = None,
+                         targets: Optional[List] = None, parse_seconds: Optional[float] = None):
+    """Process upload in background with progress updates
+
+    ``targets`` lists (graph name, graph) pairs of a multi-graph upload;
+    each graph gets its own batch stream, up to UPLOAD_PARALLEL_GRAPHS at
+    a time, and the largest one is analysed for the result view.
+    ``parse_seconds`` (parsed by the request) is added to the job's profile.
+    """
+    profile = None
+    if profile_mode:
+        profile = ActiveProfile('upload', f'upload job {job_id}', profile_mode).start()
+        if parse_seconds is not None:
+            profile.add_stage_seconds('parse', parse_seconds)
+        with job_lock:
+            if job_id in upload_jobs:
+                upload_jobs[job_id].profile_id = profile.id
     try:
         job = get_job(job_id)
         if not job:
             return
         
-        # Create graph URI - use default if graph_name is empty
-        if not graph_name or graph_name.strip() == '':
-            graph_uri = config.default_graph_uri
-        else:
-            graph_uri = config.get_graph_uri(graph_name)
-        
+        targets = targets or [(graph_name, graph)]
         sparql_endpoint = config.external_virtuoso_sparql_endpoint
         
-        # Progress callback function
-        def progress_callback(batch_num, processed_triples, total_triples):
-            update_job_progress(job_id, batch_num, processed_triples)
-        
-        # Upload data with progress tracking
-        success = storeDataToGraphInBatches(
-            graph_uri, 
-            graph, 
-            batch_size=2000, 
-            progress_callback=progress_callback
-        )
-        
-        if not success:
-            fail_job(job_id, "Failed to upload data to Virtuoso")
-            return
+        if len(targets) == 1:
+            graph_uris = [store_upload_graph(job_id, graph, graph_name)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(targets), config.upload_parallel_graphs),
+                                    thread_name_prefix='upload') as executor:
+                futures = [executor.submit(store_upload_graph_profiled, profile, job_id, target_graph, target_name)
+                           for target_name, target_graph in targets]
+                errors = []
+                graph_uris = []
+                for future in futures:
+                    try:
+                        graph_uris.append(future.result())
+                    except Exception as e:
+                        errors.append(str(e))
+            if errors:
+                fail_job(job_id, f"{len(errors)} of {len(targets)} graphs failed: {'; '.join(errors)}")
+                return
         
         # Analyze the uploaded data with progress tracking
-        result_data = analyze_uploaded_data_optimized(graph, graph_name, graph_uri, sparql_endpoint, job_id)
+        (graph_name, graph), graph_uri = max(zip(targets, graph_uris), key=lambda item: len(item[0][1]))
+        with profile_stage('analyze'):
+            result_data = analyze_uploaded_data_optimized(graph, graph_name, graph_uri, sparql_endpoint, job_id)
         
         # Mark job as completed
         complete_job(job_id, result_data)
         
     except Exception as e:
         fail_job(job_id, str(e))
+    finally:
+        if profile:
+            profile.stop(jobId=job_id)
 
 def analyze_uploaded_data_optimized(graph, graph_name, graph_uri, sparql_endpoint, job_id):
     
@@ -460,8 +825,12 @@ def get_analysis_progress(job_id: str):
     """Get analysis progress"""
     return analysis_progress.get(job_id, {})
 
-def create_analysis_tabs(analysis_data, graph_name, graph_uri, sparql_endpoint):
-    """Create analysis tabs structure - unified for both upload and graph analysis"""
+def create_analysis_tabs(analysis_data, graph_name, graph_uri, sparql_endpoint, preview_instances=True):
+    """Create analysis tabs structure - unified for both upload and graph analysis
+
+    With preview_instances=False the class tabs are created without the
+    per-class preview query; the tables load their first page server-side.
+    """
     tabs = []
     
     # Create upload info structure
@@ -489,6 +858,9 @@ def create_analysis_tabs(analysis_data, graph_name, graph_uri, sparql_endpoint):
         'uploadInfo': upload_info
     })
     
+    # Per-class property profiles (columns, fill rates) computed with the graph
+    property_profile = get_artifact(graph_name, 'propertyProfile')
+    
     # Create detailed tabs for each class with instances
     try:
         for class_item in list(analysis_data.get('classList', [])):
@@ -498,12 +870,17 @@ def create_analysis_tabs(analysis_data, graph_name, graph_uri, sparql_endpoint):
                 instance_count = class_item.get('instanceCount', 0)
                 
                 # Always use SPARQL for consistency - both upload and analysis use same logic
-                instance_data = get_instance_data_from_sparql(class_uri, graph_uri)
+                if preview_instances:
+                    instance_data = get_instance_data_from_sparql(class_uri, graph_uri)
+                else:
+                    instance_data = []
                     
-                if instance_data:
+                if instance_data or not preview_instances:
                     # Create a copy of upload_info with class-specific information
                     class_upload_info = upload_info.copy()
                     class_upload_info['classUri'] = class_uri
+                    if property_profile:
+                        class_upload_info['propertyProfile'] = property_profile['classes'].get(class_uri)
                     
                     tabs.append({
                         'label': f'{class_label} ({instance_count})',
@@ -521,35 +898,28 @@ def create_analysis_tabs(analysis_data, graph_name, graph_uri, sparql_endpoint):
 def get_instance_data_from_sparql(class_uri, graph_uri):
     """Get instance data via SPARQL queries (graph analysis context)"""
     try:
-        # Query for instances with their labels
+        # Query for instances; labels come from the shared label cache
         instances_query = f"""
-        SELECT DISTINCT ?instance ?label
+        SELECT DISTINCT ?instance
         FROM <{graph_uri}>
         WHERE {{
           ?instance a <{class_uri}> .
-          OPTIONAL {{
-            ?instance ?labelPred ?label .
-            FILTER(?labelPred IN (<http://www.w3.org/2000/01/rdf-schema#label>, 
-                                 <http://xmlns.com/foaf/0.1/name>, 
-                                 <http://schema.org/name>))
-          }}
         }}
         LIMIT 20
         """
         
-        instances_result = query_sparql(instances_query)
+        instances_result = query_sparql(instances_query, origin='get_instance_data_from_sparql.preview')
         if not instances_result:
             return [{'label': 'No instances found', 'uri': ''}]
             
         instance_data = []
+        labels = resolve_labels(graph_uri, [binding['instance']['value'] for binding in instances_result[:20]])
         
         for binding in instances_result[:20]:
             instance_uri = binding['instance']['value']
             
             # Get label or create one from URI
-            label = None
-            if 'label' in binding and binding['label']:
-                label = binding['label']['value']
+            label = labels.get(instance_uri)
             
             if not label:
                 if '#' in instance_uri:
@@ -572,7 +942,7 @@ def get_instance_data_from_sparql(class_uri, graph_uri):
 
 @app.route('/upload_file', methods=['POST'])
 def upload_file():
-    """Upload TTL file and create processing job"""
+    """Upload an RDF file (Turtle, N-Triples, N-Quads, TriG, RDF/XML or JSON-LD) and create a processing job"""
     try:
         # Check if file was uploaded
         if 'file' not in request.files:
@@ -584,25 +954,30 @@ def upload_file():
         if file.filename == '':
             return jsonify({"error": "No file selected"}), 400
         
-        if not file.filename.lower().endswith('.ttl'):
-            return jsonify({"error": "File must be a TTL file"}), 400
-        
-        # Read TTL file content
-        ttl_content = file.read().decode('utf-8')
+        rdf_format = upload_format(file.filename)
+        if not rdf_format:
+            return jsonify({"error": f"Unsupported file type. Use one of: {', '.join(sorted(UPLOAD_FORMATS))}"}), 400
         
-        # Parse TTL content with rdflib
-        graph = Graph()
-        graph.parse(data=ttl_content, format='turtle')
+        # Parse with rdflib; quad formats are split into one target per named graph
+        parse_start = time.perf_counter()
+        with timed(rdf_parse_duration.labels(rdf_format)), profile_stage('parse'):
+            targets = parse_upload(file.read(), rdf_format, graph_name)
+        parse_seconds = time.perf_counter() - parse_start
+        if not targets:
+            return jsonify({"error": "The file contains no triples"}), 400
         
-        total_triples = len(graph)
+        total_triples = sum(len(target_graph) for _, target_graph in targets)
+        # The largest graph is the one analysed and shown after the upload
+        graph_name, graph = max(targets, key=lambda target: len(target[1]))
         
         # Create upload job
-        job_id = create_upload_job(file.filename, graph_name, total_triples)
+        job_id = create_upload_job(file.filename, graph_name, total_triples,
+                                   {name: len(target_graph) for name, target_graph in targets})
         
         # Start background processing
         thread = threading.Thread(
             target=process_upload_async,
-            args=(job_id, graph, graph_name),
+            args=(job_id, graph, graph_name, g.profile.mode if g.get('profile') else None, targets, parse_seconds),
             daemon=True
         )
         thread.start()
@@ -613,6 +988,7 @@ def upload_file():
             "jobId": job_id,
             "filename": file.filename,
             "graphName": graph_name or 'default',
+            "graphNames": [name or 'default' for name, _ in targets],
             "triplesCount": total_triples
         })
             
@@ -620,6 +996,7 @@ def upload_file():
         return jsonify({"error": f"Failed to start upload: {str(e)}"}), 500
 
 @app.route('/api/graphs', methods=['GET'])
+@conditional_get
 def list_graphs():
     """List all named graphs in the system"""
     try:
@@ -632,7 +1009,7 @@ def list_graphs():
         ORDER BY ?graph
         """
         
-        result = query_sparql(sparql_query)
+        result = query_sparql(sparql_query, origin='list_graphs.graphs')
         
         if result and isinstance(result, list):
             graphs = []
@@ -687,7 +1064,7 @@ def delete_graph(graph_name):
         }}
         """
         
-        count_result = query_sparql(count_query)
+        count_result = query_sparql(count_query, origin='delete_graph.count')
         triple_count = 0
         
         if count_result and isinstance(count_result, list) and len(count_result) > 0:
@@ -730,6 +1107,10 @@ def delete_graph(graph_name):
             
             if response.status_code in [200, 204]:
                 print(f"Successfully deleted graph {graph_uri} with {triple_count} triples")
+                record_write(graph_uri)
+                graph_mirrors.drop(graph_name)
+                entity_cards.drop_graph(graph_name)
+                on_graph_changed(graph_name)
                 return jsonify({
                     'success': True,
                     'message': f'Graph "{graph_name}" deleted successfully',
@@ -744,7 +1125,10 @@ def delete_graph(graph_name):
         else:
             # Fallback: try using query_sparql if requests is not available
             try:
-                query_sparql(delete_query)
+                query_sparql(delete_query, origin='delete_graph.clear')
+                graph_mirrors.drop(graph_name)
+                entity_cards.drop_graph(graph_name)
+                on_graph_changed(graph_name)
                 return jsonify({
                     'success': True,
                     'message': f'Graph "{graph_name}" deleted successfully',
@@ -763,7 +1147,8 @@ def delete_graph(graph_name):
             'error': f'Failed to delete graph: {str(e)}'
         }), 500
 
-def create_graph_analysis_data(graph_uri, graph_name=None, graph=None, sparql_endpoint=None):
+def create_graph_analysis_data(graph_uri, graph_name=None, graph=None, sparql_endpoint=None,
+                               approximate=False, budget_ms=None):
     """Create analysis data for a specific graph - reusable for both upload analysis and graph viewing"""
     try:
         analysis_results = {
@@ -778,11 +1163,17 @@ def create_graph_analysis_data(graph_uri, graph_name=None, graph=None, sparql_en
 
         # If we have a graph object (from upload), analyze it directly
         if graph:
-            return analyze_graph_object(graph, analysis_results)
+            analysis_results = analyze_graph_object(graph, analysis_results)
+            return attach_class_rollups(analysis_results, graph_name, graph_uri, graph)
+        
+        # Sampled estimates within a latency budget for very large graphs
+        if approximate:
+            return analyze_graph_approximate(graph_uri, analysis_results, budget_ms=budget_ms)
         
         # Otherwise query the SPARQL endpoint
         endpoint_url = sparql_endpoint or f"{config.virtuoso_url}/sparql"
-        return analyze_graph_via_sparql(graph_uri, endpoint_url, analysis_results)
+        analysis_results = analyze_graph_via_sparql(graph_uri, endpoint_url, analysis_results)
+        return attach_class_rollups(analysis_results, graph_name, graph_uri)
         
     except Exception as e:
         print(f"Error in create_graph_analysis_data: {e}")
@@ -792,6 +1183,39 @@ def create_graph_analysis_data(graph_uri, graph_name=None, graph=None, sparql_en
             'graphUri': graph_uri
         }
 
+def get_class_hierarchy(graph_name, graph_uri, graph=None, refresh=False):
+    """Get the cached class hierarchy of a graph, extracting it (from ``graph`` or via SPARQL) if missing
+
+    A hierarchy extracted from ``graph`` (an uploaded file) is not cached:
+    the file may have been appended to a graph holding more data.
+    """
+    hierarchy = None if refresh else get_artifact(graph_name, 'classHierarchy')
+    if hierarchy is None:
+        if graph is not None:
+            return class_hierarchy_from_graph(graph, graph_uri)
+        version = get_graph_version(graph_name)
+        hierarchy = class_hierarchy_via_sparql(graph_uri)
+        store_current_artifact(graph_name, 'classHierarchy', hierarchy, version)
+    return hierarchy
+
+def attach_class_rollups(analysis_results, graph_name, graph_uri, graph=None):
+    """Add subclass-inclusive instance counts (totalInstanceCount) to the analysed classes"""
+    if 'error' in analysis_results:
+        return analysis_results
+    try:
+        hierarchy = get_class_hierarchy(graph_name, graph_uri, graph=graph)
+    except Exception as e:
+        print(f"Error extracting class hierarchy of graph {graph_uri}: {e}")
+        return analysis_results
+    
+    classes = hierarchy['classes']
+    for class_entry in analysis_results.get('classList', []):
+        rollup = classes.get(class_entry['uri'])
+        class_entry['totalInstanceCount'] = rollup['totalCount'] if rollup else class_entry['instanceCount']
+        class_entry['subclassCount'] = len(rollup['children']) if rollup else 0
+    analysis_results['subclassEdgeCount'] = hierarchy['subclassEdgeCount']
+    return analysis_results
+
 def analyze_graph_object(graph, analysis_results):
     """Analyze a graph object directly (for upload analysis)"""
     total_triples = len(graph)
@@ -866,7 +1290,7 @@ def analyze_graph_via_sparql(graph_uri, sparql_endpoint, analysis_results):
         WHERE {{ ?s ?p ?o }}
         """
         
-        count_result = query_sparql(count_query)
+        count_result = query_sparql(count_query, origin='analyze_graph_via_sparql.triple_count')
         if count_result and len(count_result) > 0:
             analysis_results['totalTriples'] = int(count_result[0]['count']['value'])
         
@@ -883,7 +1307,7 @@ def analyze_graph_via_sparql(graph_uri, sparql_endpoint, analysis_results):
         LIMIT 100
         """
         
-        classes_result = query_sparql(classes_query)
+        classes_result = query_sparql(classes_query, origin='analyze_graph_via_sparql.classes')
         if classes_result and len(classes_result) > 0:
             class_analysis = []
             for binding in classes_result:
@@ -918,7 +1342,7 @@ def analyze_graph_via_sparql(graph_uri, sparql_endpoint, analysis_results):
         LIMIT 50
         """
         
-        predicates_result = query_sparql(predicates_query)
+        predicates_result = query_sparql(predicates_query, origin='analyze_graph_via_sparql.predicates')
         if predicates_result and len(predicates_result) > 0:
             predicates_analysis = []
             for binding in predicates_result:
@@ -942,44 +1366,308 @@ def analyze_graph_via_sparql(graph_uri, sparql_endpoint, analysis_results):
         analysis_results['error'] = str(e)
         return analysis_results
 
+# Graphs with an exact analysis running in the background (approximate mode)
+analysis_refinements = set()
+profile_refreshes = set()
+refinement_lock = threading.Lock()
+
+def refine_analysis_async(graph_name, graph_uri, sparql_endpoint):
+    """Compute the exact analysis in the background and cache it"""
+    with refinement_lock:
+        if graph_name in analysis_refinements:
+            return
+        analysis_refinements.add(graph_name)
+    
+    def run():
+        try:
+            version = get_graph_version(graph_name)
+            analysis_data = create_graph_analysis_data(
+                graph_uri=graph_uri,
+                graph_name=graph_name,
+                sparql_endpoint=sparql_endpoint
+            )
+            if 'error' not in analysis_data:
+                store_current_artifact(graph_name, 'analysis', analysis_data, version)
+        finally:
+            with refinement_lock:
+                analysis_refinements.discard(graph_name)
+    
+    threading.Thread(target=run, daemon=True).start()
+
 @app.route('/api/graphs/<graph_name>/analysis', methods=['GET'])
+@conditional_get
 def get_graph_analysis(graph_name):
-    """Get analysis for a specific named graph"""
+    """Get analysis for a specific named graph
+
+    With ?mode=approximate the counts are estimated from random samples
+    within ?budgetMs and the exact analysis is computed in the background;
+    repeating the request returns the exact numbers once they are ready.
+    The exact analysis and its tabs are cached until the graph changes
+    (?refresh=true recomputes them).
+    """
     try:
         graph_uri = config.get_graph_uri(graph_name)
         sparql_endpoint = f"{config.virtuoso_url}/sparql"
+        approximate = request.args.get('mode', 'exact') == 'approximate'
+        refresh = request.args.get('refresh', 'false').lower() == 'true'
+        
+        exact_analysis = get_artifact(graph_name, 'analysis') if approximate else None
+        refinement_pending = False
+        
+        if approximate:
+            if exact_analysis:
+                analysis_data = exact_analysis
+            else:
+                analysis_data = create_graph_analysis_data(
+                    graph_uri=graph_uri,
+                    graph_name=graph_name,
+                    approximate=True,
+                    budget_ms=request.args.get('budgetMs', type=int)
+                )
+                refine_analysis_async(graph_name, graph_uri, sparql_endpoint)
+                refinement_pending = True
+            
+            # Class tabs without previews; the tables load their first page server-side
+            tabs = create_analysis_tabs(
+                analysis_data=analysis_data,
+                graph_name=graph_name,
+                graph_uri=graph_uri,
+                sparql_endpoint=sparql_endpoint,
+                preview_instances=False
+            )
+        else:
+            analysis_data, tabs = get_exact_analysis(graph_name, graph_uri, refresh=refresh)
         
-        # Use the unified analysis function
+        # Property profiles are slow aggregates; the tabs get them once they are ready
+        property_profile = get_artifact(graph_name, 'propertyProfile')
+        profile_pending = property_profile is None and not approximate
+        if profile_pending:
+            profile_graph_async(graph_name, graph_uri)
+        tabs = attach_tab_profiles(tabs, property_profile)
+        
+        response = jsonify({
+            'success': True,
+            'graphName': graph_name,
+            'graphUri': graph_uri,
+            'tabs': tabs,
+            'analysis': analysis_data,
+            'approximate': 'approximation' in analysis_data,
+            'refinementPending': refinement_pending,
+            'profilePending': profile_pending
+        })
+        if refinement_pending or profile_pending:
+            # Estimates and missing profiles are filled in without a version change
+            response.headers['Cache-Control'] = 'no-store'
+        return response
+        
+    except Exception as e:
+        print(f"Error analyzing graph {graph_name}: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def get_exact_analysis(graph_name, graph_uri, refresh=False):
+    """Get the cached exact analysis and class tabs of a graph, computing them via SPARQL if missing"""
+    analysis_data = None if refresh else get_artifact(graph_name, 'analysis')
+    tabs = None if refresh else get_artifact(graph_name, 'analysisTabs')
+    if analysis_data is not None and tabs is not None:
+        return analysis_data, tabs
+    
+    version = get_graph_version(graph_name)
+    sparql_endpoint = f"{config.virtuoso_url}/sparql"
+    if analysis_data is None:
         analysis_data = create_graph_analysis_data(
             graph_uri=graph_uri,
             graph_name=graph_name,
             sparql_endpoint=sparql_endpoint
         )
+    tabs = create_analysis_tabs(
+        analysis_data=analysis_data,
+        graph_name=graph_name,
+        graph_uri=graph_uri,
+        sparql_endpoint=sparql_endpoint
+    )
+    if 'error' not in analysis_data:
+        store_current_artifact(graph_name, 'analysis', analysis_data, version)
+        store_current_artifact(graph_name, 'analysisTabs', tabs, version)
+    return analysis_data, tabs
+
+def profile_graph_async(graph_name, graph_uri):
+    """Compute a graph's property profile in the background and cache it"""
+    with refinement_lock:
+        if graph_name in profile_refreshes:
+            return
+        profile_refreshes.add(graph_name)
+    
+    def run():
+        try:
+            get_property_profile(graph_name, graph_uri)
+        except Exception as e:
+            print(f"Error computing property profile for graph {graph_name}: {e}")
+        finally:
+            with refinement_lock:
+                profile_refreshes.discard(graph_name)
+    
+    threading.Thread(target=run, daemon=True).start()
+
+def attach_tab_profiles(tabs, property_profile):
+    """Class tabs carrying their class' current property profile (copies; cached tabs stay untouched)"""
+    if not property_profile:
+        return tabs
+    attached = []
+    for tab in tabs:
+        class_uri = tab.get('uploadInfo', {}).get('classUri')
+        if tab.get('type') == 'table' and class_uri:
+            tab = dict(tab, uploadInfo=dict(tab['uploadInfo'],
+                                            propertyProfile=property_profile['classes'].get(class_uri)))
+        attached.append(tab)
+    return attached
+
+def get_property_profile(graph_name, graph_uri, refresh=False):
+    """Get the cached property profile of a graph, computing it via SPARQL if missing"""
+    profile = None if refresh else get_artifact(graph_name, 'propertyProfile')
+    if profile is None:
+        version = get_graph_version(graph_name)
+        profile = profile_graph_via_sparql(graph_uri)
+        store_current_artifact(graph_name, 'propertyProfile', profile, version)
+    return profile
+
+@app.route('/api/graphs/<graph_name>/profile', methods=['GET'])
+@conditional_get
+def get_graph_property_profile(graph_name):
+    """Get per-class property coverage profile (fill rate, cardinality, datatypes)"""
+    try:
+        from urllib.parse import unquote
+        graph_uri = config.get_graph_uri(graph_name)
+        refresh = request.args.get('refresh', 'false').lower() == 'true'
         
-        # Create tabs using the unified function
-        tabs = create_analysis_tabs(
-            analysis_data=analysis_data,
-            graph_name=graph_name,
-            graph_uri=graph_uri,
-            sparql_endpoint=sparql_endpoint
-        )
+        profile = get_property_profile(graph_name, graph_uri, refresh=refresh)
+        entry = get_artifact_entry(graph_name, 'propertyProfile') or {}
+        
+        class_uri = request.args.get('class')
+        if class_uri:
+            class_profile = profile['classes'].get(unquote(class_uri))
+            if class_profile is None:
+                return jsonify({
+                    'success': False,
+                    'error': f'Class "{class_uri}" not found in graph "{graph_name}"'
+                }), 404
+            return jsonify({
+                'success': True,
+                'graphName': graph_name,
+                'computedAt': entry.get('computedAt'),
+                'profile': class_profile
+            })
+        
+        return jsonify({
+            'success': True,
+            'graphName': graph_name,
+            'computedAt': entry.get('computedAt'),
+            'profile': profile
+        })
+        
+    except Exception as e:
+        print(f"Error getting property profile for graph {graph_name}: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/graphs/<graph_name>/schema-summary', methods=['GET'])
+@conditional_get
+def get_graph_schema_summary(graph_name):
+    """Get the class-to-class link summary (overview map) of a graph"""
+    try:
+        graph_uri = config.get_graph_uri(graph_name)
+        refresh = request.args.get('refresh', 'false').lower() == 'true'
+        min_count = request.args.get('minCount', 1, type=int)
+        
+        summary = None if refresh else get_artifact(graph_name, 'schemaSummary')
+        if summary is None:
+            version = get_graph_version(graph_name)
+            profile = get_property_profile(graph_name, graph_uri, refresh=refresh)
+            summary = build_schema_summary(profile)
+            store_current_artifact(graph_name, 'schemaSummary', summary, version)
+        
+        edges = summary['edges']
+        if min_count > 1:
+            edges = [edge for edge in edges if edge['count'] >= min_count]
         
         return jsonify({
             'success': True,
             'graphName': graph_name,
             'graphUri': graph_uri,
-            'tabs': tabs,
-            'analysis': analysis_data
+            'nodes': summary['nodes'],
+            'edges': edges
         })
         
     except Exception as e:
-        print(f"Error analyzing graph {graph_name}: {e}")
+        print(f"Error getting schema summary for graph {graph_name}: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/graphs/<graph_name>/class-hierarchy', methods=['GET'])
+@conditional_get
+def get_graph_class_hierarchy(graph_name):
+    """Get the rdfs:subClassOf tree with direct and rolled-up (subclass-inclusive) instance counts"""
+    try:
+        from urllib.parse import unquote
+        graph_uri = config.get_graph_uri(graph_name)
+        refresh = request.args.get('refresh', 'false').lower() == 'true'
+        root = unquote(request.args.get('root', '')) or None
+        try:
+            depth = max(1, min(int(request.args.get('depth', 10)), 50))
+            min_count = int(request.args.get('minCount', 0))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'depth and minCount must be integers'}), 400
+        
+        hierarchy = get_class_hierarchy(graph_name, graph_uri, refresh=refresh)
+        entry = get_artifact_entry(graph_name, 'classHierarchy') or {}
+        if root and root not in hierarchy['classes']:
+            return jsonify({
+                'success': False,
+                'error': f'Class "{root}" not found in graph "{graph_name}"'
+            }), 404
+        
+        tree = hierarchy_tree(hierarchy, root=root, depth=depth, min_count=min_count)
+        
+        # Prefer the graph's labels over URI fragments
+        def collect(nodes, uris):
+            for node in nodes:
+                uris.add(node['uri'])
+                collect(node.get('children', []), uris)
+            return uris
+        labels = resolve_labels(graph_uri, collect(tree, set()))
+        
+        def relabel(nodes):
+            for node in nodes:
+                node['label'] = labels.get(node['uri'], node['label'])
+                relabel(node.get('children', []))
+        relabel(tree)
+        
+        return jsonify({
+            'success': True,
+            'graphName': graph_name,
+            'graphUri': graph_uri,
+            'computedAt': entry.get('computedAt'),
+            'classCount': hierarchy['classCount'],
+            'subclassEdgeCount': hierarchy['subclassEdgeCount'],
+            'typedInstanceCount': hierarchy['typedInstanceCount'],
+            'tree': tree
+        })
+        
+    except Exception as e:
+        print(f"Error getting class hierarchy for graph {graph_name}: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 @app.route('/api/graphs/<graph_name>/class/<path:class_uri>/instances', methods=['GET'])
+@conditional_get
 def get_class_instances_paginated(graph_name, class_uri):
     """Get paginated instances for a specific class with filtering support"""
     try:
@@ -1002,29 +1690,28 @@ def get_class_instances_paginated(graph_name, class_uri):
         # Build filter condition for SPARQL
         filter_condition = ""
         if filter_text.strip():
-            escaped_filter = filter_text.replace("'", "\\'").replace("\\", "\\\\")
+            escaped_filter = filter_text.replace("\\", "\\\\").replace("'", "\\'")
             filter_condition = f"""
             FILTER(
-                CONTAINS(LCASE(COALESCE(?label, "")), LCASE('{escaped_filter}')) ||
-                CONTAINS(LCASE(STR(?instance)), LCASE('{escaped_filter}'))
+                CONTAINS(LCASE(STR(?instance)), LCASE('{escaped_filter}')) ||
+                EXISTS {{
+                    ?instance ?labelPred ?label .
+                    FILTER(?labelPred IN ({label_predicates_sparql()}))
+                    FILTER(CONTAINS(LCASE(STR(?label)), LCASE('{escaped_filter}')))
+                }}
             )
             """
         
-        # Query with pagination and filtering
+        # Query with pagination and filtering (labels are resolved afterwards,
+        # so instances are ordered by URI)
         instances_query = f"""
-        SELECT DISTINCT ?instance ?label
+        SELECT DISTINCT ?instance
         FROM <{graph_uri}>
         WHERE {{
           ?instance a <{class_uri}> .
-          OPTIONAL {{
-            ?instance ?labelPred ?label .
-            FILTER(?labelPred IN (<http://www.w3.org/2000/01/rdf-schema#label>, 
-                                 <http://xmlns.com/foaf/0.1/name>, 
-                                 <http://schema.org/name>))
-          }}
           {filter_condition}
         }}
-        ORDER BY COALESCE(?label, STR(?instance)) ?instance
+        ORDER BY ?instance
         LIMIT {page_size}
         OFFSET {offset}
         """
@@ -1035,35 +1722,34 @@ def get_class_instances_paginated(graph_name, class_uri):
         FROM <{graph_uri}>
         WHERE {{
           ?instance a <{class_uri}> .
-          OPTIONAL {{
-            ?instance ?labelPred ?label .
-            FILTER(?labelPred IN (<http://www.w3.org/2000/01/rdf-schema#label>, 
-                                 <http://xmlns.com/foaf/0.1/name>, 
-                                 <http://schema.org/name>))
-          }}
           {filter_condition}
         }}
         """
         
-        # Execute queries
-        instances_result = query_sparql(instances_query)
-        count_result = query_sparql(count_query)
-        
-        # Process count
-        total_count = 0
-        if count_result and len(count_result) > 0:
-            total_count = int(count_result[0]['count']['value'])
+        mirror = graph_mirrors.get(graph_name)
+        if mirror:
+            instance_uris, total_count = mirror.class_instances(class_uri, offset, page_size, filter_text.strip())
+        else:
+            # Execute queries
+            instances_result = query_sparql(instances_query, origin='get_class_instances_paginated.page')
+            instance_uris = [binding['instance']['value'] for binding in instances_result or []]
+            
+            # Unfiltered totals come from the cached entity statistics when available
+            total_count = None if filter_text.strip() else cached_instance_count(graph_name, class_uri)
+            if total_count is None:
+                count_result = query_sparql(count_query, origin='get_class_instances_paginated.count')
+                total_count = 0
+                if count_result and len(count_result) > 0:
+                    total_count = int(count_result[0]['count']['value'])
         
         # Process instances
         instance_data = []
-        if instances_result:
-            for binding in instances_result:
-                instance_uri = binding['instance']['value']
+        if instance_uris:
+            labels = graph_labels(graph_uri, instance_uris, mirror=mirror)
+            for instance_uri in instance_uris:
                 
                 # Get label or create one from URI
-                label = None
-                if 'label' in binding and binding['label']:
-                    label = binding['label']['value']
+                label = labels.get(instance_uri)
                 
                 if not label:
                     if '#' in instance_uri:
@@ -1104,9 +1790,125 @@ def get_class_instances_paginated(graph_name, class_uri):
             'error': str(e)
         }), 500
 
+def create_export_response(graph_name, class_uri=None):
+    """Build a streaming export response for a graph or a class slice"""
+    export_format = request.args.get('format', 'ntriples')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({
+            'success': False,
+            'error': f'Unsupported format "{export_format}". Use one of: {", ".join(EXPORT_FORMATS)}'
+        }), 400
+    
+    predicates = [p.strip() for p in request.args.get('predicates', '').split(',') if p.strip()]
+    invalid = [uri for uri in predicates + ([class_uri] if class_uri else []) if not is_safe_iri(uri)]
+    if invalid:
+        return jsonify({'success': False, 'error': f'Invalid IRI: {invalid[0]}'}), 400
+    graph_uri = config.get_graph_uri(graph_name)
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    filename = f"{graph_name}.{extension}"
+    if class_uri:
+        filename = f"{graph_name}-{uri_fragment(class_uri) or 'class'}.{extension}"
+    
+    stream = export_graph(graph_uri, export_format, class_uri=class_uri, predicates=predicates)
+    headers = {}
+    
+    if request.args.get('gzip', 'false').lower() == 'true':
+        # Explicit compressed download
+        stream = gzip_stream(stream)
+        mimetype = 'application/gzip'
+        filename += '.gz'
+    elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+        # Transparent compression on the wire
+        stream = gzip_stream(stream)
+        headers['Content-Encoding'] = 'gzip'
+        headers['Vary'] = 'Accept-Encoding'
+    
+    headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return Response(stream_with_context(stream), mimetype=mimetype, headers=headers)
+
+@app.route('/api/graphs/<graph_name>/export', methods=['GET'])
+def export_graph_data(graph_name):
+    """Stream a whole graph as N-Triples, Turtle or CSV (optionally gzipped)"""
+    try:
+        return create_export_response(graph_name)
+    except Exception as e:
+        print(f"Error exporting graph {graph_name}: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/graphs/<graph_name>/class/<path:class_uri>/export', methods=['GET'])
+def export_class_data(graph_name, class_uri):
+    """Stream the instances of a class as N-Triples, Turtle or CSV (optionally gzipped)"""
+    try:
+        from urllib.parse import unquote
+        return create_export_response(graph_name, class_uri=unquote(class_uri))
+    except Exception as e:
+        print(f"Error exporting class {class_uri} from graph {graph_name}: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def links_payload(entity_uri, links, labels):
+    """Nodes/edges payload around an entity from (subject, predicate, object) links"""
+    nodes = {}
+    edges = []
+    
+    # Process results
+    for subject, predicate, obj in links:
+        
+        # Add subject node
+        if subject not in nodes:
+            subject_label = labels.get(subject, uri_fragment(subject))
+            nodes[subject] = {
+                'id': subject,
+                'label': subject_label,
+                'uri': subject,
+                'isCentral': subject == entity_uri
+            }
+        
+        # Add object node
+        if obj not in nodes:
+            object_label = labels.get(obj, uri_fragment(obj))
+            nodes[obj] = {
+                'id': obj,
+                'label': object_label,
+                'uri': obj,
+                'isCentral': obj == entity_uri
+            }
+        
+        # Add edge
+        predicate_label = labels.get(predicate, uri_fragment(predicate))
+        edge_id = f"{subject}--{predicate}--{obj}"
+        edges.append({
+            'id': edge_id,
+            'source': subject,
+            'target': obj,
+            'label': predicate_label,
+            'uri': predicate
+        })
+    
+    if entity_uri not in nodes:
+        nodes[entity_uri] = {'id': entity_uri, 'label': labels.get(entity_uri, uri_fragment(entity_uri)),
+                             'uri': entity_uri, 'isCentral': True}
+    return {
+        'nodes': list(nodes.values()),
+        'edges': edges,
+        'centralNode': entity_uri
+    }
+
 @app.route('/api/graphs/<graph_name>/entities/<path:entity_uri>/graph', methods=['GET'])
+@conditional_get
 def get_entity_graph(graph_name, entity_uri):
-    """Get graph data for an entity and its connections"""
+    """Get graph data for an entity and its connections
+
+    With ?mode=summary the links are grouped per (direction, predicate):
+    each group reports its total count and, for the ?maxGroups largest,
+    the first ?pageSize neighbors in IRI order plus a cursor for the
+    neighbors endpoint. Meant for hub entities with very many links.
+    """
     try:
         from urllib.parse import unquote
         entity_uri = unquote(entity_uri)
@@ -1115,9 +1917,26 @@ def get_entity_graph(graph_name, entity_uri):
         
         graph_uri = config.get_graph_uri(graph_name)
         
-        # SPARQL query for entity and connections
+        if request.args.get('mode') == 'summary':
+            if not is_safe_iri(entity_uri):
+                return jsonify({'success': False, 'error': f'Invalid IRI: {entity_uri}'}), 400
+            page_size = max(1, min(request.args.get('pageSize', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+            max_groups = max(0, request.args.get('maxGroups', DEFAULT_MAX_GROUPS, type=int))
+            mirror = graph_mirrors.get(graph_name)
+            groups, results = neighborhood_summary(graph_uri, entity_uri, page_size, max_groups, mirror=mirror)
+            labels = graph_labels(graph_uri, {uri for row in results for uri in row} |
+                                  {group['predicate'] for group in groups}, mirror=mirror)
+            for group in groups:
+                group['label'] = labels.get(group['predicate'], uri_fragment(group['predicate']))
+            payload = links_payload(entity_uri, results, labels)
+            payload['groups'] = groups
+            if request.args.get('layout') == 'server':
+                attach_layout(graph_name, entity_uri, payload)
+            return graph_payload_response(payload)
+        
+        # SPARQL query for entity and connections (labels via the label cache)
         query = f"""
-        SELECT DISTINCT ?subject ?predicate ?object ?subjectLabel ?objectLabel ?predicateLabel
+        SELECT DISTINCT ?subject ?predicate ?object
         FROM <{graph_uri}>
         WHERE {{
             {{
@@ -1131,74 +1950,102 @@ def get_entity_graph(graph_name, entity_uri):
                 BIND(<{entity_uri}> AS ?object)
                 FILTER(!isLiteral(?subject))
             }}
-            
-            # Get labels
-            OPTIONAL {{ ?subject rdfs:label ?subjectLabel }}
-            OPTIONAL {{ ?object rdfs:label ?objectLabel }}
-            OPTIONAL {{ ?predicate rdfs:label ?predicateLabel }}
         }}
         LIMIT {max_nodes * 3}
         """
         
-        results = query_sparql(query)
+        card = entity_cards.get(graph_name, entity_uri) if entity_cards.enabled else None
+        results = card_links(entity_uri, card, max_nodes * 3) if card else None
+        card_graph = graph_name if results is not None else None
+        mirror = graph_mirrors.get(graph_name) if card_graph is None else None
+        if mirror:
+            results = mirror.neighborhood(entity_uri, max_nodes * 3)
+        elif card_graph is None:
+            results = [(binding['subject']['value'], binding['predicate']['value'], binding['object']['value'])
+                       for binding in query_sparql(query, origin='get_entity_graph.neighborhood') or []]
         
         if not results:
-            return jsonify({
-                'nodes': [{'id': entity_uri, 'label': get_uri_fragment(entity_uri), 'uri': entity_uri, 'isCentral': True}],
+            return graph_payload_response({
+                'nodes': [{'id': entity_uri, 'label': uri_fragment(entity_uri), 'uri': entity_uri, 'isCentral': True}],
                 'edges': [],
                 'centralNode': entity_uri
             })
         
-        nodes = {}
-        edges = []
+        labels = graph_labels(graph_uri, (uri for row in results for uri in row), mirror=mirror, card_graph=card_graph)
+        payload = links_payload(entity_uri, results, labels)
+        if request.args.get('layout') == 'server':
+            attach_layout(graph_name, entity_uri, payload)
+        return graph_payload_response(payload)
         
-        # Process results
-        for binding in results:
-            subject = binding['subject']['value']
-            predicate = binding['predicate']['value']
-            obj = binding['object']['value']
-            
-            # Add subject node
-            if subject not in nodes:
-                subject_label = binding.get('subjectLabel', {}).get('value', get_uri_fragment(subject))
-                nodes[subject] = {
-                    'id': subject,
-                    'label': subject_label,
-                    'uri': subject,
-                    'isCentral': subject == entity_uri
-                }
-            
-            # Add object node
-            if obj not in nodes:
-                object_label = binding.get('objectLabel', {}).get('value', get_uri_fragment(obj))
-                nodes[obj] = {
-                    'id': obj,
-                    'label': object_label,
-                    'uri': obj,
-                    'isCentral': obj == entity_uri
-                }
-            
-            # Add edge
-            predicate_label = binding.get('predicateLabel', {}).get('value', get_uri_fragment(predicate))
-            edge_id = f"{subject}--{predicate}--{obj}"
-            edges.append({
-                'id': edge_id,
-                'source': subject,
-                'target': obj,
-                'label': predicate_label,
-                'uri': predicate
-            })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/graphs/<graph_name>/entities/<path:entity_uri>/neighbors', methods=['GET'])
+@conditional_get
+def get_entity_neighbors(graph_name, entity_uri):
+    """Next page of one neighbor group of a neighborhood summary (?cursor from the group's nextCursor)"""
+    try:
+        from urllib.parse import unquote
+        entity_uri = unquote(entity_uri)
+        try:
+            direction, predicate, after = decode_cursor(request.args.get('cursor', ''))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        invalid = [uri for uri in (entity_uri, predicate) if not is_safe_iri(uri)]
+        if invalid:
+            return jsonify({'success': False, 'error': f'Invalid IRI: {invalid[0]}'}), 400
+        limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
         
-        return jsonify({
-            'nodes': list(nodes.values()),
-            'edges': edges,
-            'centralNode': entity_uri
-        })
+        graph_uri = config.get_graph_uri(graph_name)
+        mirror = graph_mirrors.get(graph_name)
+        neighbors, next_cursor = neighbor_page(graph_uri, entity_uri, direction, predicate, after, limit,
+                                               mirror=mirror)
+        results = [link(entity_uri, direction, predicate, neighbor) for neighbor in neighbors]
+        labels = graph_labels(graph_uri, set(neighbors) | {entity_uri, predicate}, mirror=mirror)
+        payload = links_payload(entity_uri, results, labels)
+        payload['group'] = {
+            'direction': direction,
+            'predicate': predicate,
+            'label': labels.get(predicate, uri_fragment(predicate)),
+            'returned': len(neighbors),
+            'nextCursor': next_cursor
+        }
+        return graph_payload_response(payload)
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        print(f"Error paging neighbors of {entity_uri} in graph {graph_name}: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/graphs/<graph_name>/layout', methods=['POST'])
+def layout_graph(graph_name):
+    """Positions for a node-link graph; nodes in `fixed` keep their place and new ones are laid out around them"""
+    if not layout_available():
+        return jsonify({'success': False, 'error': 'numpy is not installed'}), 501
+    try:
+        payload = request.get_json(silent=True) or {}
+        node_ids = payload.get('nodes', [])
+        edges = payload.get('edges', [])
+        fixed = payload.get('fixed') or {}
+        
+        if not isinstance(node_ids, list) or not node_ids:
+            return jsonify({'success': False, 'error': 'Missing nodes list'}), 400
+        if len(node_ids) > config.layout_max_nodes:
+            return jsonify({'success': False, 'error': f'At most {config.layout_max_nodes} nodes per layout'}), 400
+        
+        positions = compute_layout(
+            graph_name, payload.get('seed'), [str(node_id) for node_id in node_ids],
+            [(edge['source'], edge['target']) for edge in edges],
+            {node_id: (float(position['x']), float(position['y'])) for node_id, position in fixed.items()})
+        return jsonify({'success': True, 'positions': positions})
+        
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        return jsonify({'success': False, 'error': f'Invalid layout request: {e}'}), 400
+    except Exception as e:
+        print(f"Error computing layout for graph {graph_name}: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/graphs/<graph_name>/entities/<path:entity_uri>/literals', methods=['GET'])
+@conditional_get
 def get_entity_literals(graph_name, entity_uri):
     """Get literal properties for an entity"""
     try:
@@ -1208,23 +2055,31 @@ def get_entity_literals(graph_name, entity_uri):
         graph_uri = config.get_graph_uri(graph_name)
         
         query = f"""
-        SELECT ?predicate ?value ?predicateLabel
+        SELECT ?predicate ?value
         FROM <{graph_uri}>
         WHERE {{
             <{entity_uri}> ?predicate ?value .
             FILTER(isLiteral(?value))
-            OPTIONAL {{ ?predicate rdfs:label ?predicateLabel }}
         }}
         ORDER BY ?predicate
         """
         
-        results = query_sparql(query)
+        card = entity_cards.get(graph_name, entity_uri) if entity_cards.enabled else None
+        card_graph = graph_name if card else None
+        mirror = graph_mirrors.get(graph_name) if not card else None
+        if card:
+            results = [(predicate, value) for predicate, value, _, _ in
+                       sorted(card['literals'], key=lambda literal: (literal[0], literal[1]))]
+        elif mirror:
+            results = [(predicate, value) for predicate, value, _, _ in mirror.node_literals(entity_uri)]
+        else:
+            results = [(binding['predicate']['value'], binding['value']['value'])
+                       for binding in query_sparql(query, origin='get_entity_literals.literals') or []]
+        labels = graph_labels(graph_uri, (predicate for predicate, _ in results), mirror=mirror, card_graph=card_graph)
         
         literals = []
-        for binding in results:
-            predicate = binding['predicate']['value']
-            value = binding['value']['value']
-            predicate_label = binding.get('predicateLabel', {}).get('value')
+        for predicate, value in results:
+            predicate_label = labels.get(predicate)
             
             literals.append({
                 'predicate': predicate,
@@ -1237,13 +2092,148 @@ def get_entity_literals(graph_name, entity_uri):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def get_uri_fragment(uri):
-    """Extract the fragment from a URI (part after # or last /)"""
-    if '#' in uri:
-        return uri.split('#')[-1]
-    elif '/' in uri:
-        return uri.split('/')[-1]
-    return uri
+def request_list_arg(name):
+    """A list query argument, given repeatedly and/or comma separated"""
+    return [item.strip() for value in request.args.getlist(name) for item in value.split(',') if item.strip()]
+
+@app.route('/api/graphs/<graph_name>/paths', methods=['GET'])
+@conditional_get
+def get_paths(graph_name):
+    """Shortest connections between two entities as a nodes/edges subgraph"""
+    try:
+        source = request.args.get('from', '')
+        target = request.args.get('to', '')
+        allow = request_list_arg('allow')
+        deny = request_list_arg('deny')
+        
+        if not source or not target:
+            return jsonify({'success': False, 'error': 'Both from and to are required'}), 400
+        invalid = [uri for uri in [source, target] + allow + deny if not is_safe_iri(uri)]
+        if invalid:
+            return jsonify({'success': False, 'error': f'Invalid IRI: {invalid[0]}'}), 400
+        try:
+            max_hops = max(1, min(int(request.args.get('maxHops', 4)), config.paths_max_hops))
+            k = max(1, min(int(request.args.get('k', 3)), 20))
+            max_fanout = int(request.args['maxFanout']) if 'maxFanout' in request.args else None
+        except ValueError:
+            return jsonify({'success': False, 'error': 'maxHops, k and maxFanout must be integers'}), 400
+        
+        graph_uri = config.get_graph_uri(graph_name)
+        result = find_paths(graph_uri, source, target, max_hops=max_hops, k=k,
+                            allow=allow, deny=deny, max_fanout=max_fanout)
+        return jsonify({'success': True, 'graphName': graph_name, 'maxHops': max_hops, **result})
+        
+    except Exception as e:
+        print(f"Error finding paths in graph {graph_name}: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/search', methods=['GET'])
+def search_graphs():
+    """Search entity labels (or an IRI) across all graphs, streaming hits as NDJSON"""
+    try:
+        text = request.args.get('q', '').strip()
+        if len(text) < 2:
+            return jsonify({'success': False, 'error': 'q must be at least 2 characters'}), 400
+        try:
+            k = max(1, min(int(request.args.get('k', 20)), 200))
+            budget_ms = int(request.args['budgetMs']) if 'budgetMs' in request.args else config.search_graph_budget_ms
+        except ValueError:
+            return jsonify({'success': False, 'error': 'k and budgetMs must be integers'}), 400
+        graph_names = request_list_arg('graphs') or None
+        events = search_all_graphs(text, k=k, graph_names=graph_names,
+                                   budget_seconds=max(100, min(budget_ms, 30000)) / 1000)
+        
+        if request.args.get('stream', 'true').lower() == 'false':
+            done = [event for event in events if event['type'] == 'done'][0]
+            return jsonify({'success': True, 'query': text, **{key: value for key, value in done.items() if key != 'type'}})
+        
+        def stream():
+            for event in events:
+                yield json.dumps(event) + '\n'
+        
+        return Response(stream_with_context(stream()), mimetype='application/x-ndjson',
+                        headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'})
+        
+    except Exception as e:
+        print(f"Error searching graphs for {request.args.get('q')}: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/graphs/<graph_name>/entities/batch', methods=['POST'])
+def get_entities_batch(graph_name):
+    """Get neighborhood, literals and labels for many entities in one request"""
+    try:
+        payload = request.get_json(silent=True) or {}
+        entity_uris = payload.get('uris', [])
+        max_links = min(int(payload.get('maxLinks', 150)), 1000)
+        
+        if not isinstance(entity_uris, list) or not entity_uris:
+            return jsonify({'error': 'Missing uris list'}), 400
+        if len(entity_uris) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'At most {MAX_BATCH_SIZE} entities per batch'}), 400
+        
+        graph_uri = config.get_graph_uri(graph_name)
+        cards = entity_cards.get_many(graph_name, entity_uris) if entity_cards.enabled else None
+        if cards is not None and all(uri in cards and card_links(uri, cards[uri], max_links) is not None
+                                     for uri in entity_uris):
+            entities = entity_details_from_cards(
+                cards, lambda uris: graph_labels(graph_uri, uris, card_graph=graph_name), max_links=max_links)
+        else:
+            entities = get_entity_details_batch(graph_uri, entity_uris, max_links=max_links)
+        
+        return jsonify({
+            'success': True,
+            'graphName': graph_name,
+            'entities': entities
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def label_predicates_sparql():
+    """Label predicates as a SPARQL IN (...) list"""
+    return ', '.join(f'<{predicate}>' for predicate in LABEL_PREDICATES)
+
+# Background cache warmer: heavy per-graph artifacts are recomputed after
+# uploads and, for all catalogued graphs, when the serving process starts
+GRAPH_WARM_TASKS = ('entityStats', 'analysis')
+
+def warm_entity_statistics(graph_name):
+    entity_stats = get_entity_statistics(graph_name)
+    if 'error' in entity_stats:
+        raise RuntimeError(entity_stats['error'])
+
+def warm_analysis(graph_name):
+    graph_uri = config.get_graph_uri(graph_name)
+    get_property_profile(graph_name, graph_uri)
+    analysis_data, _ = get_exact_analysis(graph_name, graph_uri)
+    if 'error' in analysis_data:
+        raise RuntimeError(analysis_data['error'])
+
+def warm_catalog(_):
+    for graph_name in list_graph_names():
+        precompute.enqueue(graph_name, *GRAPH_WARM_TASKS)
+
+precompute.register('entityStats', warm_entity_statistics)
+precompute.register('analysis', warm_analysis)
+precompute.register('catalog', warm_catalog)
+warmer_lock = threading.Lock()
+
+def start_warmer():
+    """Start the warmer and queue the catalog scan, once per serving process"""
+    with warmer_lock:
+        if precompute.started:
+            return
+        precompute.enqueue(None, 'catalog')
+        precompute.start()
+
+@app.before_request
+def start_warmer_on_first_request():
+    # Importing the app (scripts, tests, the reloader's parent) starts no warmer
+    if precompute.enabled and not precompute.started:
+        start_warmer()
 
 if __name__ == '__main__':
+    # With the reloader, only the child process serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_warmer()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,170 @@
+import math
+import random
+import time
+from rdflib import RDF
+from config import config
+from labels import uri_fragment
+from sketches import CountMinSketch, HyperLogLog
+from virtuoso import query_sparql
+
+RDF_TYPE = str(RDF.type)
+Z_95 = 1.96
+
+
+def _scaled_estimate(sample_count, sample_size, total, complete):
+    """Scale a sample frequency to the graph size with an approximate 95% error bound.
+
+    Counts are exact (bound 0) only when the slices covered the whole
+    graph. Without a total triple count nothing can be scaled; the sample
+    count is then a lower bound and the error bound is unknown (None).
+    """
+    if complete:
+        return sample_count, 0
+    if not sample_size:
+        return 0, None
+    if not total:
+        return sample_count, None
+    share = sample_count / sample_size
+    error = Z_95 * total * math.sqrt(share * (1 - share) / sample_size)
+    # A sample without (or with only) the value still leaves some uncertainty
+    return int(round(share * total)), max(1, int(math.ceil(error)))
+
+
+def _distinct_estimate(sketch, sample_size, total, complete):
+    """Bound the number of distinct values in the graph from a sample.
+
+    The distinct count of the sample is a lower bound; scaling it linearly
+    with the sampling ratio gives an upper bound. The point estimate is
+    their geometric mean (GEE-style), which is what sampling can offer
+    without a full scan.
+    """
+    sampled = sketch.count()
+    if complete:
+        return {'estimate': sampled, 'lower': sampled, 'upper': sampled}
+    if not total or not sample_size:
+        return {'estimate': sampled, 'lower': sampled, 'upper': None}
+    upper = max(sampled, min(total, int(round(sampled * total / sample_size))))
+    return {
+        'estimate': int(round(math.sqrt(sampled * upper))),
+        'lower': sampled,
+        'upper': upper
+    }
+
+
+def analyze_graph_approximate(graph_uri, analysis_results, budget_ms=None, slice_size=None):
+    """Estimate class and predicate statistics within a latency budget.
+
+    The graph is split into consecutive ``LIMIT/OFFSET`` slices that are
+    read in random order, each at most once, until the budget is spent.
+    Predicates and classes go into count-min sketches (heavy hitters),
+    subjects and objects into HyperLogLog sketches. Counts are scaled to
+    the total triple count with 95% binomial error bounds. A slice is a
+    contiguous run in Virtuoso's storage order, not an iid sample, so the
+    bounds are approximate: they are too narrow when values cluster in
+    storage order. Counts are exact only when every slice was read.
+    """
+    budget_ms = budget_ms or config.approximate_budget_ms
+    slice_size = slice_size or config.approximate_slice_size
+    started = time.monotonic()
+    deadline = started + budget_ms / 1000.0
+
+    count_query = f"""
+    SELECT (COUNT(*) as ?count)
+    FROM <{graph_uri}>
+    WHERE {{ ?s ?p ?o }}
+    """
+    count_result = query_sparql(count_query, timeout_seconds=max(1, budget_ms // 2000),
+                                origin='analyze_graph_approximate.triple_count')
+    total = int(count_result[0]['count']['value']) if count_result else None
+    analysis_results['totalTriples'] = total or 0
+
+    predicates = CountMinSketch(heavy_hitters=50)
+    classes = CountMinSketch(heavy_hitters=100)
+    subjects = HyperLogLog()
+    objects = HyperLogLog()
+    sample_size = 0
+    slices = 0
+    complete = False
+    if total is not None:
+        # Non-overlapping slices in random order; a small graph is a single slice
+        order = list(range(math.ceil(total / slice_size)))
+        random.Random().shuffle(order)
+
+    while time.monotonic() < deadline and (total is None or slices < len(order)):
+        if total is not None:
+            offset = order[slices] * slice_size
+        else:
+            offset = slices * slice_size  # Unknown size: read from the start until the end shows
+
+        remaining = max(1, int(math.ceil(deadline - time.monotonic())))
+        rows = query_sparql(f"""
+        SELECT ?s ?p ?o
+        FROM <{graph_uri}>
+        WHERE {{ ?s ?p ?o }}
+        LIMIT {slice_size}
+        OFFSET {offset}
+        """, timeout_seconds=remaining, use_cache=False, origin='analyze_graph_approximate.slice')
+        if rows is None:
+            break
+        if not rows:
+            complete = total is None
+            break
+
+        for binding in rows:
+            predicate = binding['p']['value']
+            subjects.add(binding['s']['value'])
+            objects.add(binding['o']['value'])
+            if predicate == RDF_TYPE:
+                classes.add(binding['o']['value'])
+            else:
+                predicates.add(predicate)
+        sample_size += len(rows)
+        slices += 1
+
+        if total is None and len(rows) < slice_size:
+            complete = True
+            break
+
+    if total is not None:
+        complete = slices == len(order)
+
+    class_analysis = []
+    for class_uri, sample_count in classes.heavy_hitters():
+        estimate, error = _scaled_estimate(sample_count, sample_size, total, complete)
+        class_analysis.append({
+            'label': uri_fragment(class_uri),
+            'instanceCount': estimate,
+            'errorBound': error,
+            'uri': class_uri
+        })
+
+    predicates_analysis = []
+    for pred_uri, sample_count in predicates.heavy_hitters():
+        estimate, error = _scaled_estimate(sample_count, sample_size, total, complete)
+        predicates_analysis.append({
+            'label': uri_fragment(pred_uri),
+            'usage': estimate,
+            'errorBound': error,
+            'uri': pred_uri
+        })
+
+    analysis_results.update({
+        'foundClassesCount': len(class_analysis),
+        'classList': class_analysis,
+        'predicatesList': predicates_analysis,
+        'approximation': {
+            'confidence': 0.95,
+            'sampledTriples': sample_size,
+            'slices': slices,
+            'sliceSize': slice_size,
+            'budgetMs': budget_ms,
+            'elapsedMs': int((time.monotonic() - started) * 1000),
+            'totalTriplesExact': total is not None,
+            'complete': complete,
+            'distinctSubjects': _distinct_estimate(subjects, sample_size, total, complete),
+            'distinctObjects': _distinct_estimate(objects, sample_size, total, complete),
+            'sketchRelativeError': round(subjects.relative_error, 4)
+        }
+    })
+
+    return analysis_results
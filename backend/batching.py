@@ -0,0 +1,97 @@
+import math
+import threading
+from config import config
+
+# Smallest batch the controller shrinks to; a single triple is still sent on its own
+MIN_BATCH_BYTES = 64 * 1024
+# Additive increase per fast batch, as a share of the configured initial size
+INCREASE_SHARE = 0.25
+# Multiplicative decreases for batches slower than the target and for failed batches
+SLOW_DECREASE = 0.7
+FAILURE_DECREASE = 0.5
+# Weight of the latest batch in the serialized size averages
+EWMA_WEIGHT = 0.2
+
+
+def estimate_triple_bytes(triple):
+    """Rough serialized size of one triple (N-Triples-like, before prefixing)"""
+    subject, predicate, obj = triple
+    return len(subject) + len(predicate) + len(obj) + 8
+
+
+class AdaptiveBatchSizer:
+    """AIMD controller for upload batch sizes, measured in serialized bytes.
+
+    Batches answered faster than ``target_seconds`` grow the batch by a fixed
+    step; slower batches shrink it by a factor and failed batches (errors,
+    timeouts) halve it. The learned size and the observed bytes per triple
+    are shared by all uploads, so one upload starts where the last one
+    left off. Timeouts are derived from the payload size.
+    """
+
+    def __init__(self, initial_bytes, max_bytes, target_seconds, min_bytes_per_second):
+        self.initial_bytes = initial_bytes
+        self.max_bytes = max(max_bytes, MIN_BATCH_BYTES)
+        self.target_seconds = target_seconds
+        self.min_bytes_per_second = min_bytes_per_second
+        self.target_bytes = self._clamp(initial_bytes)
+        # Serialized bytes per estimated byte (Turtle prefixes shrink IRIs) and per triple
+        self.size_ratio = 1.0
+        self.bytes_per_triple = 150.0
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.failures = 0
+        self.decreases = 0
+
+    def _clamp(self, size):
+        return int(min(max(size, MIN_BATCH_BYTES), self.max_bytes))
+
+    def estimate_budget(self):
+        """Estimated (pre-serialization) bytes to put in the next batch"""
+        with self.lock:
+            return self.target_bytes / self.size_ratio
+
+    def estimate_batches(self, remaining_triples):
+        """Batches still needed for ``remaining_triples`` at the current size"""
+        with self.lock:
+            return max(1, math.ceil(remaining_triples * self.bytes_per_triple / self.target_bytes))
+
+    def timeout_for(self, payload_bytes):
+        """Request timeout for a payload: a floor plus its transfer and load at the minimum throughput"""
+        return min(10 + payload_bytes / self.min_bytes_per_second, 600)
+
+    def record(self, triples, estimated_bytes, payload_bytes, seconds, success):
+        """Feed back one stored batch and adjust the target size"""
+        with self.lock:
+            self.batches += 1
+            if not success:
+                self.failures += 1
+                self.decreases += 1
+                self.target_bytes = self._clamp(min(self.target_bytes, payload_bytes) * FAILURE_DECREASE)
+                return
+            if estimated_bytes:
+                self.size_ratio += EWMA_WEIGHT * (payload_bytes / estimated_bytes - self.size_ratio)
+            if triples:
+                self.bytes_per_triple += EWMA_WEIGHT * (payload_bytes / triples - self.bytes_per_triple)
+            if seconds > self.target_seconds:
+                self.decreases += 1
+                self.target_bytes = self._clamp(self.target_bytes * SLOW_DECREASE)
+            elif payload_bytes >= self.target_bytes * 0.5:
+                # Only batches near the target say anything about a larger one (not the tail of an upload)
+                self.target_bytes = self._clamp(self.target_bytes + self.initial_bytes * INCREASE_SHARE)
+
+    def status(self):
+        with self.lock:
+            return {
+                'targetBytes': self.target_bytes,
+                'maxBytes': self.max_bytes,
+                'targetSeconds': self.target_seconds,
+                'bytesPerTriple': round(self.bytes_per_triple, 1),
+                'batches': self.batches,
+                'failures': self.failures,
+                'decreases': self.decreases
+            }
+
+
+batch_sizer = AdaptiveBatchSizer(config.upload_batch_bytes, config.upload_batch_max_bytes,
+                                 config.upload_batch_target_seconds, config.upload_min_bytes_per_second)
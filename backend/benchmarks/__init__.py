@@ -0,0 +1 @@
+"""Benchmark suite: synthetic data generator, Virtuoso stand-in and scenarios"""
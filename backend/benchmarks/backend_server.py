@@ -0,0 +1,23 @@
+"""Serve the Flask app with a threaded WSGI server (no debugger, no reloader).
+
+Used by the load test to run the backend in its own process:
+    VIRTUOSO_URL=http://127.0.0.1:8890 python -m benchmarks.backend_server --port 5055
+"""
+import argparse
+from werkzeug.serving import make_server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Threaded backend server for load tests')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args(argv)
+
+    from app import app
+    server = make_server(args.host, args.port, app, threaded=True)
+    print(f"Backend listening on http://{args.host}:{args.port}", flush=True)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import random
+from dataclasses import dataclass, asdict
+from rdflib import BNode, Graph, Literal, Namespace, RDF, RDFS, URIRef
+from rdflib.namespace import XSD
+
+EX = Namespace('http://bench.example.org/')
+
+WORDS = ('alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'theta', 'kappa',
+         'lambda', 'sigma', 'omega', 'river', 'mountain', 'archive', 'museum', 'letter')
+
+
+@dataclass
+class GeneratorConfig:
+    """Shape of a synthetic knowledge graph.
+
+    ``degree_skew`` is the Zipf exponent used to pick link targets: 0 links
+    entities uniformly, values around 1-1.5 produce a few heavy hubs.
+    """
+    triples: int = 20000
+    classes: int = 12
+    predicates: int = 20
+    link_ratio: float = 0.4
+    degree_skew: float = 1.1
+    literal_words: int = 4
+    bnode_ratio: float = 0.05
+    seed: int = 42
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class _ZipfSampler:
+    """Draws indexes 0..n-1 with P(i) proportional to 1 / (i + 1) ** s"""
+
+    def __init__(self, n, exponent, rng):
+        self.rng = rng
+        weights = [1.0 / (index + 1) ** exponent for index in range(n)]
+        total = sum(weights)
+        self.cumulative = []
+        running = 0.0
+        for weight in weights:
+            running += weight / total
+            self.cumulative.append(running)
+
+    def sample(self):
+        value = self.rng.random()
+        low, high = 0, len(self.cumulative) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if self.cumulative[middle] < value:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+def entity_uri(index):
+    return EX[f'entity/{index}']
+
+
+def class_uri(index):
+    return EX[f'Class{index}']
+
+
+def generate_graph(settings=None):
+    """Build a deterministic synthetic graph (same settings, same triples).
+
+    Every entity gets a type and a label; the remaining triple budget is
+    spent on entity links (targets drawn with degree skew), literal
+    properties and blank-node valued properties.
+    """
+    settings = settings or GeneratorConfig()
+    rng = random.Random(settings.seed)
+    graph = Graph()
+    graph.bind('ex', EX)
+
+    for index in range(settings.classes):
+        graph.add((class_uri(index), RDF.type, RDFS.Class))
+        graph.add((class_uri(index), RDFS.label, Literal(f'Class {index}', lang='en')))
+
+    # Roughly: 2 identity triples per entity plus ~3 property triples
+    entity_count = max(settings.classes, settings.triples // 5)
+    link_predicates = [EX[f'linksTo{index}'] for index in range(max(1, settings.predicates // 2))]
+    literal_predicates = [EX[f'attribute{index}'] for index in range(max(1, settings.predicates - len(link_predicates)))]
+    targets = _ZipfSampler(entity_count, settings.degree_skew, rng)
+
+    for index in range(entity_count):
+        entity = entity_uri(index)
+        graph.add((entity, RDF.type, class_uri(index % settings.classes)))
+        graph.add((entity, RDFS.label, Literal(f'{rng.choice(WORDS)} {index}', lang='en')))
+
+    while len(graph) < settings.triples:
+        subject = entity_uri(rng.randrange(entity_count))
+        roll = rng.random()
+        if roll < settings.link_ratio:
+            graph.add((subject, rng.choice(link_predicates), entity_uri(targets.sample())))
+        elif roll < settings.link_ratio + settings.bnode_ratio:
+            node = BNode()
+            graph.add((subject, EX.hasPart, node))
+            graph.add((node, RDFS.label, Literal(rng.choice(WORDS))))
+            graph.add((node, EX.position, Literal(rng.randrange(100), datatype=XSD.integer)))
+        else:
+            words = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, settings.literal_words * 2)))
+            graph.add((subject, rng.choice(literal_predicates), Literal(words)))
+
+    return graph
+
+
+def hub_entities(graph, count=1):
+    """Entities with the most incoming links, most linked first"""
+    degrees = {}
+    for _, _, target in graph:
+        if isinstance(target, URIRef) and str(target).startswith(str(EX['entity/'])):
+            degrees[target] = degrees.get(target, 0) + 1
+    return [uri for uri, _ in sorted(degrees.items(), key=lambda item: (-item[1], str(item[0])))[:count]]
@@ -0,0 +1,348 @@
+"""Concurrent-user load test against the real Flask routes.
+
+Analyst sessions list graphs, open the analysis, page and filter class
+tables and expand entity neighborhoods while upload workers keep loading
+files. Each stage runs for a fixed duration; several stages with growing
+user counts (``--users 10,25,50,100``) show where throughput stops scaling.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --users 50 --uploads 2 --duration 60
+    python -m benchmarks.load_test --users 10,25,50,100 --duration 30 --output load.json
+    python -m benchmarks.load_test --base-url http://localhost:5000 --graph-name mygraph
+
+Without ``--base-url`` the backend runs in a separate process against the
+in-process Virtuoso stand-in, preloaded with a synthetic graph.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import quote
+import requests
+from benchmarks.timing import percentile
+
+
+class RouteStats:
+    """Thread-safe latency and error samples per route template"""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.uploads = []
+        self.lock = threading.Lock()
+
+    def record(self, route, elapsed_ms, ok):
+        with self.lock:
+            self.samples.setdefault(route, []).append(elapsed_ms)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def record_upload(self, seconds, triples, ok):
+        with self.lock:
+            self.uploads.append((seconds, triples, ok))
+
+    def report(self, elapsed_seconds):
+        with self.lock:
+            samples = {route: list(values) for route, values in self.samples.items()}
+            errors = dict(self.errors)
+            uploads = list(self.uploads)
+
+        routes = {route: _summary(values, errors.get(route, 0), elapsed_seconds)
+                  for route, values in sorted(samples.items())}
+        all_samples = [value for values in samples.values() for value in values]
+        completed = [upload for upload in uploads if upload[2]]
+        return {
+            'durationSeconds': round(elapsed_seconds, 1),
+            'total': _summary(all_samples, sum(errors.values()), elapsed_seconds),
+            'routes': routes,
+            'uploads': {
+                'completed': len(completed),
+                'failed': len(uploads) - len(completed),
+                'p50Seconds': round(percentile([upload[0] for upload in completed], 50), 2),
+                'triplesPerSecond': round(sum(upload[1] for upload in completed) /
+                                          max(sum(upload[0] for upload in completed), 1e-9), 1)
+            }
+        }
+
+
+def _summary(values, errors, elapsed_seconds):
+    count = len(values)
+    return {
+        'requests': count,
+        'errors': errors,
+        'errorRate': round(errors / count, 4) if count else 0.0,
+        'throughputPerSecond': round(count / elapsed_seconds, 2) if elapsed_seconds else 0.0,
+        'p50Ms': round(percentile(values, 50), 1),
+        'p95Ms': round(percentile(values, 95), 1),
+        'p99Ms': round(percentile(values, 99), 1)
+    }
+
+
+class Client:
+    """requests session that records every call under its route template"""
+
+    def __init__(self, base_url, stats, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.stats = stats
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def call(self, method, route, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        self.stats.record(route, (time.perf_counter() - start) * 1000, ok)
+        if response is None or not ok:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+
+def _entity_path(uri):
+    return quote(uri, safe='')
+
+
+class AnalystSession(threading.Thread):
+    """Replays browsing sessions until the stop event is set"""
+
+    def __init__(self, client, graph_name, stop_event, think_ms, seed):
+        super().__init__(daemon=True)
+        self.client = client
+        self.graph_name = graph_name
+        self.stop_event = stop_event
+        self.think_ms = think_ms
+        self.rng = random.Random(seed)
+
+    def think(self):
+        if self.think_ms:
+            self.stop_event.wait(self.rng.uniform(0.5, 1.5) * self.think_ms / 1000)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.session()
+
+    def session(self):
+        g = self.graph_name
+        self.client.call('GET', 'GET /api/graphs', '/api/graphs')
+        self.think()
+
+        analysis = self.client.call('GET', 'GET /api/graphs/<g>/analysis', f'/api/graphs/{g}/analysis')
+        tabs = (analysis or {}).get('tabs', [])
+        class_uris = [tab['uploadInfo']['classUri'] for tab in tabs
+                      if tab.get('type') == 'table' and tab.get('uploadInfo', {}).get('classUri')]
+        if not class_uris:
+            self.think()
+            return
+        self.think()
+
+        class_path = f'/api/graphs/{g}/class/{_entity_path(self.rng.choice(class_uris))}/instances'
+        instances = []
+        route = 'GET /api/graphs/<g>/class/<c>/instances'
+        for page in range(1, self.rng.randint(1, 3) + 1):
+            result = self.client.call('GET', route, f'{class_path}?page={page}&pageSize=25')
+            instances.extend((result or {}).get('data', []))
+            self.think()
+        if self.rng.random() < 0.5:
+            term = self.rng.choice(('river', 'museum', 'alpha', 'letter', '1'))
+            self.client.call('GET', route, f'{class_path}?page=1&pageSize=25&filter={term}')
+            self.think()
+
+        uris = [item['uri'] for item in instances if item.get('uri', '').startswith('http')]
+        for uri in self.rng.sample(uris, min(len(uris), self.rng.randint(1, 3))):
+            graph = self.client.call('GET', 'GET /api/graphs/<g>/entities/<uri>/graph',
+                                     f'/api/graphs/{g}/entities/{_entity_path(uri)}/graph?maxNodes=150')
+            self.think()
+            neighbors = [node['uri'] for node in (graph or {}).get('nodes', [])
+                         if not node.get('isCentral') and node.get('uri', '').startswith('http')]
+            if not neighbors:
+                continue
+            # Hover prefetch of neighbor details, then one expansion
+            self.client.call('POST', 'POST /api/graphs/<g>/entities/batch', f'/api/graphs/{g}/entities/batch',
+                             json={'uris': neighbors[:20]})
+            self.client.call('GET', 'GET /api/graphs/<g>/entities/<uri>/literals',
+                             f'/api/graphs/{g}/entities/{_entity_path(self.rng.choice(neighbors))}/literals')
+            self.think()
+
+
+class UploadWorker(threading.Thread):
+    """Uploads a file, waits for the job and deletes the graph again, repeatedly"""
+
+    def __init__(self, client, index, turtle, triples, stop_event, poll_seconds=0.5):
+        super().__init__(daemon=True)
+        self.client = client
+        self.graph_name = f'loadtest-upload-{index}'
+        self.turtle = turtle
+        self.triples = triples
+        self.stop_event = stop_event
+        self.poll_seconds = poll_seconds
+
+    def run(self):
+        while not self.stop_event.is_set():
+            start = time.perf_counter()
+            started = self.client.call('POST', 'POST /upload_file', '/upload_file',
+                                       files={'file': ('loadtest.ttl', self.turtle, 'text/turtle')},
+                                       data={'graphName': self.graph_name})
+            if not started:
+                self.client.stats.record_upload(time.perf_counter() - start, 0, False)
+                self.stop_event.wait(1)
+                continue
+
+            status = 'processing'
+            while status == 'processing' and not self.stop_event.is_set():
+                self.stop_event.wait(self.poll_seconds)
+                job = self.client.call('GET', 'GET /upload/status/<job>', f"/upload/status/{started['jobId']}")
+                status = (job or {}).get('status', 'failed')
+            if status == 'processing':
+                return  # Stopped mid-upload; not counted
+            self.client.stats.record_upload(time.perf_counter() - start, self.triples, status == 'success')
+            self.client.call('DELETE', 'DELETE /api/graphs/<g>', f'/api/graphs/{self.graph_name}')
+
+
+def run_stage(args, users, turtle, upload_triples):
+    stats = RouteStats()
+    stop_event = threading.Event()
+    workers = [AnalystSession(Client(args.base_url, stats, args.timeout), args.graph_name,
+                              stop_event, args.think_ms, seed=args.seed + index)
+               for index in range(users)]
+    workers += [UploadWorker(Client(args.base_url, stats, args.timeout), index, turtle, upload_triples, stop_event)
+                for index in range(args.uploads)]
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    time.sleep(args.duration)
+    stop_event.set()
+    elapsed = time.perf_counter() - start
+    for worker in workers:
+        worker.join(timeout=args.timeout)
+
+    report = stats.report(elapsed)
+    report['users'] = users
+    report['uploadWorkers'] = args.uploads
+    return report
+
+
+def print_stage(report):
+    print(f"\n== {report['users']} users, {report['uploadWorkers']} upload workers, "
+          f"{report['durationSeconds']}s")
+    print(f"{'route':<48} {'req':>7} {'req/s':>8} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for route, row in list(report['routes'].items()) + [('TOTAL', report['total'])]:
+        print(f"{route:<48} {row['requests']:>7} {row['throughputPerSecond']:>8} "
+              f"{row['errorRate'] * 100:>5.1f}% {row['p50Ms']:>8} {row['p95Ms']:>8} {row['p99Ms']:>8}")
+    uploads = report['uploads']
+    print(f"uploads: {uploads['completed']} completed, {uploads['failed']} failed, "
+          f"p50 {uploads['p50Seconds']}s, {uploads['triplesPerSecond']} triples/s")
+
+
+def print_ramp(reports):
+    """Throughput per stage; scaling efficiency below ~50% marks saturation"""
+    print(f"\n{'users':>6} {'req/s':>9} {'p95 ms':>9} {'err%':>6} {'scaling':>8}")
+    previous = None
+    for report in reports:
+        total = report['total']
+        scaling = ''
+        if previous and previous['total']['throughputPerSecond']:
+            gained = total['throughputPerSecond'] / previous['total']['throughputPerSecond']
+            scaling = f"{gained / (report['users'] / previous['users']) * 100:.0f}%"
+        print(f"{report['users']:>6} {total['throughputPerSecond']:>9} {total['p95Ms']:>9} "
+              f"{total['errorRate'] * 100:>5.1f}% {scaling:>8}")
+        previous = report
+
+
+def start_local_backend(args, graph_triples):
+    """Stand-in Virtuoso in this process, backend in a child process"""
+    from benchmarks.generator import GeneratorConfig, generate_graph
+    from benchmarks.stand_in import StandInVirtuoso
+
+    stand_in = StandInVirtuoso(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                               seed=args.seed, engine=args.engine).start()
+    graph_base_uri = os.getenv('GRAPH_BASE_URI', 'http://example.org') + '/graph'
+    stand_in.load(f'{graph_base_uri}/{args.graph_name}',
+                  generate_graph(GeneratorConfig(triples=graph_triples, seed=args.seed)))
+
+    env = dict(os.environ, VIRTUOSO_URL=stand_in.url)
+    env.setdefault('WARMER_WORKERS', '0')
+    process = subprocess.Popen([sys.executable, '-m', 'benchmarks.backend_server', '--port', str(args.port)],
+                               env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               stdout=subprocess.DEVNULL if not args.backend_output else None,
+                               stderr=subprocess.STDOUT if not args.backend_output else None)
+    args.base_url = f'http://127.0.0.1:{args.port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f'{args.base_url}/api/config', timeout=2)
+            return stand_in, process
+        except requests.RequestException:
+            if process.poll() is not None:
+                break
+            time.sleep(0.3)
+    process.terminate()
+    stand_in.stop()
+    raise RuntimeError("Backend did not start")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Concurrent-user load test')
+    parser.add_argument('--base-url', help='Running backend to test (default: start one against the stand-in)')
+    parser.add_argument('--graph-name', default='bench', help='Graph the analyst sessions browse')
+    parser.add_argument('--users', default='50', help='Concurrent analyst sessions; comma list for a ramp')
+    parser.add_argument('--uploads', type=int, default=2, help='Concurrent upload workers')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds per stage')
+    parser.add_argument('--think-ms', type=float, default=500, help='Mean pause between user actions')
+    parser.add_argument('--timeout', type=float, default=60, help='Request timeout in seconds')
+    parser.add_argument('--graph-triples', type=int, default=20000, help='Size of the preloaded stand-in graph')
+    parser.add_argument('--upload-triples', type=int, default=6000, help='Size of each uploaded file')
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='Injected stand-in latency')
+    parser.add_argument('--jitter-ms', type=float, default=1.0)
+    parser.add_argument('--engine', choices=('auto', 'oxigraph', 'rdflib'), default='auto')
+    parser.add_argument('--port', type=int, default=5055, help='Port of the locally started backend')
+    parser.add_argument('--backend-output', action='store_true', help='Show the local backend output')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='Write the stage reports as JSON to this file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    stages = [int(users) for users in args.users.split(',')]
+
+    from benchmarks.generator import GeneratorConfig, generate_graph
+    turtle = generate_graph(GeneratorConfig(triples=args.upload_triples, seed=args.seed + 1000)).serialize(
+        format='turtle').encode('utf-8')
+
+    stand_in = process = None
+    if not args.base_url:
+        stand_in, process = start_local_backend(args, args.graph_triples)
+
+    reports = []
+    try:
+        for users in stages:
+            report = run_stage(args, users, turtle, args.upload_triples)
+            print_stage(report)
+            reports.append(report)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+        if stand_in:
+            stand_in.stop()
+
+    if len(reports) > 1:
+        print_ramp(reports)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'arguments': vars(args), 'stages': reports}, f, indent=2)
+    return 1 if any(report['total']['requests'] == 0 for report in reports) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""Run the backend benchmark scenarios against the in-process Virtuoso stand-in.
+
+Usage (from backend/):
+    python -m benchmarks.run                       # all scenarios, compare to baseline
+    python -m benchmarks.run --scenarios search,neighborhood --repeat 10
+    python -m benchmarks.run --save-baseline       # store results as the new baseline
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, 'baseline.json')
+
+# Metrics where a larger value is better; all other timed metrics are latencies.
+# Tail percentiles are reported but not compared - with a handful of samples
+# they are too noisy to flag regressions.
+HIGHER_IS_BETTER_SUFFIXES = ('PerSecond',)
+COMPARED_SUFFIXES = ('P50Ms', 'Seconds', 'PerSecond')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Backend benchmark suite')
+    parser.add_argument('--scenarios', default='all', help='Comma separated scenario names or "all"')
+    parser.add_argument('--triples', type=int, default=10000, help='Size of the synthetic graph')
+    parser.add_argument('--classes', type=int, default=12)
+    parser.add_argument('--degree-skew', type=float, default=1.1)
+    parser.add_argument('--bnode-ratio', type=float, default=0.05)
+    parser.add_argument('--literal-words', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions per measurement')
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='Injected stand-in latency per request')
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--upload-ms-per-kb', type=float, default=0.0)
+    parser.add_argument('--engine', choices=('auto', 'oxigraph', 'rdflib'), default='auto',
+                        help='Stand-in store (auto uses pyoxigraph when installed)')
+    parser.add_argument('--with-query-cache', action='store_true',
+                        help='Keep the SPARQL query cache enabled (disabled by default)')
+    parser.add_argument('--output', help='Write results JSON to this file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Relative slowdown reported as a regression (0.15 = 15%%)')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    return parser.parse_args(argv)
+
+
+def compare(results, baseline, tolerance):
+    """Per-metric change against the baseline; positive change is worse"""
+    rows = []
+    for scenario, metrics in results['scenarios'].items():
+        base_metrics = baseline.get('scenarios', {}).get(scenario, {})
+        for metric, value in metrics.items():
+            base = base_metrics.get(metric)
+            if (not metric.endswith(COMPARED_SUFFIXES) or not isinstance(value, (int, float))
+                    or not isinstance(base, (int, float)) or base == 0):
+                continue
+            change = (value - base) / base
+            if metric.endswith(HIGHER_IS_BETTER_SUFFIXES):
+                change = -change
+            rows.append({
+                'scenario': scenario,
+                'metric': metric,
+                'baseline': base,
+                'current': value,
+                'change': round(change, 4),
+                'regression': change > tolerance
+            })
+    return rows
+
+
+def print_comparison(rows, tolerance):
+    if not rows:
+        print("No comparable metrics in the baseline")
+        return
+    print(f"\n{'scenario':<20} {'metric':<32} {'baseline':>12} {'current':>12} {'change':>8}")
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['scenario']:<20} {row['metric']:<32} {row['baseline']:>12} {row['current']:>12} "
+              f"{row['change'] * 100:>7.1f}%{flag}")
+    regressions = sum(1 for row in rows if row['regression'])
+    print(f"\n{regressions} regression(s) beyond {tolerance * 100:.0f}%")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from benchmarks.stand_in import StandInVirtuoso
+    stand_in = StandInVirtuoso(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                               upload_ms_per_kb=args.upload_ms_per_kb, seed=args.seed,
+                               engine=args.engine).start()
+
+    # The backend reads its configuration at import time
+    os.environ['VIRTUOSO_URL'] = stand_in.url
+    if not args.with_query_cache:
+        os.environ['QUERY_CACHE_TTL_SECONDS'] = '0'
+    os.environ.setdefault('SLOW_QUERY_THRESHOLD_MS', '0')
+    # Scenarios time cold paths; background warming would serve them from cache
+    os.environ.setdefault('WARMER_WORKERS', '0')
+
+    from benchmarks.generator import GeneratorConfig, generate_graph
+    from benchmarks.scenarios import SCENARIOS, BenchmarkContext
+    import app as backend
+    from config import config
+
+    names = list(SCENARIOS) if args.scenarios == 'all' else args.scenarios.split(',')
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenario(s): {', '.join(unknown)}; available: {', '.join(SCENARIOS)}")
+        return 2
+
+    settings = GeneratorConfig(triples=args.triples, classes=args.classes, degree_skew=args.degree_skew,
+                               bnode_ratio=args.bnode_ratio, literal_words=args.literal_words, seed=args.seed)
+    graph = generate_graph(settings)
+    graph_name = 'bench'
+    stand_in.load(config.get_graph_uri(graph_name), graph)
+
+    ctx = BenchmarkContext(client=backend.app.test_client(), stand_in=stand_in, graph=graph,
+                           graph_name=graph_name, repeat=args.repeat)
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'generator': settings.to_dict(),
+            'repeat': args.repeat,
+            'latencyMs': args.latency_ms,
+            'jitterMs': args.jitter_ms,
+            'uploadMsPerKb': args.upload_ms_per_kb,
+            'engine': stand_in.backend.name,
+            'queryCache': args.with_query_cache
+        },
+        'scenarios': {}
+    }
+
+    try:
+        for name in names:
+            print(f"Running {name}...", flush=True)
+            results['scenarios'][name] = SCENARIOS[name](ctx)
+            print(json.dumps(results['scenarios'][name], indent=2))
+    finally:
+        stand_in.stop()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('meta', {}).get('generator') != results['meta']['generator']:
+        print("Warning: baseline was recorded with different generator settings")
+    rows = compare(results, baseline, args.tolerance)
+    print_comparison(rows, args.tolerance)
+    if args.fail_on_regression and any(row['regression'] for row in rows):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
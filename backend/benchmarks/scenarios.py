@@ -0,0 +1,148 @@
+"""Benchmark scenarios.
+
+Imports the backend, so VIRTUOSO_URL must point at the stand-in before this
+module is imported (``benchmarks.run`` takes care of that).
+"""
+import time
+from dataclasses import dataclass
+from urllib.parse import quote
+from rdflib import Graph
+import app as backend
+from config import config
+from graph_artifacts import invalidate_graph
+from virtuoso import query_cache, storeDataToGraphInBatches
+from benchmarks.generator import class_uri, entity_uri, hub_entities
+from benchmarks.timing import measure, summarize
+
+
+@dataclass
+class BenchmarkContext:
+    client: object
+    stand_in: object
+    graph: Graph
+    graph_name: str
+    repeat: int
+
+    @property
+    def graph_uri(self):
+        return config.get_graph_uri(self.graph_name)
+
+    def get(self, path):
+        response = self.client.get(path)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {path} returned {response.status_code}")
+        return response
+
+    def post_json(self, path, payload):
+        response = self.client.post(path, json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(f"POST {path} returned {response.status_code}")
+        return response
+
+
+def _entity_path(uri):
+    return quote(str(uri), safe='')
+
+
+def upload_throughput(ctx):
+    """Parse the generated Turtle and store it through the batched Graph Store upload"""
+    data = ctx.graph.serialize(format='turtle')
+    start = time.perf_counter()
+    parsed = Graph()
+    parsed.parse(data=data, format='turtle')
+    parse_seconds = time.perf_counter() - start
+
+    graph_uri = config.get_graph_uri(f'{ctx.graph_name}-upload')
+    start = time.perf_counter()
+    success = storeDataToGraphInBatches(graph_uri, parsed)
+    upload_seconds = time.perf_counter() - start
+    ctx.stand_in.drop(graph_uri)
+    if not success:
+        raise RuntimeError("Upload to the stand-in failed")
+
+    triples = len(parsed)
+    return {
+        'triples': triples,
+        'turtleBytes': len(data.encode('utf-8')),
+        'parseSeconds': round(parse_seconds, 3),
+        'parseTriplesPerSecond': round(triples / parse_seconds, 1),
+        'uploadSeconds': round(upload_seconds, 3),
+        'uploadTriplesPerSecond': round(triples / upload_seconds, 1)
+    }
+
+
+def analysis_latency(ctx):
+    """Upload-time object analysis and the exact/approximate analysis endpoint"""
+    results = {}
+    results.update(summarize(measure(lambda: backend.analyze_graph_object(ctx.graph, {}),
+                                     ctx.repeat), 'objectAnalysis'))
+
+    def exact():
+        # Start from a cold artifact store and query cache every time
+        invalidate_graph(ctx.graph_name)
+        query_cache.invalidate(ctx.graph_uri)
+        ctx.get(f'/api/graphs/{ctx.graph_name}/analysis')
+
+    results.update(summarize(measure(exact, ctx.repeat), 'exactEndpoint'))
+
+    def approximate():
+        invalidate_graph(ctx.graph_name)
+        query_cache.invalidate(ctx.graph_uri)
+        ctx.get(f'/api/graphs/{ctx.graph_name}/analysis?mode=approximate&budgetMs=2000')
+
+    results.update(summarize(measure(approximate, ctx.repeat), 'approximateEndpoint'))
+    # Let background refinements finish before the next scenario starts
+    while backend.analysis_refinements:
+        time.sleep(0.05)
+    return results
+
+
+def deep_pagination(ctx):
+    """First, middle and last page of a class table, plus a filtered page"""
+    target = _entity_path(class_uri(0))
+    instances = sum(1 for _ in ctx.graph.subjects(predicate=None, object=class_uri(0)))
+    page_size = 25
+    last_page = max(1, (instances + page_size - 1) // page_size)
+    base = f'/api/graphs/{ctx.graph_name}/class/{target}/instances?pageSize={page_size}'
+
+    results = {'instances': instances, 'lastPage': last_page}
+    for name, page in (('firstPage', 1), ('middlePage', max(1, last_page // 2)), ('lastPage', last_page)):
+        results.update(summarize(measure(lambda: ctx.get(f'{base}&page={page}'), ctx.repeat), name))
+    results.update(summarize(measure(lambda: ctx.get(f'{base}&page=1&filter=river'), ctx.repeat),
+                             'filteredPage'))
+    return results
+
+
+def search(ctx):
+    """Label search within one class"""
+    type_uri = quote(str(class_uri(1)), safe='')
+    path = f'/api/entities/{ctx.graph_name}?type={type_uri}&search=museum&limit=50'
+    return summarize(measure(lambda: ctx.get(path), ctx.repeat), 'search')
+
+
+def neighborhood(ctx):
+    """Entity graph expansion of the biggest hub and of a leaf, the hub's per-predicate summary,
+    plus batched details"""
+    hub = hub_entities(ctx.graph, 1)[0]
+    leaf = entity_uri(len(set(ctx.graph.subjects())) // 2)
+    results = {'hubUri': str(hub)}
+    for name, uri in (('hub', hub), ('leaf', leaf)):
+        path = f'/api/graphs/{ctx.graph_name}/entities/{_entity_path(uri)}/graph?maxNodes=150'
+        results.update(summarize(measure(lambda: ctx.get(path), ctx.repeat), name))
+    summary_path = f'/api/graphs/{ctx.graph_name}/entities/{_entity_path(hub)}/graph?mode=summary'
+    results.update(summarize(measure(lambda: ctx.get(summary_path), ctx.repeat), 'hubSummary'))
+
+    uris = [str(entity_uri(index)) for index in range(0, 400, 20)]
+    results.update(summarize(measure(
+        lambda: ctx.post_json(f'/api/graphs/{ctx.graph_name}/entities/batch', {'uris': uris}),
+        ctx.repeat), 'detailsBatch'))
+    return results
+
+
+SCENARIOS = {
+    'upload_throughput': upload_throughput,
+    'analysis_latency': analysis_latency,
+    'deep_pagination': deep_pagination,
+    'search': search,
+    'neighborhood': neighborhood
+}
@@ -0,0 +1,328 @@
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import rdflib.plugins.sparql
+from rdflib import Dataset, Literal, URIRef
+from query_cache import is_update
+
+# pyoxigraph is optional; it evaluates the backend's aggregate queries far
+# faster than rdflib's SPARQL engine and is used when installed
+try:
+    import pyoxigraph
+except ImportError:
+    pyoxigraph = None
+
+# FROM <graph> must select a named graph of the dataset, never fetch the IRI
+rdflib.plugins.sparql.SPARQL_LOAD_GRAPHS = False
+
+RDF_FORMATS = {
+    'application/n-triples': 'nt',
+    'text/plain': 'nt',
+    'application/rdf+xml': 'xml',
+    'application/ld+json': 'json-ld'
+}
+
+
+def _rdf_format(content_type):
+    return RDF_FORMATS.get((content_type or 'text/turtle').split(';')[0].strip(), 'turtle')
+
+
+def _response_format(accept):
+    """Format of a response: TSV or SPARQL JSON for solutions, N-Triples or Turtle for graphs"""
+    accept = accept or ''
+    if 'text/tab-separated-values' in accept:
+        return 'tsv'
+    return 'turtle' if 'text/turtle' in accept else 'nt'
+
+
+def _tsv_term(term):
+    if isinstance(term, Literal):
+        value = (str(term).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+                 .replace('\r', '\\r').replace('\t', '\\t'))
+        if term.language:
+            return f'"{value}"@{term.language}'
+        return f'"{value}"^^<{term.datatype}>' if term.datatype else f'"{value}"'
+    return term.n3() if term is not None else ''
+
+
+def _tsv_results(result):
+    lines = ['\t'.join(f'?{var}' for var in result.vars)]
+    lines.extend('\t'.join(_tsv_term(term) for term in row) for row in result)
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class RdflibStore:
+    """rdflib Dataset; not thread-safe, so every operation holds the lock"""
+    name = 'rdflib'
+
+    def __init__(self):
+        self.dataset = Dataset()
+        self.lock = threading.Lock()
+
+    def load(self, graph_uri, rdf_graph):
+        with self.lock:
+            target = self.dataset.graph(URIRef(graph_uri))
+            for triple in rdf_graph:
+                target.add(triple)
+
+    def store(self, graph_uri, data, rdf_format, replace):
+        with self.lock:
+            target = self.dataset.graph(URIRef(graph_uri))
+            if replace:
+                target.remove((None, None, None))
+            target.parse(data=data, format=rdf_format)
+
+    def drop(self, graph_uri):
+        with self.lock:
+            self.dataset.remove_graph(URIRef(graph_uri))
+
+    def dump(self, graph_uri, rdf_format):
+        with self.lock:
+            return self.dataset.graph(URIRef(graph_uri)).serialize(format=rdf_format, encoding='utf-8')
+
+    def query(self, query, rdf_format='nt'):
+        with self.lock:
+            if is_update(query):
+                self.dataset.update(query)
+                return None
+            result = self.dataset.query(query)
+            if result.type in ('CONSTRUCT', 'DESCRIBE'):
+                return result.serialize(format=rdf_format, encoding='utf-8')
+            if rdf_format == 'tsv':
+                return _tsv_results(result)
+            return result.serialize(format='json')
+
+
+class OxigraphStore:
+    """pyoxigraph in-memory store (handles concurrent reads itself)"""
+    name = 'oxigraph'
+
+    def __init__(self):
+        self.oxigraph = pyoxigraph.Store()
+
+    def load(self, graph_uri, rdf_graph):
+        self.store(graph_uri, rdf_graph.serialize(format='nt'), 'nt', replace=False)
+
+    def store(self, graph_uri, data, rdf_format, replace):
+        graph = pyoxigraph.NamedNode(graph_uri)
+        if rdf_format != 'turtle' and rdf_format != 'nt':
+            # Formats pyoxigraph can't read directly go through rdflib
+            parsed = rdflib.Graph().parse(data=data, format=rdf_format)
+            data, rdf_format = parsed.serialize(format='nt'), 'nt'
+        if replace:
+            self.oxigraph.clear_graph(graph)
+        formats = {'turtle': pyoxigraph.RdfFormat.TURTLE, 'nt': pyoxigraph.RdfFormat.N_TRIPLES}
+        self.oxigraph.load(data.encode('utf-8'), format=formats[rdf_format], to_graph=graph)
+
+    def drop(self, graph_uri):
+        graph = pyoxigraph.NamedNode(graph_uri)
+        if graph in self.oxigraph.named_graphs():
+            self.oxigraph.remove_graph(graph)
+
+    def dump(self, graph_uri, rdf_format):
+        return self.oxigraph.dump(format=self._format(rdf_format), from_graph=pyoxigraph.NamedNode(graph_uri))
+
+    def query(self, query, rdf_format='nt'):
+        if is_update(query):
+            self.oxigraph.update(query)
+            return None
+        result = self.oxigraph.query(query)
+        if isinstance(result, pyoxigraph.QueryTriples):
+            return result.serialize(format=self._format(rdf_format))
+        if rdf_format == 'tsv':
+            return result.serialize(format=pyoxigraph.QueryResultsFormat.TSV)
+        return result.serialize(format=pyoxigraph.QueryResultsFormat.JSON)
+
+    @staticmethod
+    def _format(rdf_format):
+        return pyoxigraph.RdfFormat.TURTLE if rdf_format == 'turtle' else pyoxigraph.RdfFormat.N_TRIPLES
+
+
+class StandInVirtuoso:
+    """In-process stand-in for the Virtuoso endpoints the backend uses.
+
+    Serves ``/sparql`` (queries and updates; SPARQL JSON or TSV results,
+    CONSTRUCT results as N-Triples or Turtle) and ``/sparql-graph-crud-auth?graph=``
+    (Turtle POST/PUT, GET as N-Triples or Turtle, DELETE) from
+    pyoxigraph when installed, otherwise an rdflib Dataset. Requests wait
+    ``latency_ms`` (+ up to ``jitter_ms``) before they are handled; uploads
+    additionally wait ``upload_ms_per_kb`` per KB of payload. The injected
+    latency is not serialized, so concurrent requests overlap like they do
+    against a real server.
+    """
+
+    def __init__(self, latency_ms=0, jitter_ms=0, upload_ms_per_kb=0.0, seed=0, engine='auto'):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.upload_ms_per_kb = upload_ms_per_kb
+        self.rng = random.Random(seed)
+        if engine == 'oxigraph' or (engine == 'auto' and pyoxigraph is not None):
+            if pyoxigraph is None:
+                raise RuntimeError("pyoxigraph is not installed")
+            self.backend = OxigraphStore()
+        else:
+            self.backend = RdflibStore()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, host='127.0.0.1', port=0):
+        stand_in = self
+
+        class Handler(_Handler):
+            pass
+        Handler.stand_in = stand_in
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def delay(self, payload_bytes=0):
+        with self.lock:
+            jitter = self.rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0
+            self.requests += 1
+        seconds = (self.latency_ms + jitter + self.upload_ms_per_kb * payload_bytes / 1024) / 1000
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def load(self, graph_uri, rdf_graph):
+        """Preload triples into a named graph (bypasses the HTTP layer)"""
+        self.backend.load(graph_uri, rdf_graph)
+
+    def store(self, graph_uri, data, content_type, replace=False):
+        self.backend.store(graph_uri, data, _rdf_format(content_type), replace)
+
+    def drop(self, graph_uri):
+        self.backend.drop(graph_uri)
+
+    def dump(self, graph_uri, rdf_format='nt'):
+        """Serialize a named graph (Graph Store GET)"""
+        return self.backend.dump(graph_uri, rdf_format)
+
+    def query(self, query, rdf_format='nt'):
+        """Run a query or update; returns the SPARQL JSON response body, or RDF for graph results"""
+        return self.backend.query(query, rdf_format)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    stand_in = None
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; with Nagle enabled every
+    # keep-alive response would wait for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _reply(self, status, body=b'', content_type='text/plain'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _sparql(self, params, body):
+        content_type = (self.headers.get('Content-Type') or '').split(';')[0].strip()
+        if content_type in ('application/sparql-update', 'application/sparql-query'):
+            query = body.decode('utf-8')
+        else:
+            form = parse_qs(body.decode('utf-8'))
+            query = (form.get('query') or form.get('update') or params.get('query') or [''])[0]
+        if not query:
+            self._reply(400, b'Missing query')
+            return
+        self.stand_in.delay()
+        rdf_format = _response_format(self.headers.get('Accept'))
+        try:
+            result = self.stand_in.query(query, rdf_format)
+        except Exception as e:
+            self._reply(400, f'Query failed: {e}'.encode('utf-8'))
+            return
+        if result is None:
+            self._reply(200, b'{"results": {"bindings": []}}', 'application/json')
+        elif rdf_format == 'tsv':
+            self._reply(200, result, 'text/tab-separated-values')
+        elif any(mimetype in (self.headers.get('Accept') or '') for mimetype in ('application/n-triples', 'text/turtle')):
+            self._reply(200, result, 'text/turtle' if rdf_format == 'turtle' else 'application/n-triples')
+        else:
+            self._reply(200, result, 'application/sparql-results+json')
+
+    def _crud(self, params, body, replace):
+        graph = (params.get('graph') or [None])[0]
+        if not graph:
+            self._reply(400, b'Missing graph parameter')
+            return
+        self.stand_in.delay(len(body))
+        try:
+            self.stand_in.store(graph, body.decode('utf-8'), self.headers.get('Content-Type'), replace)
+        except Exception as e:
+            self._reply(400, f'Could not parse data: {e}'.encode('utf-8'))
+            return
+        self._reply(201)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path == '/sparql':
+            self._sparql(params, b'')
+        elif url.path.startswith('/sparql-graph-crud') and params.get('graph'):
+            self.stand_in.delay()
+            rdf_format = _response_format(self.headers.get('Accept'))
+            self._reply(200, self.stand_in.dump(params['graph'][0], rdf_format),
+                        'text/turtle' if rdf_format == 'turtle' else 'application/n-triples')
+        else:
+            self._reply(404)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        body = self._body()
+        if url.path == '/sparql':
+            self._sparql(params, body)
+        elif url.path.startswith('/sparql-graph-crud'):
+            self._crud(params, body, replace=False)
+        else:
+            self._reply(404)
+
+    def do_PUT(self):
+        url = urlparse(self.path)
+        if url.path.startswith('/sparql-graph-crud'):
+            self._crud(parse_qs(url.query), self._body(), replace=True)
+        else:
+            self._reply(404)
+
+    def do_DELETE(self):
+        url = urlparse(self.path)
+        graph = (parse_qs(url.query).get('graph') or [None])[0]
+        if not url.path.startswith('/sparql-graph-crud') or not graph:
+            self._reply(404)
+            return
+        self.stand_in.delay()
+        self.stand_in.drop(graph)
+        self._reply(200)
@@ -0,0 +1,36 @@
+import math
+import time
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile (q in 0..100) of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, int(math.ceil(q / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def summarize(samples_ms, prefix=''):
+    """p50/p95/p99/mean of latency samples as ``<prefix>P50Ms`` ... keys"""
+    if not samples_ms:
+        return {f'{prefix}Samples': 0}
+    return {
+        f'{prefix}P50Ms': round(percentile(samples_ms, 50), 2),
+        f'{prefix}P95Ms': round(percentile(samples_ms, 95), 2),
+        f'{prefix}P99Ms': round(percentile(samples_ms, 99), 2),
+        f'{prefix}MeanMs': round(sum(samples_ms) / len(samples_ms), 2),
+        f'{prefix}Samples': len(samples_ms)
+    }
+
+
+def measure(run, repeat=5, warmup=1):
+    """Call ``run()`` warmup + repeat times, returning the timed samples in ms"""
+    for _ in range(warmup):
+        run()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
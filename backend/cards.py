@@ -0,0 +1,327 @@
+import json
+import sqlite3
+import threading
+import zlib
+from rdflib import BNode, Literal
+from config import config
+from export import iter_graph_triples
+from labels import LABEL_PREDICATES, language_rank
+from virtuoso import query_sparql
+
+RDF_TYPE = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#type'
+_LABEL_RANK = {predicate: index for index, predicate in enumerate(LABEL_PREDICATES)}
+# Cards read or merged per SQLite statement
+CHUNK_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    graph TEXT NOT NULL,
+    uri TEXT NOT NULL,
+    label TEXT,
+    card BLOB NOT NULL,
+    PRIMARY KEY (graph, uri)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS card_graphs (
+    graph TEXT PRIMARY KEY,
+    complete INTEGER NOT NULL,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def _empty_card():
+    return {'types': [], 'literals': [], 'outgoing': [], 'incoming': [],
+            'outgoingTruncated': False, 'incomingTruncated': False}
+
+
+def _encode(card):
+    return zlib.compress(json.dumps(card, separators=(',', ':')).encode('utf-8'))
+
+
+def _decode(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+def _best_label(literals):
+    best = None
+    for predicate, value, _, lang in literals:
+        rank = _LABEL_RANK.get(predicate)
+        if rank is None:
+            continue
+        key = (language_rank(lang or ''), rank)
+        if best is None or key < best[0]:
+            best = (key, value)
+    return best[1] if best else None
+
+
+def _node_key(term):
+    # Blank nodes keep their parser ids; they are only meaningful inside the store
+    return f"_:{term}" if isinstance(term, BNode) else str(term)
+
+
+class _CardDelta:
+    """Statements about one entity collected from an upload, before merging"""
+
+    __slots__ = ('types', 'literals', 'outgoing', 'incoming')
+
+    def __init__(self):
+        self.types = []
+        self.literals = []
+        self.outgoing = []
+        self.incoming = []
+
+
+class EntityCardStore:
+    """Precomputed entity cards in SQLite, keyed by (graph name, URI).
+
+    A card holds an entity's types, literal properties and its first
+    ``max_links`` outgoing and incoming links; the best label is kept in
+    its own column so linked entities can be labelled with one indexed
+    lookup. Cards are merged in at the end of every upload. They are only
+    served for graphs whose cards are complete: graphs uploaded into an
+    empty graph since the store was enabled, or rebuilt from Virtuoso.
+    """
+
+    def __init__(self, path, max_links):
+        self.path = path
+        self.max_links = max_links
+        self.local = threading.local()
+        self.rebuilding = set()
+        self.writing = set()    # graphs with an upload in progress
+        self.generations = {}
+        self.lock = threading.Lock()
+        self.write_done = threading.Condition(self.lock)
+        self.hits = 0
+        self.misses = 0
+        if self.enabled:
+            with self._connection() as connection:
+                connection.executescript(_SCHEMA)
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _connection(self):
+        # sqlite3 connections can't be shared between threads
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self.local.connection = connection
+        return connection
+
+    # Graph state
+
+    def is_complete(self, graph_name):
+        if not self.enabled:
+            return False
+        row = self._connection().execute(
+            'SELECT complete FROM card_graphs WHERE graph = ?', (graph_name,)).fetchone()
+        return bool(row and row[0])
+
+    def _set_complete(self, connection, graph_name, complete):
+        connection.execute(
+            'INSERT OR REPLACE INTO card_graphs (graph, complete, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)',
+            (graph_name, 1 if complete else 0))
+
+    def begin_upload(self, graph_name, graph_uri):
+        """Call before an upload writes to Virtuoso; returns whether its cards can be complete afterwards
+
+        The upload must be ended with apply_upload (or drop_graph if it failed).
+        """
+        if not self.enabled:
+            return False
+        with self.lock:
+            # A rebuild reading the graph meanwhile starts over once the write ended
+            self.writing.add(graph_name)
+            self.generations[graph_name] = self.generations.get(graph_name, 0) + 1
+        if self.is_complete(graph_name):
+            return True
+        existing = query_sparql(f"SELECT ?s WHERE {{ GRAPH <{graph_uri}> {{ ?s ?p ?o }} }} LIMIT 1",
+                                use_cache=False, origin='entity_cards.graph_empty')
+        if existing is None or existing:
+            return False  # Data the store has never seen; cards would be partial
+        self._delete_cards(graph_name)
+        return True
+
+    def _end_write(self, graph_name):
+        with self.lock:
+            self.writing.discard(graph_name)
+            self.generations[graph_name] = self.generations.get(graph_name, 0) + 1
+            self.write_done.notify_all()
+
+    def drop_graph(self, graph_name):
+        """Forget a graph's cards (deleted, or changed in a way the cards missed)"""
+        if not self.enabled:
+            return
+        self._end_write(graph_name)
+        self._delete_cards(graph_name)
+
+    def _delete_cards(self, graph_name):
+        with self._connection() as connection:
+            connection.execute('DELETE FROM cards WHERE graph = ?', (graph_name,))
+            connection.execute('DELETE FROM card_graphs WHERE graph = ?', (graph_name,))
+
+    # Building
+
+    def apply_upload(self, graph_name, rdf_graph, complete):
+        """Merge the statements of an uploaded rdflib graph into the cards"""
+        if not self.enabled:
+            return
+        if not complete:
+            self._end_write(graph_name)
+            return
+        deltas = {}
+        self._collect_rdflib(deltas, rdf_graph)
+        self._merge(graph_name, deltas, complete=True)
+        self._end_write(graph_name)
+
+    def _collect_rdflib(self, deltas, triples):
+        for subject, predicate, obj in triples:
+            if isinstance(obj, Literal):
+                obj = (str(obj), str(obj.datatype) if obj.datatype else None, obj.language)
+            else:
+                obj = _node_key(obj)
+            self._collect(deltas, _node_key(subject), str(predicate), obj)
+
+    def _collect(self, deltas, subject, predicate, obj):
+        delta = deltas.get(subject)
+        if delta is None:
+            delta = deltas[subject] = _CardDelta()
+        if isinstance(obj, tuple):
+            delta.literals.append([predicate, *obj])
+            return
+        if predicate == RDF_TYPE:
+            delta.types.append(obj)
+        delta.outgoing.append([predicate, obj])
+        target = deltas.get(obj)
+        if target is None:
+            target = deltas[obj] = _CardDelta()
+        target.incoming.append([subject, predicate])
+
+    def _merge(self, graph_name, deltas, complete):
+        uris = list(deltas)
+        with self._connection() as connection:
+            for start in range(0, len(uris), CHUNK_SIZE):
+                chunk = uris[start:start + CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                existing = {uri: _decode(blob) for uri, blob in connection.execute(
+                    f'SELECT uri, card FROM cards WHERE graph = ? AND uri IN ({placeholders})',
+                    [graph_name, *chunk])}
+                rows = []
+                for uri in chunk:
+                    card = self._merge_card(existing.get(uri) or _empty_card(), deltas[uri])
+                    rows.append((graph_name, uri, _best_label(card['literals']), _encode(card)))
+                connection.executemany(
+                    'INSERT OR REPLACE INTO cards (graph, uri, label, card) VALUES (?, ?, ?, ?)', rows)
+            self._set_complete(connection, graph_name, complete)
+
+    def _merge_card(self, card, delta):
+        card['types'] = list(dict.fromkeys(card['types'] + delta.types))
+        seen = {tuple(literal) for literal in card['literals']}
+        for literal in delta.literals:
+            if tuple(literal) not in seen:
+                seen.add(tuple(literal))
+                card['literals'].append(literal)
+        for key, new_links in (('outgoing', delta.outgoing), ('incoming', delta.incoming)):
+            links = card[key]
+            seen = {tuple(link) for link in links}
+            for link in new_links:
+                if tuple(link) in seen:
+                    continue
+                if len(links) >= self.max_links:
+                    card[f'{key}Truncated'] = True
+                    break
+                seen.add(tuple(link))
+                links.append(link)
+        return card
+
+    def rebuild(self, graph_name):
+        """Rebuild a graph's cards from Virtuoso in the background"""
+        with self.lock:
+            if not self.enabled or graph_name in self.rebuilding:
+                return False
+            self.rebuilding.add(graph_name)
+        threading.Thread(target=self._rebuild, args=(graph_name,), daemon=True).start()
+        return True
+
+    def _rebuild(self, graph_name):
+        try:
+            while True:
+                # Read the graph between writes; a write overlapping the read starts it over
+                with self.write_done:
+                    while graph_name in self.writing:
+                        self.write_done.wait()
+                    generation = self.generations.get(graph_name, 0)
+                self._delete_cards(graph_name)
+                deltas = {}
+                for triples in iter_graph_triples(config.get_graph_uri(graph_name)):
+                    self._collect_rdflib(deltas, triples)
+                    if len(deltas) >= CHUNK_SIZE * 20:
+                        self._merge(graph_name, deltas, complete=False)
+                        deltas = {}
+                # Held while completing, so an upload starting now sees either no or complete cards
+                with self.lock:
+                    if self.generations.get(graph_name, 0) != generation or graph_name in self.writing:
+                        continue
+                    self._merge(graph_name, deltas, complete=True)
+                break
+            print(f"Rebuilt entity cards of graph {graph_name}")
+        except Exception as e:
+            print(f"Failed to rebuild entity cards of graph {graph_name}: {e}")
+            self._delete_cards(graph_name)
+        finally:
+            with self.lock:
+                self.rebuilding.discard(graph_name)
+
+    # Serving
+
+    def get_many(self, graph_name, uris):
+        """Cards of the given URIs, or None when the graph's cards can't be trusted"""
+        if not self.is_complete(graph_name):
+            return None
+        uris = list(dict.fromkeys(uris))
+        cards = {}
+        connection = self._connection()
+        for start in range(0, len(uris), CHUNK_SIZE):
+            chunk = uris[start:start + CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            cards.update((uri, _decode(blob)) for uri, blob in connection.execute(
+                f'SELECT uri, card FROM cards WHERE graph = ? AND uri IN ({placeholders})',
+                [graph_name, *chunk]))
+        with self.lock:
+            self.hits += len(cards)
+            self.misses += len(uris) - len(cards)
+        return cards
+
+    def get(self, graph_name, uri):
+        cards = self.get_many(graph_name, [uri])
+        return cards.get(uri) if cards else None
+
+    def labels(self, graph_name, uris):
+        """Stored best labels of the given URIs"""
+        uris = list(dict.fromkeys(uris))
+        labels = {}
+        connection = self._connection()
+        for start in range(0, len(uris), CHUNK_SIZE):
+            chunk = uris[start:start + CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            labels.update(connection.execute(
+                f'SELECT uri, label FROM cards WHERE graph = ? AND label IS NOT NULL AND uri IN ({placeholders})',
+                [graph_name, *chunk]))
+        return labels
+
+    def status(self):
+        if not self.enabled:
+            return {'enabled': False}
+        graphs = [{'graphName': graph, 'complete': bool(complete), 'updatedAt': updated_at, 'cards': count}
+                  for graph, complete, updated_at, count in self._connection().execute(
+                      'SELECT g.graph, g.complete, g.updated_at, '
+                      '(SELECT COUNT(*) FROM cards c WHERE c.graph = g.graph) FROM card_graphs g')]
+        with self.lock:
+            return {'enabled': True, 'path': self.path, 'maxLinks': self.max_links, 'graphs': graphs,
+                    'rebuilding': sorted(self.rebuilding), 'hits': self.hits, 'misses': self.misses}
+
+
+entity_cards = EntityCardStore(config.entity_card_db, config.entity_card_max_links)
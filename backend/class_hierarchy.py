@@ -0,0 +1,207 @@
+from collections import defaultdict
+from rdflib import RDF, RDFS, URIRef
+from labels import uri_fragment
+from virtuoso import query_sparql
+
+RDF_TYPE = str(RDF.type)
+RDFS_SUBCLASS_OF = str(RDFS.subClassOf)
+# subClassOf statements read per query when extracting the DAG
+EDGE_PAGE_SIZE = 10000
+
+
+def _ancestors(parents):
+    """Each class' ancestors including itself, following subClassOf (cycles allowed)"""
+    closure = {}
+
+    def visit(class_uri):
+        if class_uri in closure:
+            return closure[class_uri]
+        seen = {class_uri}
+        stack = [class_uri]
+        while stack:
+            for parent in parents.get(stack.pop(), ()):
+                if parent not in seen:
+                    if parent in closure:
+                        seen |= closure[parent]
+                    else:
+                        seen.add(parent)
+                        stack.append(parent)
+        closure[class_uri] = seen
+        return seen
+
+    for class_uri in list(parents):
+        visit(class_uri)
+    return visit
+
+
+def _finalize_hierarchy(parents, signatures, graph_uri=None):
+    """Build the hierarchy from subClassOf edges and type signature counts.
+
+    ``signatures`` maps each set of direct types (a frozenset) to the number
+    of instances typed with exactly that set. An instance counts once
+    towards every class that is one of its types or an ancestor of one,
+    however many of its types share that ancestor.
+    """
+    ancestors_of = _ancestors(parents)
+    direct_counts = defaultdict(int)
+    total_counts = defaultdict(int)
+    typed_instances = 0
+    for types, count in signatures.items():
+        typed_instances += count
+        reached = set()
+        for class_uri in types:
+            direct_counts[class_uri] += count
+            reached |= ancestors_of(class_uri)
+        for class_uri in reached:
+            total_counts[class_uri] += count
+
+    children = defaultdict(set)
+    for class_uri, class_parents in parents.items():
+        for parent in class_parents:
+            if parent != class_uri:
+                children[parent].add(class_uri)
+
+    class_uris = set(direct_counts) | set(parents) | set(children)
+    classes = {}
+    for class_uri in class_uris:
+        classes[class_uri] = {
+            'uri': class_uri,
+            'label': uri_fragment(class_uri),
+            'directCount': direct_counts.get(class_uri, 0),
+            'totalCount': total_counts.get(class_uri, 0),
+            'parents': sorted(parent for parent in parents.get(class_uri, ()) if parent != class_uri),
+            'children': sorted(children.get(class_uri, ()))
+        }
+    roots = [class_uri for class_uri, entry in classes.items() if not entry['parents']]
+    reachable = set()
+
+    def mark(start):
+        stack = [start]
+        reachable.add(start)
+        while stack:
+            for child in classes[stack.pop()]['children']:
+                if child not in reachable:
+                    reachable.add(child)
+                    stack.append(child)
+
+    for root in roots:
+        mark(root)
+    # Classes in a subclass cycle at the top of the tree have no root above them;
+    # one class of each such cycle stands in as a root
+    for class_uri in sorted(set(classes) - reachable):
+        if class_uri not in reachable and all(class_uri in ancestors_of(ancestor)
+                                              for ancestor in ancestors_of(class_uri)):
+            roots.append(class_uri)
+            mark(class_uri)
+    roots.sort(key=lambda class_uri: (-classes[class_uri]['totalCount'], class_uri))
+
+    return {
+        'graphUri': graph_uri,
+        'classCount': len(classes),
+        'subclassEdgeCount': sum(len(entry['parents']) for entry in classes.values()),
+        'typedInstanceCount': typed_instances,
+        'roots': roots,
+        'classes': classes
+    }
+
+
+def class_hierarchy_from_graph(graph, graph_uri=None):
+    """Extract the subclass DAG and rolled-up counts from an rdflib graph (upload path)"""
+    parents = defaultdict(set)
+    for subj, _, obj in graph.triples((None, RDFS.subClassOf, None)):
+        if isinstance(subj, URIRef) and isinstance(obj, URIRef):
+            parents[str(subj)].add(str(obj))
+
+    subject_types = defaultdict(set)
+    for subj, _, obj in graph.triples((None, RDF.type, None)):
+        subject_types[subj].add(str(obj))
+    signatures = defaultdict(int)
+    for types in subject_types.values():
+        signatures[frozenset(types)] += 1
+
+    return _finalize_hierarchy(parents, signatures, graph_uri)
+
+
+def _query(query, template):
+    """Run a hierarchy query, raising instead of returning partial counts"""
+    results = query_sparql(query, timeout_seconds=120, origin=f'class_hierarchy_via_sparql.{template}')
+    if results is None:
+        raise RuntimeError("Class hierarchy query failed")
+    return results
+
+
+def class_hierarchy_via_sparql(graph_uri):
+    """Extract the subclass DAG and rolled-up counts of an existing graph.
+
+    The subClassOf statements are read in pages and the closure is taken
+    in memory, so no property path query is needed. Instances are counted
+    per type signature (the set of their direct types) in one aggregate
+    query, which keeps rolled-up counts exact for multiply typed instances.
+    """
+    parents = defaultdict(set)
+    offset = 0
+    while True:
+        edges = _query(f"""
+        SELECT ?sub ?super
+        FROM <{graph_uri}>
+        WHERE {{
+          ?sub <{RDFS_SUBCLASS_OF}> ?super
+          FILTER(isIRI(?sub) && isIRI(?super))
+        }}
+        ORDER BY ?sub ?super
+        LIMIT {EDGE_PAGE_SIZE}
+        OFFSET {offset}
+        """, 'edges')
+        for binding in edges:
+            parents[binding['sub']['value']].add(binding['super']['value'])
+        if len(edges) < EDGE_PAGE_SIZE:
+            break
+        offset += EDGE_PAGE_SIZE
+
+    signatures = defaultdict(int)
+    signatures_query = f"""
+    SELECT ?types (COUNT(*) AS ?count)
+    FROM <{graph_uri}>
+    WHERE {{
+      {{
+        SELECT ?s (GROUP_CONCAT(STR(?class); separator=" ") AS ?types)
+        WHERE {{ ?s a ?class }}
+        GROUP BY ?s
+      }}
+    }}
+    GROUP BY ?types
+    """
+    for binding in _query(signatures_query, 'signatures'):
+        # GROUP_CONCAT order is unspecified; equal sets are summed here
+        signatures[frozenset(binding['types']['value'].split(' '))] += int(binding['count']['value'])
+
+    return _finalize_hierarchy(parents, signatures, graph_uri)
+
+
+def hierarchy_tree(hierarchy, root=None, depth=10, min_count=0):
+    """Nested tree of the hierarchy (from ``root`` or all roots) down to ``depth`` levels.
+
+    A class with several parents appears under each of them; a subclass
+    cycle is cut where it returns to a class already on the path.
+    """
+    classes = hierarchy['classes']
+
+    def node(class_uri, level, path):
+        entry = classes[class_uri]
+        children = [child for child in entry['children']
+                    if child not in path and classes[child]['totalCount'] >= min_count]
+        children.sort(key=lambda child: (-classes[child]['totalCount'], child))
+        result = {
+            'uri': class_uri,
+            'label': entry['label'],
+            'directCount': entry['directCount'],
+            'totalCount': entry['totalCount'],
+            'childCount': len(children)
+        }
+        if level < depth:
+            result['children'] = [node(child, level + 1, path | {child}) for child in children]
+        return result
+
+    roots = [root] if root else [class_uri for class_uri in hierarchy['roots']
+                                 if classes[class_uri]['totalCount'] >= min_count]
+    return [node(class_uri, 1, {class_uri}) for class_uri in roots]
@@ -0,0 +1,137 @@
+from rdflib import Graph
+
+COMPACT_MEDIA_TYPE = 'application/vnd.kgviewer.compact+json'
+COMPACT_FORMAT = 'compact-v1'
+
+
+def _namespace(uri):
+    """Namespace part of a URI (up to and including the last # or /)"""
+    cut = max(uri.rfind('#'), uri.rfind('/'))
+    return uri[:cut + 1] if cut > 0 else None
+
+
+def build_known_prefixes(uris=()):
+    """Prefix map from rdflib's common bindings plus the given vocabulary URIs"""
+    prefixes = {str(namespace): prefix for prefix, namespace in Graph().namespaces() if prefix}
+    for uri in uris:
+        namespace = _namespace(uri)
+        if namespace and namespace not in prefixes:
+            prefixes[namespace] = f"ns{len(prefixes)}"
+    return prefixes
+
+
+class CompactEncoder:
+    """Interns strings and shortens IRIs with a prefix map.
+
+    Known namespaces keep their usual prefix; namespaces first seen in the
+    payload get a generated one once they are used more than once. Only
+    prefixes that are actually referenced end up in the output.
+    """
+
+    def __init__(self, known_prefixes):
+        self.known_prefixes = known_prefixes
+        self.prefixes = {}
+        self.strings = []
+        self.string_index = {}
+
+    def _prefix_for(self, namespace):
+        if namespace in self.prefixes:
+            return self.prefixes[namespace]
+        prefix = self.known_prefixes.get(namespace) or f"g{len(self.prefixes)}"
+        if prefix in self.prefixes.values():
+            prefix = f"{prefix}{len(self.prefixes)}"
+        self.prefixes[namespace] = prefix
+        return prefix
+
+    def iri(self, uri, namespace_counts):
+        namespace = _namespace(uri)
+        if namespace and (namespace in self.known_prefixes or namespace_counts.get(namespace, 0) > 1):
+            return self.string(f"{self._prefix_for(namespace)}:{uri[len(namespace):]}")
+        return self.string(uri)
+
+    def string(self, value):
+        if value is None:
+            return -1
+        index = self.string_index.get(value)
+        if index is None:
+            index = len(self.strings)
+            self.strings.append(value)
+            self.string_index[value] = index
+        return index
+
+    def header(self):
+        return {
+            'format': COMPACT_FORMAT,
+            'prefixes': {prefix: namespace for namespace, prefix in self.prefixes.items()},
+            'strings': self.strings
+        }
+
+
+def _namespace_counts(uris):
+    counts = {}
+    for uri in uris:
+        namespace = _namespace(uri)
+        if namespace:
+            counts[namespace] = counts.get(namespace, 0) + 1
+    return counts
+
+
+def encode_graph_payload(payload, known_prefixes):
+    """Encode a nodes/edges payload into the compact wire format.
+
+    Nodes become ``[uri, label, isCentral]`` and edges
+    ``[sourceNode, targetNode, predicate, label]``, where node references
+    are positions in ``nodes`` and everything else indexes ``strings``.
+    IRIs are stored as ``prefix:local`` against ``prefixes``. Edge ids are
+    not sent; clients rebuild them as ``source--predicate--target``.
+    Server-computed ``positions`` become ``[x, y]`` pairs in node order.
+    Neighborhood summary ``groups`` (and a page's ``group``) are passed through.
+    """
+    nodes = payload.get('nodes', [])
+    edges = payload.get('edges', [])
+    counts = _namespace_counts([node['uri'] for node in nodes] + [edge['uri'] for edge in edges])
+    encoder = CompactEncoder(known_prefixes)
+
+    node_index = {}
+    compact_nodes = []
+    for node in nodes:
+        node_index[node['id']] = len(compact_nodes)
+        compact_nodes.append([
+            encoder.iri(node['uri'], counts),
+            encoder.string(node.get('label')),
+            1 if node.get('isCentral') else 0
+        ])
+
+    compact_edges = [[
+        node_index[edge['source']],
+        node_index[edge['target']],
+        encoder.iri(edge['uri'], counts),
+        encoder.string(edge.get('label'))
+    ] for edge in edges]
+
+    compact = encoder.header()
+    compact.update({
+        'nodes': compact_nodes,
+        'edges': compact_edges,
+        'centralNode': node_index.get(payload.get('centralNode'), -1)
+    })
+    if 'positions' in payload:
+        compact['positions'] = [[payload['positions'][node['id']]['x'], payload['positions'][node['id']]['y']]
+                                for node in nodes]
+    if 'literals' in payload:
+        compact['literals'] = [[
+            encoder.iri(literal['predicate'], counts),
+            encoder.string(literal.get('predicateLabel')),
+            encoder.string(literal['value']),
+            encoder.string(literal.get('datatype'))
+        ] for literal in payload['literals']]
+    for key in ('groups', 'group'):
+        if key in payload:
+            compact[key] = payload[key]
+    return compact
+
+
+def wants_compact(request):
+    """Compact format is negotiated by ?format=compact or the Accept header"""
+    return (request.args.get('format') == 'compact' or
+            COMPACT_MEDIA_TYPE in request.headers.get('Accept', ''))
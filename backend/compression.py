@@ -0,0 +1,40 @@
+import gzip
+
+# brotli is optional; without it responses fall back to gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024
+COMPRESSIBLE_TYPES = ('application/json', 'application/vnd.kgviewer.compact+json')
+
+
+def _accepted_encodings(request):
+    return {part.split(';')[0].strip() for part in request.headers.get('Accept-Encoding', '').split(',')}
+
+
+def compress_response(request, response):
+    """Compress JSON responses with brotli or gzip when the client accepts it"""
+    if (response.direct_passthrough or response.is_streamed or
+            response.status_code < 200 or response.status_code >= 300 or
+            'Content-Encoding' in response.headers or
+            response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_BYTES:
+        return response
+
+    accepted = _accepted_encodings(request)
+    if brotli is not None and 'br' in accepted:
+        response.set_data(brotli.compress(data, quality=5))
+        response.headers['Content-Encoding'] = 'br'
+    elif 'gzip' in accepted:
+        response.set_data(gzip.compress(data, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    return response
@@ -1,6 +1,6 @@
 import os
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 @dataclass
 class Config:
@@ -9,7 +9,16 @@ class Config:
     # Service URLs (internal Docker network)
     virtuoso_url: str = os.getenv('VIRTUOSO_URL', 'http://virtuoso:8890')
     lodview_url: str = os.getenv('LODVIEW_URL', 'http://lodview:8080')
-    
+
+    # Read replicas: VIRTUOSO_URL stays the write primary, reads are spread
+    # over VIRTUOSO_READ_URLS (comma separated; empty sends all reads to the primary)
+    virtuoso_read_urls: List[str] = field(
+        default_factory=lambda: [url.strip() for url in os.getenv('VIRTUOSO_READ_URLS', '').split(',') if url.strip()])
+    virtuoso_read_balancing: str = os.getenv('VIRTUOSO_READ_BALANCING', 'least-outstanding')
+    virtuoso_health_check_seconds: float = float(os.getenv('VIRTUOSO_HEALTH_CHECK_SECONDS', '5'))
+    # Graph holding per-graph data versions; kept outside graph_base_uri so it isn't listed
+    meta_graph_uri: str = os.getenv('META_GRAPH_URI', os.getenv('GRAPH_BASE_URI', 'http://example.org') + '/kgviewer/meta')
+
     # External URLs (browser-accessible)
     external_virtuoso_url: str = os.getenv('EXTERNAL_VIRTUOSO_URL', 'http://localhost:8890')
     external_lodview_url: str = os.getenv('EXTERNAL_LODVIEW_URL', 'http://localhost:8080')
@@ -29,6 +38,74 @@ class Config:
     # Security and limits
     max_content_length: int = int(os.getenv('MAX_CONTENT_LENGTH', str(1024 * 1024 * 1024)))  # 1GB default
     
+    # Approximate analysis (sampling) settings
+    approximate_budget_ms: int = int(os.getenv('APPROX_ANALYSIS_BUDGET_MS', '5000'))
+    approximate_slice_size: int = int(os.getenv('APPROX_ANALYSIS_SLICE_SIZE', '2000'))
+    
+    # Upload batching: batches start at UPLOAD_BATCH_BYTES of serialized data and
+    # adapt to Virtuoso's latency; timeouts allow for UPLOAD_MIN_BYTES_PER_SECOND
+    upload_batch_bytes: int = int(os.getenv('UPLOAD_BATCH_BYTES', str(1024 * 1024)))
+    upload_batch_max_bytes: int = int(os.getenv('UPLOAD_BATCH_MAX_BYTES', str(16 * 1024 * 1024)))
+    upload_batch_target_seconds: float = float(os.getenv('UPLOAD_BATCH_TARGET_SECONDS', '5'))
+    upload_min_bytes_per_second: int = int(os.getenv('UPLOAD_MIN_BYTES_PER_SECOND', str(256 * 1024)))
+    # Target graphs of a multi-graph (N-Quads/TriG/JSON-LD) upload stored at the same time
+    upload_parallel_graphs: int = int(os.getenv('UPLOAD_PARALLEL_GRAPHS', '4'))
+    
+    # Export settings (triples parsed per batch when a streamed graph is read)
+    export_chunk_size: int = int(os.getenv('EXPORT_CHUNK_SIZE', '10000'))
+    
+    # Server-side graph layout (needs numpy); larger node sets are left to the client
+    layout_cache_size: int = int(os.getenv('LAYOUT_CACHE_SIZE', '256'))
+    layout_max_nodes: int = int(os.getenv('LAYOUT_MAX_NODES', '3000'))
+    
+    # Connection finder: hop limit, links above which a node counts as a hub
+    # and is not expanded, and the most nodes kept per BFS level
+    paths_max_hops: int = int(os.getenv('PATHS_MAX_HOPS', '6'))
+    paths_max_fanout: int = int(os.getenv('PATHS_MAX_FANOUT', '500'))
+    paths_max_frontier: int = int(os.getenv('PATHS_MAX_FRONTIER', '5000'))
+    
+    # In-process mirrors of hot graphs (HOT_GRAPHS: comma separated names, '*' = all)
+    hot_graphs: List[str] = field(
+        default_factory=lambda: [name.strip() for name in os.getenv('HOT_GRAPHS', '').split(',') if name.strip()])
+    mirror_memory_mb: int = int(os.getenv('MIRROR_MEMORY_MB', '512'))
+    
+    # Precomputed entity cards (SQLite file; empty disables the ingest stage)
+    entity_card_db: str = os.getenv('ENTITY_CARD_DB', '')
+    entity_card_max_links: int = int(os.getenv('ENTITY_CARD_MAX_LINKS', '200'))
+    
+    # Cross-graph search: worker threads shared by all searches and the time
+    # each graph gets before it is reported as timed out
+    search_workers: int = int(os.getenv('SEARCH_WORKERS', '8'))
+    search_graph_budget_ms: int = int(os.getenv('SEARCH_GRAPH_BUDGET_MS', '2000'))
+
+    # Background cache warmer: worker threads (0 disables it) recomputing graph
+    # artifacts at startup and after changes, paused while Virtuoso is slower than the limit
+    warmer_workers: int = int(os.getenv('WARMER_WORKERS', '1'))
+    warmer_max_latency_ms: float = float(os.getenv('WARMER_MAX_LATENCY_MS', '500'))
+    warmer_pause_seconds: float = float(os.getenv('WARMER_PAUSE_SECONDS', '5'))
+    
+    # Label resolution (LABEL_LANGUAGES: preferred languages, empty entry = untagged)
+    label_cache_size: int = int(os.getenv('LABEL_CACHE_SIZE', '100000'))
+    label_languages: List[str] = field(
+        default_factory=lambda: [lang.strip() for lang in os.getenv('LABEL_LANGUAGES', 'en,').split(',')])
+    
+    # SPARQL read cache (QUERY_CACHE_TTL_SECONDS=0 disables memoization)
+    query_cache_ttl_seconds: float = float(os.getenv('QUERY_CACHE_TTL_SECONDS', '30'))
+    query_cache_max_bytes: int = int(os.getenv('QUERY_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+    
+    # Slow-query log (0 disables it; per-fingerprint stats are always kept)
+    slow_query_threshold_ms: int = int(os.getenv('SLOW_QUERY_THRESHOLD_MS', '1000'))
+    
+    # On-demand profiling: requests carrying X-Profile-Token (when a token is
+    # set) or a random PROFILING_SAMPLE_RATE share of requests are profiled
+    profiling_token: str = os.getenv('PROFILING_TOKEN', '')
+    profiling_sample_rate: float = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+    profiling_interval_ms: float = float(os.getenv('PROFILING_INTERVAL_MS', '5'))
+    profiling_max_profiles: int = int(os.getenv('PROFILING_MAX_PROFILES', '50'))
+    
+    # HTTP caching of read endpoints (browsers revalidate, shared caches may keep s-maxage)
+    http_cache_shared_max_age: int = int(os.getenv('HTTP_CACHE_SHARED_MAX_AGE', '5'))
+    
     # Virtuoso authentication
     virtuoso_user: str = os.getenv('VIRTUOSO_USER', 'dba')
     virtuoso_password: str = os.getenv('DBA_PASSWORD', 'dba')
@@ -61,6 +138,11 @@ class Config:
             return self.default_graph_uri
         return f"{self.graph_base_uri}/{graph_name}"
     
+    @property
+    def http_cache_control(self) -> str:
+        """Cache-Control header for versioned (ETag) read responses"""
+        return f"public, max-age=0, s-maxage={self.http_cache_shared_max_age}, must-revalidate"
+    
     def to_dict(self) -> dict:
         """Convert config to dictionary for API responses"""
         return {
@@ -0,0 +1,152 @@
+from labels import is_safe_iri, resolve_labels, uri_fragment
+from virtuoso import query_sparql
+
+MAX_BATCH_SIZE = 100
+
+
+def _values(uris):
+    return ' '.join(f'<{uri}>' for uri in uris)
+
+
+def _per_entity_links(entity_uris, pattern, variable, max_links):
+    """UNION of one subquery per entity, so each entity gets up to ``max_links`` links of its own"""
+    return '\n        UNION\n        '.join(f"""{{
+            SELECT (<{uri}> AS ?entity) ?predicate ?{variable}
+            WHERE {{ {pattern.format(entity=f'<{uri}>')} FILTER(!isLiteral(?{variable})) }}
+            LIMIT {max_links}
+        }}""" for uri in entity_uris)
+
+
+def get_entity_details_batch(graph_uri, entity_uris, max_links=150):
+    """Neighborhood, literals and labels for many entities at once.
+
+    Independent of the number of entities this costs three SPARQL queries:
+    outgoing links, incoming links and literals, plus batched label
+    lookups for whatever the label cache doesn't know yet. Links are
+    limited per entity (one subquery each), so a hub in the batch can't
+    use up the others' share; literals don't count against ``max_links``.
+    Each entity is returned in the same nodes/edges/literals shape as the
+    single-entity endpoints.
+    """
+    entity_uris = list(dict.fromkeys(uri for uri in entity_uris if is_safe_iri(uri)))
+    if not entity_uris:
+        return {}
+
+    outgoing_query = f"""
+    SELECT ?entity ?predicate ?object
+    FROM <{graph_uri}>
+    WHERE {{
+        {_per_entity_links(entity_uris, '{entity} ?predicate ?object .', 'object', max_links)}
+    }}
+    """
+    incoming_query = f"""
+    SELECT ?entity ?predicate ?subject
+    FROM <{graph_uri}>
+    WHERE {{
+        {_per_entity_links(entity_uris, '?subject ?predicate {entity} .', 'subject', max_links)}
+    }}
+    """
+    literals_query = f"""
+    SELECT ?entity ?predicate ?value
+    FROM <{graph_uri}>
+    WHERE {{
+        VALUES ?entity {{ {_values(entity_uris)} }}
+        ?entity ?predicate ?value .
+        FILTER(isLiteral(?value))
+    }}
+    """
+
+    statements = {uri: {'edges': [], 'literals': []} for uri in entity_uris}
+    referenced = set(entity_uris)
+
+    for binding in query_sparql(literals_query, origin='get_entity_details_batch.literals') or []:
+        entity = binding['entity']['value']
+        predicate = binding['predicate']['value']
+        referenced.add(predicate)
+        statements[entity]['literals'].append({
+            'predicate': predicate,
+            'value': binding['value']['value'],
+            'datatype': binding['value'].get('datatype')
+        })
+
+    # Outgoing links first; incoming ones fill what is left of each entity's share
+    for binding in query_sparql(outgoing_query, origin='get_entity_details_batch.outgoing') or []:
+        entity = binding['entity']['value']
+        predicate = binding['predicate']['value']
+        obj = binding['object']['value']
+        statements[entity]['edges'].append((entity, predicate, obj))
+        referenced.update((predicate, obj))
+
+    for binding in query_sparql(incoming_query, origin='get_entity_details_batch.incoming') or []:
+        entity = binding['entity']['value']
+        if len(statements[entity]['edges']) >= max_links:
+            continue
+        subject = binding['subject']['value']
+        predicate = binding['predicate']['value']
+        statements[entity]['edges'].append((subject, predicate, entity))
+        referenced.update((subject, predicate))
+
+    return _assemble_details(statements, resolve_labels(graph_uri, referenced))
+
+
+def entity_details_from_cards(cards, labels_for, max_links=150):
+    """Same result as get_entity_details_batch, built from precomputed entity cards.
+
+    Args:
+        cards: {uri: card} as stored by the entity card store
+        labels_for: Callable returning {uri: label} for a set of URIs
+        max_links: Links per entity, outgoing first
+    """
+    statements = {}
+    referenced = set(cards)
+    for entity, card in cards.items():
+        edges = [(entity, predicate, obj) for predicate, obj in card['outgoing']]
+        edges += [(subject, predicate, entity) for subject, predicate in card['incoming']]
+        statements[entity] = {
+            'edges': edges[:max_links],
+            'literals': [{'predicate': predicate, 'value': value, 'datatype': datatype}
+                         for predicate, value, datatype, _ in card['literals']]
+        }
+        for subject, predicate, obj in statements[entity]['edges']:
+            referenced.update((subject, predicate, obj))
+        referenced.update(literal['predicate'] for literal in statements[entity]['literals'])
+    return _assemble_details(statements, labels_for(referenced))
+
+
+def _assemble_details(statements, labels):
+    """Per-entity nodes/edges/literals payloads from collected statements"""
+
+    def node(uri, central):
+        return {
+            'id': uri,
+            'label': labels.get(uri, uri_fragment(uri)),
+            'uri': uri,
+            'isCentral': uri == central
+        }
+
+    details = {}
+    for entity, data in statements.items():
+        nodes = {entity: node(entity, entity)}
+        edges = []
+        for subject, predicate, obj in data['edges']:
+            nodes.setdefault(subject, node(subject, entity))
+            nodes.setdefault(obj, node(obj, entity))
+            edges.append({
+                'id': f"{subject}--{predicate}--{obj}",
+                'source': subject,
+                'target': obj,
+                'label': labels.get(predicate, uri_fragment(predicate)),
+                'uri': predicate
+            })
+        literals = sorted(data['literals'], key=lambda literal: literal['predicate'])
+        for literal in literals:
+            literal['predicateLabel'] = labels.get(literal['predicate'])
+        details[entity] = {
+            'label': nodes[entity]['label'],
+            'nodes': list(nodes.values()),
+            'edges': edges,
+            'centralNode': entity,
+            'literals': literals
+        }
+
+    return details
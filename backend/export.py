@@ -0,0 +1,203 @@
+import csv
+import io
+import re
+import zlib
+from rdflib import BNode
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser
+from config import config
+from labels import LABEL_PREDICATES
+from virtuoso import stream_graph, stream_query
+
+RDF_TYPE = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#type'
+
+EXPORT_FORMATS = {
+    'ntriples': ('application/n-triples', 'nt'),
+    'turtle': ('text/turtle', 'ttl'),
+    'csv': ('text/csv', 'csv')
+}
+NTRIPLES = EXPORT_FORMATS['ntriples'][0]
+TSV = 'text/tab-separated-values'
+XSD = 'http://www.w3.org/2001/XMLSchema#'
+
+
+def _export_pattern(class_uri, predicates):
+    """(subject pattern, predicate filter) of an export; the IRIs must be validated by the caller"""
+    subject_pattern = f"?s a <{class_uri}> ." if class_uri else ""
+    predicate_filter = ""
+    if predicates:
+        predicate_filter = f"FILTER(?p IN ({', '.join(f'<{p}>' for p in predicates)}))"
+    return subject_pattern, predicate_filter
+
+
+def _csv_predicates(predicates):
+    # Type assertions keep instances without any selected value in the output
+    return [RDF_TYPE] + LABEL_PREDICATES + list(predicates)
+
+
+def iter_graph_text(graph_uri, class_uri=None, predicates=None, mimetype=NTRIPLES):
+    """Stream the triples of a graph (or of a class' instances) as RDF text.
+
+    A whole graph is read through the Graph Store endpoint, a slice with one
+    streamed CONSTRUCT query; either is a single pass, so the cost grows
+    linearly with the graph instead of re-sorting the rest of it per chunk.
+    """
+    if not class_uri and not predicates:
+        return stream_graph(graph_uri, mimetype)
+    subject_pattern, predicate_filter = _export_pattern(class_uri, predicates)
+    return stream_query(f"""
+    CONSTRUCT {{ ?s ?p ?o }}
+    FROM <{graph_uri}>
+    WHERE {{
+      {subject_pattern}
+      ?s ?p ?o .
+      {predicate_filter}
+    }}
+    """, mimetype, origin='export_graph.construct')
+
+
+def iter_subject_ordered_text(graph_uri, class_uri=None, predicates=None):
+    """Stream the triples of a graph or slice as N-Triples, the statements of a subject together.
+
+    CONSTRUCT results come out in no particular order, so this is a SELECT
+    sorted once by subject and streamed as TSV, whose terms are written
+    like N-Triples terms.
+    """
+    subject_pattern, predicate_filter = _export_pattern(class_uri, predicates)
+    return _tsv_as_ntriples(stream_query(f"""
+    SELECT ?s ?p ?o
+    FROM <{graph_uri}>
+    WHERE {{
+      {subject_pattern}
+      ?s ?p ?o .
+      {predicate_filter}
+    }}
+    ORDER BY ?s
+    """, TSV, origin='export_graph.ordered'))
+
+
+def _tsv_term(token):
+    """N-Triples form of a TSV result term (TSV may abbreviate numbers and booleans like Turtle)"""
+    if token[:1] in ('<', '"', '_'):
+        return token
+    if token in ('true', 'false'):
+        return f'"{token}"^^<{XSD}boolean>'
+    if re.fullmatch(r'[+-]?\d+', token):
+        return f'"{token}"^^<{XSD}integer>'
+    if re.fullmatch(r'[+-]?\d*\.\d+', token):
+        return f'"{token}"^^<{XSD}decimal>'
+    return f'"{token}"^^<{XSD}double>'
+
+
+def _tsv_as_ntriples(text_chunks):
+    """Rewrite streamed ?s ?p ?o TSV rows (after the header line) as N-Triples"""
+    pending, header = '', True
+    for text in text_chunks:
+        lines = (pending + text).split('\n')
+        pending = lines.pop()
+        if header and lines:
+            lines, header = lines[1:], False
+        statements = [' '.join(_tsv_term(token) for token in line.rstrip('\r').split('\t')) + ' .\n'
+                      for line in lines if line.strip()]
+        if statements:
+            yield ''.join(statements)
+    if pending.strip() and not header:
+        yield ' '.join(_tsv_term(token) for token in pending.rstrip('\r').split('\t')) + ' .\n'
+
+
+class _TripleBatch:
+    """N-Triples parser sink collecting rdflib triples"""
+
+    def __init__(self):
+        self.triples = []
+
+    def triple(self, subject, predicate, obj):
+        self.triples.append((subject, predicate, obj))
+
+
+def iter_triple_batches(text_chunks, batch_size=None):
+    """Parse streamed N-Triples into lists of rdflib triples.
+
+    Blank node labels map to the same BNode across the whole stream.
+    """
+    batch_size = batch_size or config.export_chunk_size
+    sink = _TripleBatch()
+    parser = W3CNTriplesParser(sink)
+    bnodes = {}
+    pending = ''
+    for text in text_chunks:
+        pending += text
+        cut = pending.rfind('\n') + 1
+        if not cut:
+            continue
+        parser.parsestring(pending[:cut], bnode_context=bnodes)
+        pending = pending[cut:]
+        if len(sink.triples) >= batch_size:
+            yield sink.triples
+            sink.triples = []
+    if pending.strip():
+        parser.parsestring(pending, bnode_context=bnodes)
+    if sink.triples:
+        yield sink.triples
+
+
+def iter_graph_triples(graph_uri, batch_size=None):
+    """Lists of rdflib triples of a whole graph, read in one streamed pass"""
+    return iter_triple_batches(iter_graph_text(graph_uri), batch_size)
+
+
+def _node_text(term):
+    return f"_:{term}" if isinstance(term, BNode) else str(term)
+
+
+def iter_csv(batches, predicates):
+    """CSV rows of instance URI, label and the selected predicates.
+
+    ``batches`` must hold the statements of a subject together. Multiple
+    values of a predicate are joined with ' | '.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['uri', 'label'] + list(predicates))
+    yield buffer.getvalue()
+
+    current, values = None, {}
+
+    def write_row():
+        label = next((values[p][0] for p in LABEL_PREDICATES if p in values), '')
+        writer.writerow([current, label] + [' | '.join(values.get(p, [])) for p in predicates])
+
+    for triples in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        for subject, predicate, obj in triples:
+            subject = _node_text(subject)
+            if subject != current:
+                if current is not None:
+                    write_row()
+                current, values = subject, {}
+            values.setdefault(str(predicate), []).append(_node_text(obj))
+        yield buffer.getvalue()
+    if current is not None:
+        buffer.seek(0)
+        buffer.truncate()
+        write_row()
+        yield buffer.getvalue()
+
+
+def export_graph(graph_uri, export_format, class_uri=None, predicates=None):
+    """Stream a graph or class slice in the requested format"""
+    if export_format == 'csv':
+        predicates = list(predicates or [])
+        text = iter_subject_ordered_text(graph_uri, class_uri, predicates=_csv_predicates(predicates))
+        return iter_csv(iter_triple_batches(text), predicates)
+    return iter_graph_text(graph_uri, class_uri, mimetype=EXPORT_FORMATS[export_format][0])
+
+
+def gzip_stream(chunks):
+    """Compress a text stream on the fly (gzip container)"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,58 @@
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+# Per-graph derived artifacts (property profiles, summaries, ...) keyed by
+# graph name and artifact kind. Kept in memory alongside the upload jobs.
+graph_artifacts: Dict[str, Dict[str, dict]] = {}
+artifact_lock = threading.Lock()
+
+
+def store_artifact(graph_name: str, kind: str, data: dict):
+    """Store a computed artifact for a graph, replacing any previous version"""
+    with artifact_lock:
+        graph_artifacts.setdefault(graph_name or 'default', {})[kind] = {
+            'data': data,
+            'computedAt': datetime.now().isoformat()
+        }
+
+
+def get_artifact(graph_name: str, kind: str) -> Optional[dict]:
+    """Get a cached artifact for a graph, or None if it was never computed"""
+    with artifact_lock:
+        entry = graph_artifacts.get(graph_name or 'default', {}).get(kind)
+        return entry['data'] if entry else None
+
+
+def get_artifact_entry(graph_name: str, kind: str) -> Optional[dict]:
+    """Get a cached artifact together with its computation timestamp"""
+    with artifact_lock:
+        entry = graph_artifacts.get(graph_name or 'default', {}).get(kind)
+        return dict(entry) if entry else None
+
+
+def invalidate_graph(graph_name: str):
+    """Drop all artifacts of a graph (after its data changed)"""
+    with artifact_lock:
+        graph_artifacts.pop(graph_name or 'default', None)
+
+
+# Data versions, bumped whenever a graph is written to or deleted. The
+# catalog version changes with any graph, for responses listing all graphs.
+CATALOG = '*'
+graph_versions: Dict[str, int] = {}
+
+
+def bump_graph_version(graph_name: str) -> int:
+    """Mark a graph (and the graph catalog) as changed"""
+    with artifact_lock:
+        key = graph_name or 'default'
+        graph_versions[key] = graph_versions.get(key, 0) + 1
+        graph_versions[CATALOG] = graph_versions.get(CATALOG, 0) + 1
+        return graph_versions[key]
+
+
+def get_graph_version(graph_name: Optional[str]) -> int:
+    """Current data version of a graph, or of the catalog when graph_name is None"""
+    with artifact_lock:
+        return graph_versions.get(CATALOG if graph_name is None else (graph_name or 'default'), 0)
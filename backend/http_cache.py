@@ -0,0 +1,52 @@
+import hashlib
+import uuid
+from functools import wraps
+from flask import make_response, request
+from config import config
+from graph_artifacts import get_graph_version
+
+# Versions live in memory, so ETags must change when the process restarts
+BOOT_ID = uuid.uuid4().hex
+
+
+def compute_etag(graph_name=None):
+    """Strong ETag for the current request, derived from the graph version.
+
+    The request path, query string and the negotiated representation
+    (Accept, Accept-Encoding) are part of the tag, so each variant of a
+    resource has its own.
+    """
+    parts = [
+        BOOT_ID,
+        str(get_graph_version(graph_name)),
+        request.full_path,
+        request.headers.get('Accept', ''),
+        request.headers.get('Accept-Encoding', '')
+    ]
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def conditional_get(view):
+    """Serve 304 for unchanged graph data without running the view.
+
+    Views with a ``graph_name`` argument are keyed on that graph's version,
+    all others on the graph catalog version. Only successful responses that
+    didn't set their own Cache-Control get the ETag.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = compute_etag(kwargs.get('graph_name'))
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = config.http_cache_control
+            return response
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and 'Cache-Control' not in response.headers:
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = config.http_cache_control
+            response.vary.add('Accept')
+        return response
+
+    return wrapper
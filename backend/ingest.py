@@ -0,0 +1,76 @@
+import os
+import re
+from typing import List, Optional, Tuple
+from rdflib import Dataset, Graph
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from config import config
+
+# Upload file extensions and their rdflib parser names
+UPLOAD_FORMATS = {
+    '.ttl': 'turtle',
+    '.nt': 'nt',
+    '.nq': 'nquads',
+    '.trig': 'trig',
+    '.rdf': 'xml',
+    '.owl': 'xml',
+    '.xml': 'xml',
+    '.jsonld': 'json-ld',
+    '.json': 'json-ld'
+}
+# Formats that can carry named graphs; parsed into a Dataset and routed per graph
+QUAD_FORMATS = {'nquads', 'trig', 'json-ld'}
+
+_SCHEME = re.compile(r'^[a-z][a-z0-9+.-]*:(//)?', re.IGNORECASE)
+_UNSAFE = re.compile(r'[^A-Za-z0-9._-]+')
+
+
+def upload_format(filename: str) -> Optional[str]:
+    """rdflib format of an upload by file extension, or None if unsupported"""
+    return UPLOAD_FORMATS.get(os.path.splitext(filename.lower())[1])
+
+
+def graph_name_for(graph_iri: str, prefix: str = '') -> str:
+    """Viewer graph name for a named graph of a quad file.
+
+    Graphs already under graph_base_uri keep their name; other IRIs are
+    turned into a name without scheme and URL punctuation, so the graph
+    is stored as ``<graph_base_uri>/<name>``. ``prefix`` (the graph name
+    given with the upload) is put in front of every routed name.
+    """
+    base = f'{config.graph_base_uri}/'
+    if graph_iri.startswith(base) and '/' not in graph_iri[len(base):]:
+        name = graph_iri[len(base):]
+    else:
+        name = _UNSAFE.sub('_', _SCHEME.sub('', graph_iri)).strip('_') or 'graph'
+    return f'{prefix}-{name}' if prefix else name
+
+
+def parse_upload(data: bytes, rdf_format: str, graph_name: str) -> List[Tuple[str, Graph]]:
+    """Parse an upload into (graph name, graph) targets.
+
+    Triples outside any named graph go to ``graph_name`` (empty for the
+    default graph), as with Turtle uploads; each named graph of a quad
+    format becomes a target of its own. Targets without triples are left out.
+    """
+    if rdf_format not in QUAD_FORMATS:
+        graph = Graph()
+        graph.parse(data=data, format=rdf_format)
+        return [(graph_name, graph)] if len(graph) else []
+
+    dataset = Dataset()
+    dataset.parse(data=data, format=rdf_format)
+    targets = {}
+    for context in dataset.graphs():
+        if not len(context):
+            continue
+        if context.identifier == DATASET_DEFAULT_GRAPH_ID:
+            name = graph_name
+        else:
+            name = graph_name_for(str(context.identifier), graph_name)
+        if name in targets:
+            # Two source graphs mapped to one name: merge them
+            for triple in context:
+                targets[name].add(triple)
+        else:
+            targets[name] = context
+    return list(targets.items())
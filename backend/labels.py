@@ -0,0 +1,169 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+from config import config
+from virtuoso import query_sparql
+
+# Label predicates in order of preference
+LABEL_PREDICATES = [
+    'http://www.w3.org/2000/01/rdf-schema#label',
+    'http://www.w3.org/2004/02/skos/core#prefLabel',
+    'http://xmlns.com/foaf/0.1/name',
+    'http://schema.org/name',
+    'http://purl.org/dc/elements/1.1/title',
+    'http://purl.org/dc/terms/title'
+]
+
+LOOKUP_BATCH_SIZE = 200
+_NOT_FOUND = ''  # Cached marker for URIs without any label
+
+# IRIs are inlined into VALUES blocks, so reject anything that could break out
+# and relative references (e.g. blank node ids), which fail the whole query
+_UNSAFE_IRI_CHARS = re.compile(r'[<>"{}|^`\\\s]')
+_IRI_SCHEME = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*:')
+
+
+def is_safe_iri(uri):
+    """Whether a URI is an absolute plain IRI that can be inlined into a query"""
+    return bool(uri) and bool(_IRI_SCHEME.match(uri)) and not _UNSAFE_IRI_CHARS.search(uri)
+
+
+def uri_fragment(uri):
+    """Readable fallback label for a URI (fragment or last path segment)"""
+    if '#' in uri:
+        return uri.split('#')[-1]
+    elif '/' in uri:
+        return uri.split('/')[-1]
+    return uri
+
+
+class LabelCache:
+    """Process-wide LRU of URI labels keyed by (graph URI, URI).
+
+    Misses are resolved with batched VALUES lookups over the label
+    predicates, picking the best label by language preference first and
+    predicate preference second. URIs without a label are cached too, so
+    hub entities don't trigger a lookup on every request. Vocabulary terms
+    seeded from the class definitions are served without querying.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: 'OrderedDict[tuple, str]' = OrderedDict()
+        self.seeds: Dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def seed(self, labels: Dict[str, str]):
+        with self.lock:
+            self.seeds.update({uri: label for uri, label in labels.items() if label})
+
+    def seeded(self, uris: Iterable[str]) -> Dict[str, str]:
+        """Seeded vocabulary labels of the given URIs"""
+        with self.lock:
+            return {uri: self.seeds[uri] for uri in uris if uri in self.seeds}
+
+    def _get_cached(self, graph_uri, uris):
+        found = {}
+        missing = []
+        with self.lock:
+            for uri in uris:
+                key = (graph_uri, uri)
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    if self.entries[key] != _NOT_FOUND:
+                        found[uri] = self.entries[key]
+                elif uri in self.seeds:
+                    self.hits += 1
+                    found[uri] = self.seeds[uri]
+                else:
+                    self.misses += 1
+                    missing.append(uri)
+        return found, missing
+
+    def _store(self, graph_uri, labels):
+        with self.lock:
+            for uri, label in labels.items():
+                self.entries[(graph_uri, uri)] = label
+                self.entries.move_to_end((graph_uri, uri))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, graph_uri: Optional[str] = None):
+        with self.lock:
+            if graph_uri is None:
+                self.entries.clear()
+            else:
+                for key in [key for key in self.entries if key[0] == graph_uri]:
+                    del self.entries[key]
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'maxEntries': self.max_entries,
+                'seeded': len(self.seeds),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def resolve(self, graph_uri: str, uris: Iterable[str]) -> Dict[str, str]:
+        """Return the labels of the given URIs (URIs without a label are omitted)"""
+        uris = [uri for uri in dict.fromkeys(uris) if is_safe_iri(uri)]
+        found, missing = self._get_cached(graph_uri, uris)
+
+        for start in range(0, len(missing), LOOKUP_BATCH_SIZE):
+            batch = missing[start:start + LOOKUP_BATCH_SIZE]
+            fetched = _fetch_labels(graph_uri, batch)
+            if fetched is None:
+                continue  # Lookup failed - don't cache anything for this batch
+            found.update(fetched)
+            self._store(graph_uri, {uri: fetched.get(uri, _NOT_FOUND) for uri in batch})
+
+        return found
+
+
+def language_rank(lang):
+    preferences = config.label_languages
+    if lang in preferences:
+        return preferences.index(lang)
+    return len(preferences)
+
+
+def _fetch_labels(graph_uri, uris):
+    """Fetch the best label of each URI with one VALUES query"""
+    predicates = ', '.join(f'<{p}>' for p in LABEL_PREDICATES)
+    values = ' '.join(f'<{uri}>' for uri in uris)
+    query = f"""
+    SELECT ?uri ?predicate ?label
+    FROM <{graph_uri}>
+    WHERE {{
+        VALUES ?uri {{ {values} }}
+        ?uri ?predicate ?label .
+        FILTER(?predicate IN ({predicates}))
+    }}
+    """
+    results = query_sparql(query, origin='resolve_labels.fetch')
+    if results is None:
+        return None
+
+    best = {}
+    for binding in results:
+        uri = binding['uri']['value']
+        label = binding['label']
+        rank = (language_rank(label.get('xml:lang', '')),
+                LABEL_PREDICATES.index(binding['predicate']['value']))
+        if uri not in best or rank < best[uri][0]:
+            best[uri] = (rank, label['value'])
+    return {uri: label for uri, (_, label) in best.items()}
+
+
+label_cache = LabelCache(config.label_cache_size)
+
+
+def resolve_labels(graph_uri: str, uris: Iterable[str]) -> Dict[str, str]:
+    """Resolve labels through the shared cache"""
+    return label_cache.resolve(graph_uri, uris)
@@ -0,0 +1,198 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from config import config
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; clients fall back to their own layout
+    np = None
+
+# Ideal edge length in client pixels (matches the cose idealEdgeLength)
+EDGE_LENGTH = 100.0
+# Rows of the pairwise repulsion computed at once; bounds memory to
+# three REPULSION_CHUNK x n float32 matrices however large the neighborhood is
+REPULSION_CHUNK = 1024
+# Simulation steps for a fresh layout; large graphs get proportionally fewer
+MAX_ITERATIONS = 150
+MIN_ITERATIONS = 40
+# Pull towards the center; balances the repulsion at a radius of about k * sqrt(n / GRAVITY)
+GRAVITY = 3.0
+
+
+def layout_available():
+    return np is not None
+
+
+def node_set_key(node_ids, edges, fixed=None):
+    """Hash identifying a layout input: its nodes, edges and already placed nodes"""
+    digest = hashlib.sha1()
+    for node_id in sorted(node_ids):
+        digest.update(node_id.encode('utf-8'))
+        digest.update(b'\n')
+    digest.update(b'\x00')
+    for source, target in sorted(edges):
+        digest.update(f"{source}\t{target}\n".encode('utf-8'))
+    digest.update(b'\x00')
+    for node_id, (x, y) in sorted((fixed or {}).items()):
+        digest.update(f"{node_id}\t{round(x)}\t{round(y)}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _repulsion(positions, k, rows):
+    """Fruchterman-Reingold repulsion k²/d on the nodes in ``rows`` from all nodes.
+
+    Only movable nodes need it, so placing a few new nodes among many
+    fixed ones costs rows x n instead of n x n; other rows stay zero.
+    Coordinates are split and computed in float32: the pairwise matrices
+    dominate the cost and the extra precision doesn't change the layout.
+    """
+    x = positions[:, 0].astype(np.float32)
+    y = positions[:, 1].astype(np.float32)
+    strength = np.float32(k * k)
+    displacement = np.zeros_like(positions)
+    for start in range(0, len(rows), REPULSION_CHUNK):
+        chunk = rows[start:start + REPULSION_CHUNK]
+        dx = x[chunk, None] - x[None, :]
+        dy = y[chunk, None] - y[None, :]
+        weight = dx * dx
+        weight += dy * dy
+        np.maximum(weight, np.float32(0.01), out=weight)
+        np.divide(strength, weight, out=weight)
+        displacement[chunk, 0] = np.einsum('ij,ij->i', dx, weight)
+        displacement[chunk, 1] = np.einsum('ij,ij->i', dy, weight)
+    return displacement
+
+
+def force_layout(node_ids, edges, fixed=None, iterations=None, seed=0):
+    """Force-directed layout of a node-link graph.
+
+    Args:
+        node_ids: Node identifiers
+        edges: (source, target) pairs of node identifiers
+        fixed: Optional {node_id: (x, y)} of nodes already on screen; they
+            keep their positions and new nodes start next to their placed
+            neighbors, so expanding a node doesn't reshuffle the view
+        iterations: Simulation steps (fewer are needed when most nodes are fixed)
+        seed: Seed of the initial placement, for stable results
+
+    Returns:
+        {node_id: (x, y)} for every node
+    """
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    fixed = {node_id: position for node_id, position in (fixed or {}).items() if node_id in index}
+    n = len(node_ids)
+    if n == 0:
+        return {}
+
+    pairs = np.array([(index[source], index[target]) for source, target in edges
+                      if source in index and target in index and source != target], dtype=np.int64).reshape(-1, 2)
+    rng = np.random.default_rng(seed)
+    pinned = np.zeros(n, dtype=bool)
+    positions = np.zeros((n, 2))
+    for node_id, (x, y) in fixed.items():
+        positions[index[node_id]] = (x, y)
+        pinned[index[node_id]] = True
+
+    # Initial placement: near the placed neighbors, else on a disc around the center
+    center = positions[pinned].mean(axis=0) if pinned.any() else np.zeros(2)
+    radius = EDGE_LENGTH * max(1.0, np.sqrt(n) / 2)
+    unplaced = [i for i in range(n) if not pinned[i]]
+    placed = pinned.copy()
+    for _ in range(3):
+        # A few passes so chains of new nodes grow outwards from placed ones
+        for i in unplaced:
+            if placed[i] and not pinned[i]:
+                continue
+            neighbors = np.concatenate([pairs[pairs[:, 0] == i, 1], pairs[pairs[:, 1] == i, 0]])
+            neighbors = neighbors[placed[neighbors]]
+            if len(neighbors):
+                angle = rng.uniform(0, 2 * np.pi)
+                positions[i] = positions[neighbors].mean(axis=0) + EDGE_LENGTH * np.array([np.cos(angle), np.sin(angle)])
+                placed[i] = True
+    for i in unplaced:
+        if not placed[i]:
+            angle, distance = rng.uniform(0, 2 * np.pi), radius * np.sqrt(rng.uniform())
+            positions[i] = center + distance * np.array([np.cos(angle), np.sin(angle)])
+
+    movable = ~pinned
+    movable_rows = np.flatnonzero(movable)
+    if not movable.any():
+        return {node_id: tuple(positions[i]) for i, node_id in enumerate(node_ids)}
+
+    if iterations is None:
+        iterations = max(MIN_ITERATIONS, min(MAX_ITERATIONS, MAX_ITERATIONS * 500 // n))
+        if pinned.any():
+            iterations = MIN_ITERATIONS
+    k = EDGE_LENGTH
+    temperature = radius / 4
+    cooling = temperature / (iterations + 1)
+    for _ in range(iterations):
+        displacement = _repulsion(positions, k, movable_rows)
+        if len(pairs):
+            delta = positions[pairs[:, 0]] - positions[pairs[:, 1]]
+            distance = np.maximum(np.sqrt((delta ** 2).sum(axis=1)), 0.01)
+            pull = delta * (distance / k)[:, None]
+            np.subtract.at(displacement, pairs[:, 0], pull)
+            np.add.at(displacement, pairs[:, 1], pull)
+        # Weak gravity keeps disconnected components from drifting apart
+        displacement -= GRAVITY * (positions - center)
+        length = np.maximum(np.sqrt((displacement ** 2).sum(axis=1)), 0.01)
+        step = displacement * (np.minimum(length, temperature) / length)[:, None]
+        positions[movable] += step[movable]
+        temperature -= cooling
+
+    return {node_id: (float(positions[i, 0]), float(positions[i, 1])) for i, node_id in enumerate(node_ids)}
+
+
+class LayoutCache:
+    """LRU cache of computed layouts keyed by (graph, seed entity, node set)"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            positions = self.entries.get(key)
+            if positions is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return positions
+
+    def put(self, key, positions):
+        with self.lock:
+            self.entries[key] = positions
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, graph_name):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == graph_name]:
+                del self.entries[key]
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+
+layout_cache = LayoutCache(config.layout_cache_size)
+
+
+def compute_layout(graph_name, seed_entity, node_ids, edges, fixed=None):
+    """Cached layout as {node_id: {'x', 'y'}}, rounded for the wire"""
+    fixed = fixed or {}
+    key = (graph_name, seed_entity, node_set_key(node_ids, edges, fixed))
+    positions = layout_cache.get(key)
+    if positions is None:
+        seed = int(key[2][:8], 16)
+        layout = force_layout(list(node_ids), list(edges), fixed, seed=seed)
+        positions = {node_id: {'x': round(x, 1), 'y': round(y, 1)} for node_id, (x, y) in layout.items()}
+        layout_cache.put(key, positions)
+    return positions
@@ -0,0 +1,152 @@
+import os
+import re
+import time
+from contextlib import contextmanager
+
+# prometheus_client is optional; without it instrumentation is a no-op and
+# /metrics reports that metrics are unavailable
+try:
+    from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge,
+                                   Histogram, generate_latest, multiprocess)
+except ImportError:
+    Counter = Gauge = Histogram = None
+
+# With several worker processes each one writes its samples to
+# PROMETHEUS_MULTIPROC_DIR and a scrape aggregates the directory
+MULTIPROCESS = bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+
+_QUERY_FORM = re.compile(r'\b(SELECT|ASK|CONSTRUCT|DESCRIBE)\b', re.IGNORECASE)
+_UPDATE_FORM = re.compile(r'\b(INSERT|DELETE|CLEAR|DROP|LOAD|CREATE|COPY|MOVE|ADD)\b', re.IGNORECASE)
+
+LATENCY_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = tuple(1024 * 4 ** exponent for exponent in range(10))  # 1KB .. 256MB
+RATE_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000)
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+
+def _histogram(name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+    if Histogram is None:
+        return _NoopMetric()
+    return Histogram(name, documentation, labels, buckets=buckets)
+
+
+def _counter(name, documentation, labels=()):
+    if Counter is None:
+        return _NoopMetric()
+    return Counter(name, documentation, labels)
+
+
+def _gauge(name, documentation):
+    if Gauge is None:
+        return _NoopMetric()
+    # Job state is per process, so the live processes' values are summed
+    return Gauge(name, documentation, multiprocess_mode='livesum')
+
+
+http_request_duration = _histogram(
+    'kgviewer_http_request_duration_seconds', 'HTTP request latency by route',
+    ('method', 'route', 'status'))
+
+sparql_duration = _histogram(
+    'kgviewer_sparql_duration_seconds', 'SPARQL request latency by query kind',
+    ('kind', 'outcome'))
+sparql_response_bytes = _histogram(
+    'kgviewer_sparql_response_bytes', 'SPARQL response payload size by query kind',
+    ('kind',), buckets=SIZE_BUCKETS)
+
+rdf_parse_duration = _histogram(
+    'kgviewer_rdf_parse_seconds', 'Time to parse an uploaded RDF file', ('format',))
+upload_serialize_duration = _histogram(
+    'kgviewer_upload_batch_serialize_seconds', 'Time to serialize one upload batch')
+upload_store_duration = _histogram(
+    'kgviewer_upload_batch_store_seconds', 'Time to store one upload batch in Virtuoso', ('outcome',))
+upload_triples_per_second = _histogram(
+    'kgviewer_upload_batch_triples_per_second', 'Ingest throughput of one upload batch',
+    buckets=RATE_BUCKETS)
+upload_batch_bytes = _histogram(
+    'kgviewer_upload_batch_bytes', 'Serialized size of one upload batch', buckets=SIZE_BUCKETS)
+uploaded_triples = _counter(
+    'kgviewer_uploaded_triples_total', 'Triples stored in Virtuoso by uploads')
+
+upload_pending_batches = _gauge(
+    'kgviewer_upload_pending_batches', 'Batches still to be stored by running uploads')
+upload_active_jobs = _gauge(
+    'kgviewer_upload_active_jobs', 'Upload jobs currently processing')
+upload_job_store_size = _gauge(
+    'kgviewer_upload_job_store_size', 'Upload jobs kept in the in-memory job store')
+
+
+def query_kind(query):
+    """Query form used as the kind label: select, ask, construct, describe or update"""
+    body = re.sub(r'^\s*(?:(?:PREFIX|BASE)\b[^\n]*\n\s*)*', '', query, flags=re.IGNORECASE)
+    update = _UPDATE_FORM.match(body)
+    if update:
+        return 'update'
+    form = _QUERY_FORM.search(body)
+    return form.group(1).lower() if form else 'other'
+
+
+def observe_sparql(query, seconds, size, success):
+    kind = query_kind(query)
+    sparql_duration.labels(kind, 'success' if success else 'error').observe(seconds)
+    if success:
+        sparql_response_bytes.labels(kind).observe(size)
+
+
+def observe_request(method, route, status, seconds):
+    http_request_duration.labels(method, route, str(status)).observe(seconds)
+
+
+def observe_batch(triples, serialize_seconds, store_seconds, success, size=None):
+    upload_serialize_duration.observe(serialize_seconds)
+    if size is not None:
+        upload_batch_bytes.observe(size)
+    upload_store_duration.labels('success' if success else 'error').observe(store_seconds)
+    if success:
+        uploaded_triples.inc(triples)
+        if store_seconds > 0:
+            upload_triples_per_second.observe(triples / (serialize_seconds + store_seconds))
+
+
+def update_job_gauges(jobs):
+    """Refresh the upload gauges from the job store (call with the job lock held)"""
+    active = [job for job in jobs if job.status == 'processing']
+    upload_active_jobs.set(len(active))
+    upload_pending_batches.set(sum(max(job.total_batches - job.current_batch, 0) for job in active))
+    upload_job_store_size.set(len(jobs))
+
+
+@contextmanager
+def timed(histogram):
+    """Observe the duration of a block on a histogram (or labelled child)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start)
+
+
+def metrics_available():
+    return Histogram is not None
+
+
+def render_metrics():
+    """Exposition of all metrics as (body, content type)"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,334 @@
+import heapq
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from rdflib import BNode, Literal
+from config import config
+from export import iter_graph_triples
+from labels import LABEL_PREDICATES, language_rank
+
+RDF_TYPE = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#type'
+_LABEL_RANK = {predicate: index for index, predicate in enumerate(LABEL_PREDICATES)}
+# Rough per-entry overheads used for the memory estimate
+_LINK_BYTES = 2 * 40   # one packed int in the outgoing and one in the incoming set
+_LITERAL_BYTES = 120   # tuple plus set slot
+_TERM_BYTES = 100      # dict entry, list slot and str header
+
+
+class GraphMirror:
+    """Dictionary-encoded in-memory copy of one graph.
+
+    IRIs and blank nodes are interned to integer ids; links are kept as
+    packed ``predicate << 32 | node`` ints in per-node outgoing and incoming
+    sets, literals as (predicate, value, datatype, language) tuples per
+    subject, and rdf:type as per-class instance sets. That is enough to
+    answer the viewer's neighborhood, literal and instance-listing queries
+    without a round trip.
+    """
+
+    def __init__(self, graph_name):
+        self.graph_name = graph_name
+        self.ids: Dict[str, int] = {}
+        self.terms = []
+        self.outgoing: Dict[int, set] = {}
+        self.incoming: Dict[int, set] = {}
+        self.literals: Dict[int, set] = {}
+        self.instances: Dict[int, set] = {}
+        self.sorted_instances: Dict[int, list] = {}
+        self.triples = 0
+        self.size_bytes = sys.getsizeof(self)
+        self.lock = threading.RLock()
+        self.loaded_at = time.time()
+
+    def _id(self, term):
+        term_id = self.ids.get(term)
+        if term_id is None:
+            term_id = len(self.terms)
+            self.ids[term] = term_id
+            self.terms.append(term)
+            self.size_bytes += len(term) + _TERM_BYTES
+        return term_id
+
+    def add(self, subject, predicate, obj):
+        """Add one triple given as node strings, or ``obj`` as (value, datatype, lang) for literals"""
+        with self.lock:
+            s, p = self._id(subject), self._id(predicate)
+            if isinstance(obj, tuple):
+                entries = self.literals.setdefault(s, set())
+                entry = (p,) + obj
+                if entry not in entries:
+                    entries.add(entry)
+                    self.triples += 1
+                    self.size_bytes += len(obj[0]) + _LITERAL_BYTES
+                return
+            o = self._id(obj)
+            links = self.outgoing.setdefault(s, set())
+            if (p << 32 | o) in links:
+                return
+            links.add(p << 32 | o)
+            self.incoming.setdefault(o, set()).add(p << 32 | s)
+            self.triples += 1
+            self.size_bytes += _LINK_BYTES
+            if predicate == RDF_TYPE:
+                self.instances.setdefault(o, set()).add(s)
+                self.sorted_instances.pop(o, None)
+
+    def add_rdflib(self, triples):
+        """Add rdflib triples (an upload, or a batch of the graph read from Virtuoso)"""
+        for subject, predicate, obj in triples:
+            self.add(_node_key(subject), str(predicate), _object_key(obj))
+
+    # Queries
+
+    def neighborhood(self, uri, limit):
+        """Links from and to a node as (subject, predicate, object) strings"""
+        with self.lock:
+            node = self.ids.get(uri)
+            if node is None:
+                return []
+            rows = []
+            for packed in self.outgoing.get(node, ()):
+                if len(rows) >= limit:
+                    return rows
+                rows.append((uri, self.terms[packed >> 32], self.terms[packed & 0xFFFFFFFF]))
+            for packed in self.incoming.get(node, ()):
+                if len(rows) >= limit:
+                    return rows
+                rows.append((self.terms[packed & 0xFFFFFFFF], self.terms[packed >> 32], uri))
+            return rows
+
+    def predicate_counts(self, uri):
+        """Links from and to a node with IRI neighbors, counted per (direction, predicate)"""
+        with self.lock:
+            node = self.ids.get(uri)
+            counts = {}
+            if node is None:
+                return counts
+            for direction, links in (('out', self.outgoing), ('in', self.incoming)):
+                for packed in links.get(node, ()):
+                    if not self.terms[packed & 0xFFFFFFFF].startswith('_:'):
+                        key = (direction, self.terms[packed >> 32])
+                        counts[key] = counts.get(key, 0) + 1
+            return counts
+
+    def neighbors(self, uri, direction, predicate, after, limit):
+        """IRI neighbors of a node via one predicate, the first ``limit`` after ``after`` in IRI order"""
+        with self.lock:
+            node, predicate_id = self.ids.get(uri), self.ids.get(predicate)
+            if node is None or predicate_id is None:
+                return []
+            links = (self.outgoing if direction == 'out' else self.incoming).get(node, ())
+            candidates = (self.terms[packed & 0xFFFFFFFF] for packed in links if packed >> 32 == predicate_id)
+            return heapq.nsmallest(limit, (term for term in candidates
+                                           if not term.startswith('_:') and (after is None or term > after)))
+
+    def node_literals(self, uri):
+        """Literal properties of a node as (predicate, value, datatype, lang), ordered by predicate"""
+        with self.lock:
+            node = self.ids.get(uri)
+            if node is None:
+                return []
+            return sorted(((self.terms[p], value, datatype, lang)
+                           for p, value, datatype, lang in self.literals.get(node, ())),
+                          key=lambda literal: (literal[0], literal[1]))
+
+    def labels(self, uris):
+        """Best label per URI, by language preference first and predicate preference second"""
+        found = {}
+        with self.lock:
+            for uri in uris:
+                node = self.ids.get(uri)
+                best = None
+                for p, value, _, lang in self.literals.get(node, ()) if node is not None else ():
+                    rank = _LABEL_RANK.get(self.terms[p])
+                    if rank is None:
+                        continue
+                    key = (language_rank(lang or ''), rank)
+                    if best is None or key < best[0]:
+                        best = (key, value)
+                if best:
+                    found[uri] = best[1]
+        return found
+
+    def class_instances(self, class_uri, offset, limit, filter_text=''):
+        """A page of a class' instances ordered by URI, and the total count"""
+        with self.lock:
+            class_id = self.ids.get(class_uri)
+            if class_id is None:
+                return [], 0
+            ordered = self.sorted_instances.get(class_id)
+            if ordered is None:
+                ordered = sorted(self.terms[node] for node in self.instances.get(class_id, ()))
+                self.sorted_instances[class_id] = ordered
+            if filter_text:
+                needle = filter_text.lower()
+                ordered = [uri for uri in ordered if needle in uri.lower() or any(
+                    needle in value.lower() for p, value, _, _ in self.literals.get(self.ids[uri], ())
+                    if self.terms[p] in _LABEL_RANK)]
+            return ordered[offset:offset + limit], len(ordered)
+
+    def status(self):
+        with self.lock:
+            return {
+                'graphName': self.graph_name,
+                'triples': self.triples,
+                'terms': len(self.terms),
+                'estimatedBytes': self.size_bytes,
+                'loadedAt': self.loaded_at
+            }
+
+
+def _node_key(term):
+    # Blank nodes keep their parser ids; they are only meaningful inside the mirror
+    return f"_:{term}" if isinstance(term, BNode) else str(term)
+
+
+def _object_key(term):
+    if isinstance(term, Literal):
+        return (str(term), str(term.datatype) if term.datatype else None, term.language)
+    return _node_key(term)
+
+
+class MirrorManager:
+    """Keeps mirrors of the hot graphs (HOT_GRAPHS) within a memory budget.
+
+    A hot graph is mirrored on first access, loaded from Virtuoso in the
+    background, and updated in place by uploads through this app. Mirrors
+    are dropped when their graph is deleted or an upload fails, and the
+    least recently used ones are evicted when the budget is exceeded.
+    Callers get ``None`` whenever no current mirror exists and query
+    Virtuoso instead.
+    """
+
+    def __init__(self, hot_graphs, budget_bytes):
+        self.hot_graphs = set(hot_graphs)
+        self.budget_bytes = budget_bytes
+        self.mirrors: 'OrderedDict[str, GraphMirror]' = OrderedDict()
+        self.writing = set()    # graphs with an upload in progress
+        self.loading = set()
+        self.generations: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.write_done = threading.Condition(self.lock)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def is_hot(self, graph_name):
+        graph_name = graph_name or 'default'
+        return '*' in self.hot_graphs or graph_name in self.hot_graphs
+
+    def get(self, graph_name) -> Optional[GraphMirror]:
+        """The current mirror of a graph, or None (a hot graph then starts loading)"""
+        graph_name = graph_name or 'default'
+        if not self.hot_graphs:
+            return None
+        with self.lock:
+            mirror = self.mirrors.get(graph_name)
+            if mirror is not None and graph_name not in self.writing:
+                self.mirrors.move_to_end(graph_name)
+                self.hits += 1
+                return mirror
+            self.misses += 1
+            start = (mirror is None and graph_name not in self.loading and
+                     graph_name not in self.writing and self.is_hot(graph_name))
+            if start:
+                self.loading.add(graph_name)
+        if start:
+            threading.Thread(target=self._load, args=(graph_name,), daemon=True).start()
+        return None
+
+    def _load(self, graph_name):
+        while True:
+            # A graph being written is read once the write ended, not half way
+            with self.write_done:
+                while graph_name in self.writing:
+                    self.write_done.wait()
+                generation = self.generations.get(graph_name, 0)
+            mirror = GraphMirror(graph_name)
+            try:
+                for triples in iter_graph_triples(config.get_graph_uri(graph_name)):
+                    mirror.add_rdflib(triples)
+                    if mirror.size_bytes > self.budget_bytes:
+                        print(f"Graph {graph_name} exceeds the mirror budget; serving it from Virtuoso")
+                        with self.lock:
+                            self.loading.discard(graph_name)
+                        return
+            except Exception as e:
+                print(f"Failed to mirror graph {graph_name}: {e}")
+                with self.lock:
+                    self.loading.discard(graph_name)
+                return
+            with self.lock:
+                if self.generations.get(graph_name, 0) != generation or graph_name in self.writing:
+                    continue  # Written to while loading - read it again
+                self.loading.discard(graph_name)
+                self._install(graph_name, mirror)
+            print(f"Mirrored graph {graph_name}: {mirror.triples} triples, ~{mirror.size_bytes // 1024} KiB")
+            return
+
+    def _install(self, graph_name, mirror):
+        self.mirrors[graph_name] = mirror
+        self.mirrors.move_to_end(graph_name)
+        self._evict()
+
+    def _evict(self):
+        while sum(mirror.size_bytes for mirror in self.mirrors.values()) > self.budget_bytes and self.mirrors:
+            evicted, _ = self.mirrors.popitem(last=False)
+            self.evictions += 1
+            print(f"Evicted mirror of graph {evicted}")
+
+    def begin_write(self, graph_name):
+        """An upload started: stop serving the mirror until it is applied"""
+        graph_name = graph_name or 'default'
+        with self.lock:
+            self.writing.add(graph_name)
+            self.generations[graph_name] = self.generations.get(graph_name, 0) + 1
+
+    def _end_write(self, graph_name):
+        """Called with the lock held; a load that overlapped the write reads the graph again"""
+        self.writing.discard(graph_name)
+        self.generations[graph_name] = self.generations.get(graph_name, 0) + 1
+        self.write_done.notify_all()
+
+    def apply_upload(self, graph_name, rdf_graph):
+        """An upload finished: add its triples to the mirror (or mirror the graph if it is hot)"""
+        graph_name = graph_name or 'default'
+        with self.lock:
+            mirror = self.mirrors.get(graph_name)
+        if mirror is not None:
+            mirror.add_rdflib(rdf_graph)
+            with self.lock:
+                self._end_write(graph_name)
+                self._evict()
+            return
+        with self.lock:
+            self._end_write(graph_name)
+        if self.is_hot(graph_name):
+            self.get(graph_name)
+
+    def drop(self, graph_name):
+        """The graph was deleted or a write failed half way: forget its mirror"""
+        graph_name = graph_name or 'default'
+        with self.lock:
+            self.mirrors.pop(graph_name, None)
+            self._end_write(graph_name)
+
+    def status(self):
+        with self.lock:
+            mirrors = list(self.mirrors.values())
+            status = {
+                'hotGraphs': sorted(self.hot_graphs),
+                'budgetBytes': self.budget_bytes,
+                'loading': sorted(self.loading),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+        status['mirrors'] = [mirror.status() for mirror in mirrors]
+        status['usedBytes'] = sum(mirror['estimatedBytes'] for mirror in status['mirrors'])
+        return status
+
+
+graph_mirrors = MirrorManager(config.hot_graphs, config.mirror_memory_mb * 1024 * 1024)
@@ -0,0 +1,174 @@
+import base64
+import json
+from concurrent.futures import ThreadPoolExecutor
+from virtuoso import query_sparql
+
+DIRECTIONS = ('out', 'in')
+# Neighbors returned per group in a summary, and at most per page
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 500
+# Groups (direction, predicate) that get a first page in a summary; the rest only report counts
+DEFAULT_MAX_GROUPS = 25
+# Concurrent first-page queries of one summary
+PAGE_WORKERS = 4
+
+_page_executor = ThreadPoolExecutor(max_workers=PAGE_WORKERS, thread_name_prefix='neighborhood')
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def encode_cursor(direction, predicate, after=None):
+    """Opaque continuation token of a group page (``after`` is the last neighbor already returned)"""
+    raw = json.dumps([direction, predicate, after], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """(direction, predicate, after) of a continuation token; raises ValueError if it is malformed"""
+    try:
+        direction, predicate, after = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Invalid cursor: {e}')
+    if direction not in DIRECTIONS or not isinstance(predicate, str) or not isinstance(after, (str, type(None))):
+        raise ValueError('Invalid cursor')
+    return direction, predicate, after
+
+
+def _link_pattern(entity_uri, direction, predicate='?predicate'):
+    if direction == 'out':
+        return f'<{entity_uri}> {predicate} ?neighbor .'
+    return f'?neighbor {predicate} <{entity_uri}> .'
+
+
+def predicate_groups(graph_uri, entity_uri, mirror=None):
+    """Link counts of an entity per (direction, predicate), largest first.
+
+    Only IRI neighbors are counted: blank nodes can't be paged by a stable
+    key and literals are listed separately by the literals endpoint.
+    """
+    if mirror:
+        counts = mirror.predicate_counts(entity_uri)
+    else:
+        results = query_sparql(f"""
+        SELECT ?direction ?predicate (COUNT(*) AS ?count)
+        FROM <{graph_uri}>
+        WHERE {{
+          {{ {_link_pattern(entity_uri, 'out')} BIND("out" AS ?direction) }}
+          UNION
+          {{ {_link_pattern(entity_uri, 'in')} BIND("in" AS ?direction) }}
+          FILTER(isIRI(?neighbor))
+        }}
+        GROUP BY ?direction ?predicate
+        """, origin='neighborhood.counts')
+        if results is None:
+            raise RuntimeError("Neighborhood count query failed")
+        counts = {(binding['direction']['value'], binding['predicate']['value']): int(binding['count']['value'])
+                  for binding in results}
+    groups = [{'direction': direction, 'predicate': predicate, 'count': count}
+              for (direction, predicate), count in counts.items()]
+    groups.sort(key=lambda group: (-group['count'], group['direction'], group['predicate']))
+    return groups
+
+
+def neighbor_page(graph_uri, entity_uri, direction, predicate, after=None, limit=DEFAULT_PAGE_SIZE, mirror=None):
+    """Neighbors linked via one predicate, ordered by IRI after ``after``; returns (neighbors, next cursor)"""
+    if mirror:
+        neighbors = mirror.neighbors(entity_uri, direction, predicate, after, limit + 1)
+    else:
+        keyset = f'FILTER(STR(?neighbor) > "{_escape(after)}")' if after is not None else ''
+        results = query_sparql(f"""
+        SELECT ?neighbor
+        FROM <{graph_uri}>
+        WHERE {{
+          {_link_pattern(entity_uri, direction, f'<{predicate}>')}
+          FILTER(isIRI(?neighbor))
+          {keyset}
+        }}
+        ORDER BY STR(?neighbor)
+        LIMIT {limit + 1}
+        """, origin='neighborhood.page')
+        if results is None:
+            raise RuntimeError("Neighborhood page query failed")
+        neighbors = [binding['neighbor']['value'] for binding in results]
+    # One row beyond the page tells whether there is a next one
+    if len(neighbors) > limit:
+        neighbors = neighbors[:limit]
+        return neighbors, encode_cursor(direction, predicate, neighbors[-1])
+    return neighbors, None
+
+
+def _small_group_pages(graph_uri, entity_uri, direction, predicates):
+    """All neighbors of groups that fit into one page, for one direction in a single query"""
+    pages = {predicate: [] for predicate in predicates}
+    results = query_sparql(f"""
+    SELECT ?predicate ?neighbor
+    FROM <{graph_uri}>
+    WHERE {{
+      VALUES ?predicate {{ {' '.join(f'<{predicate}>' for predicate in predicates)} }}
+      {_link_pattern(entity_uri, direction)}
+      FILTER(isIRI(?neighbor))
+    }}
+    ORDER BY ?predicate STR(?neighbor)
+    """, origin='neighborhood.small_groups')
+    if results is None:
+        raise RuntimeError("Neighborhood page query failed")
+    for binding in results:
+        pages[binding['predicate']['value']].append(binding['neighbor']['value'])
+    return pages
+
+
+def neighborhood_summary(graph_uri, entity_uri, page_size=DEFAULT_PAGE_SIZE, max_groups=DEFAULT_MAX_GROUPS,
+                         mirror=None):
+    """Per-predicate summary of an entity's links for hub-sized neighborhoods.
+
+    Every (direction, predicate) group reports its total link count; the
+    ``max_groups`` largest also get their first ``page_size`` neighbors.
+    Groups that fit into one page are read together with one query per
+    direction, larger groups with a keyset page query each, so a large
+    group never sends more than a page. Groups with more neighbors
+    carry a ``nextCursor`` for the neighbors endpoint. Results are ordered
+    by IRI and therefore stable between requests.
+
+    Returns the groups and the links of their first pages as
+    (subject, predicate, object).
+    """
+    groups = predicate_groups(graph_uri, entity_uri, mirror)
+    paged = groups[:max_groups]
+
+    pages = {}  # (direction, predicate) -> (neighbors, next cursor)
+    if mirror:
+        for group in paged:
+            pages[(group['direction'], group['predicate'])] = neighbor_page(
+                graph_uri, entity_uri, group['direction'], group['predicate'], limit=page_size, mirror=mirror)
+    else:
+        small_futures = {}
+        for direction in DIRECTIONS:
+            small = [group['predicate'] for group in paged
+                     if group['direction'] == direction and group['count'] <= page_size]
+            if small:
+                small_futures[direction] = _page_executor.submit(
+                    _small_group_pages, graph_uri, entity_uri, direction, small)
+        page_futures = {(group['direction'], group['predicate']): _page_executor.submit(
+            neighbor_page, graph_uri, entity_uri, group['direction'], group['predicate'], limit=page_size)
+            for group in paged if group['count'] > page_size}
+        for direction, future in small_futures.items():
+            for predicate, neighbors in future.result().items():
+                pages[(direction, predicate)] = (neighbors, None)
+        for key, future in page_futures.items():
+            pages[key] = future.result()
+
+    links = []
+    for group in groups:
+        neighbors, next_cursor = pages.get((group['direction'], group['predicate']),
+                                           ([], encode_cursor(group['direction'], group['predicate'])))
+        group['returned'] = len(neighbors)
+        group['nextCursor'] = next_cursor
+        links.extend(link(entity_uri, group['direction'], group['predicate'], neighbor) for neighbor in neighbors)
+    return groups, links
+
+
+def link(entity_uri, direction, predicate, neighbor):
+    """A group neighbor as a (subject, predicate, object) link"""
+    return (entity_uri, predicate, neighbor) if direction == 'out' else (neighbor, predicate, entity_uri)
@@ -0,0 +1,251 @@
+from config import config
+from entity_details import MAX_BATCH_SIZE, is_safe_iri
+from labels import resolve_labels, uri_fragment
+from virtuoso import query_sparql
+
+# Paths enumerated per meeting node before giving up on finding more
+MAX_PATHS_PER_MEETING = 100
+
+
+def _values(uris):
+    return ' '.join(f'<{uri}>' for uri in uris)
+
+
+def _predicate_filter(allow, deny):
+    clauses = []
+    if allow:
+        clauses.append(f"FILTER(?predicate IN ({', '.join(f'<{p}>' for p in allow)}))")
+    if deny:
+        clauses.append(f"FILTER(?predicate NOT IN ({', '.join(f'<{p}>' for p in deny)}))")
+    return '\n        '.join(clauses)
+
+
+class _Search:
+    """One direction of the bidirectional search: BFS depth and predecessors per node"""
+
+    def __init__(self, root):
+        self.depth = {root: 0}
+        self.parents = {root: []}  # node -> [(previous node, (s, p, o))] on shortest routes
+        self.frontier = [root]
+
+    def paths_to(self, node, limit):
+        """Up to ``limit`` shortest routes from the root to ``node`` as edge lists"""
+        if limit <= 0:
+            return []
+        if not self.parents[node]:
+            return [[]]
+        routes = []
+        for previous, edge in self.parents[node]:
+            for route in self.paths_to(previous, limit - len(routes)):
+                routes.append(route + [edge])
+                if len(routes) >= limit:
+                    return routes
+        return routes
+
+
+class PathFinder:
+    """Bidirectional BFS between two entities over SPARQL.
+
+    Each level expands the smaller frontier with two batched queries per
+    chunk of frontier nodes: a degree count, so hub nodes above
+    ``max_fanout`` links are not expanded, and the links of the remaining
+    nodes. Links are followed in both directions, literals and blank nodes
+    are skipped. The number of round trips is bounded by the hop limit and
+    the frontier size, not by the size of the graph.
+    """
+
+    def __init__(self, graph_uri, allow=None, deny=None, max_fanout=None, max_frontier=None):
+        self.graph_uri = graph_uri
+        self.filter = _predicate_filter(allow, deny)
+        self.max_fanout = max_fanout or config.paths_max_fanout
+        self.max_frontier = max_frontier or config.paths_max_frontier
+        self.queries = 0
+        self.hubs = set()
+        self.truncated = False
+
+    def _degrees(self, nodes):
+        query = f"""
+        SELECT ?node (COUNT(*) AS ?degree)
+        FROM <{self.graph_uri}>
+        WHERE {{
+            VALUES ?node {{ {_values(nodes)} }}
+            {{ ?node ?predicate ?neighbor . }} UNION {{ ?neighbor ?predicate ?node . }}
+            FILTER(isIRI(?neighbor))
+            {self.filter}
+        }}
+        GROUP BY ?node
+        """
+        self.queries += 1
+        results = query_sparql(query, origin='find_paths.degrees') or []
+        return {binding['node']['value']: int(binding['degree']['value']) for binding in results}
+
+    def _links(self, nodes, limit):
+        """Links of the nodes, at most ``limit`` per node (one subquery each, so hubs can't starve the rest)"""
+        per_node = '\n            UNION\n            '.join(f"""{{
+                SELECT (<{node}> AS ?node) ?predicate ?neighbor ?outgoing
+                WHERE {{
+                    {{ <{node}> ?predicate ?neighbor . BIND(true AS ?outgoing) }}
+                    UNION
+                    {{ ?neighbor ?predicate <{node}> . BIND(false AS ?outgoing) }}
+                    FILTER(isIRI(?neighbor))
+                    {self.filter}
+                }}
+                LIMIT {limit}
+            }}""" for node in nodes)
+        query = f"""
+        SELECT ?node ?predicate ?neighbor ?outgoing
+        FROM <{self.graph_uri}>
+        WHERE {{
+            {per_node}
+        }}
+        """
+        self.queries += 1
+        results = query_sparql(query, origin='find_paths.links') or []
+        links = []
+        for binding in results:
+            node = binding['node']['value']
+            predicate = binding['predicate']['value']
+            neighbor = binding['neighbor']['value']
+            outgoing = binding['outgoing']['value'] in ('true', '1')
+            links.append((node, neighbor, (node, predicate, neighbor) if outgoing else (neighbor, predicate, node)))
+        return links
+
+    def _expand(self, search, endpoints):
+        """Advance one search by a level; returns the newly reached nodes"""
+        frontier = [node for node in search.frontier if is_safe_iri(node)]
+        reached = []
+        for start in range(0, len(frontier), MAX_BATCH_SIZE):
+            chunk = frontier[start:start + MAX_BATCH_SIZE]
+            degrees = self._degrees(chunk)
+            # The endpoints themselves are always expanded, however connected
+            expandable = [node for node in chunk
+                          if node in endpoints or degrees.get(node, 0) <= self.max_fanout]
+            self.hubs.update(node for node in chunk if node not in expandable)
+            if not expandable:
+                continue
+            links = sum(degrees.get(node, 0) for node in expandable)
+            if not links:
+                continue
+            # Every node gets an equal share of the links read per level
+            limit = max(1, self.max_frontier * 4 // len(expandable))
+            chunk_links = self._links(expandable, limit)
+            returned = {}
+            for node, _, _ in chunk_links:
+                returned[node] = returned.get(node, 0) + 1
+            if any(returned.get(node, 0) == limit < degrees.get(node, 0) for node in expandable):
+                self.truncated = True  # Links beyond a node's share were cut off
+            for node, neighbor, edge in chunk_links:
+                if neighbor == node:
+                    continue
+                depth = search.depth[node] + 1
+                if neighbor not in search.depth:
+                    search.depth[neighbor] = depth
+                    search.parents[neighbor] = []
+                    reached.append(neighbor)
+                if search.depth[neighbor] == depth and (node, edge) not in search.parents[neighbor]:
+                    search.parents[neighbor].append((node, edge))
+        if len(reached) > self.max_frontier:
+            self.truncated = True
+            reached = reached[:self.max_frontier]
+        search.frontier = reached
+        return reached
+
+    def find(self, source, target, max_hops, k):
+        """Up to ``k`` simple paths as lists of (s, p, o) edges, shortest first.
+
+        All shortest paths come first; further paths are the shortest routes
+        through other meeting nodes found within the hop limit (longer
+        detours through a node already reached more directly are not listed).
+        """
+        if source == target:
+            return [[]]
+        forward, backward = _Search(source), _Search(target)
+        endpoints = {source, target}
+        paths = []
+        hops = 0
+        while hops < max_hops and forward.frontier and backward.frontier:
+            # Grow the side with fewer nodes to expand
+            search = forward if len(forward.frontier) <= len(backward.frontier) else backward
+            self._expand(search, endpoints)
+            hops += 1
+            paths = self._collect(forward, backward, k)
+            if len(paths) >= k:
+                break
+        return paths[:k]
+
+    def _collect(self, forward, backward, k):
+        meetings = sorted((node for node in forward.depth if node in backward.depth),
+                          key=lambda node: forward.depth[node] + backward.depth[node])
+        paths, seen = [], set()
+        for meeting in meetings:
+            for head in forward.paths_to(meeting, MAX_PATHS_PER_MEETING):
+                for tail in backward.paths_to(meeting, MAX_PATHS_PER_MEETING):
+                    path = head + list(reversed(tail))
+                    key = tuple(path)
+                    if key in seen or not _is_simple(path):
+                        continue
+                    seen.add(key)
+                    paths.append(path)
+            if len(paths) >= k:
+                break
+        paths.sort(key=len)
+        return paths
+
+
+def _is_simple(path):
+    """Whether a path visits no node twice"""
+    nodes = set()
+    for subject, _, obj in path:
+        nodes.update((subject, obj))
+    return len(nodes) == len(path) + 1
+
+
+def find_paths(graph_uri, source, target, max_hops=4, k=3, allow=None, deny=None, max_fanout=None):
+    """Shortest connections between two entities as a nodes/edges subgraph.
+
+    Returns the subgraph in the entity graph format plus ``paths``, each a
+    list of node ids and edge ids from ``source`` to ``target``, and
+    search statistics (queries sent, hub nodes that were not expanded).
+    """
+    finder = PathFinder(graph_uri, allow=allow, deny=deny, max_fanout=max_fanout)
+    paths = finder.find(source, target, max_hops, k)
+
+    uris = {source, target}
+    for path in paths:
+        for subject, predicate, obj in path:
+            uris.update((subject, predicate, obj))
+    labels = resolve_labels(graph_uri, uris)
+
+    nodes, edges, path_entries = {}, {}, []
+    for node in (source, target):
+        nodes[node] = {'id': node, 'label': labels.get(node, uri_fragment(node)), 'uri': node, 'isCentral': True}
+    for path in paths:
+        current, node_ids, edge_ids = source, [source], []
+        for subject, predicate, obj in path:
+            current = obj if subject == current else subject
+            node_ids.append(current)
+            if current not in nodes:
+                nodes[current] = {'id': current, 'label': labels.get(current, uri_fragment(current)),
+                                  'uri': current, 'isCentral': False}
+            edge_id = f"{subject}--{predicate}--{obj}"
+            edge_ids.append(edge_id)
+            edges.setdefault(edge_id, {
+                'id': edge_id,
+                'source': subject,
+                'target': obj,
+                'label': labels.get(predicate, uri_fragment(predicate)),
+                'uri': predicate
+            })
+        path_entries.append({'length': len(path), 'nodes': node_ids, 'edges': edge_ids})
+
+    return {
+        'nodes': list(nodes.values()),
+        'edges': list(edges.values()),
+        'centralNode': source,
+        'paths': path_entries,
+        'stats': {
+            'queries': finder.queries,
+            'hubsSkipped': len(finder.hubs),
+            'truncated': finder.truncated
+        }
+    }
@@ -0,0 +1,238 @@
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from config import config
+
+# Current stage path per thread ("upload/serialize"); read by the sampler,
+# which runs on another thread and therefore can't use a threading.local
+_thread_stages = {}
+# Active profiles per thread, so stages can record their wall time
+_thread_profiles = {}
+# Only one deterministic profiler can be enabled per interpreter at a time
+_cprofile_lock = threading.Lock()
+
+
+class _Sampler:
+    """Samples one thread's Python stack at a fixed interval.
+
+    Stacks are stored collapsed (``outer;inner`` -> count), prefixed with
+    the thread's current stage, ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, thread_id, interval_seconds):
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.stacks = {}
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stage = _thread_stages.get(self.thread_id)
+            if stage:
+                stack.append(f"stage:{stage}")
+            key = ';'.join(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+
+class ActiveProfile:
+    """A running profile of the calling thread (``sample`` or ``cprofile`` mode).
+
+    Worker threads doing part of the profiled work join it with
+    ``attached()``: their stages are recorded and, in sample mode, their
+    stacks sampled too (cProfile only sees the starting thread).
+    """
+
+    def __init__(self, kind, description, mode='sample'):
+        self.id = uuid.uuid4().hex[:16]
+        self.kind = kind
+        self.description = description
+        self.mode = mode
+        self.thread_id = threading.get_ident()
+        self.stage_seconds = {}
+        self.sampler = None
+        self.worker_samplers = []
+        self.profiler = None
+        self.started = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        if self.mode == 'cprofile' and _cprofile_lock.acquire(blocking=False):
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            self.mode = 'sample'
+            self.sampler = _Sampler(self.thread_id, config.profiling_interval_ms / 1000)
+            self.sampler.start()
+        _thread_profiles[self.thread_id] = self
+        self.started = time.perf_counter()
+        return self
+
+    def add_stage_seconds(self, stage, seconds):
+        with self.lock:
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def attached(self):
+        """Attribute the calling (worker) thread's stages and samples to this profile"""
+        thread_id = threading.get_ident()
+        sampler = None
+        if self.mode == 'sample':
+            sampler = _Sampler(thread_id, config.profiling_interval_ms / 1000)
+            sampler.start()
+        _thread_profiles[thread_id] = self
+        try:
+            yield self
+        finally:
+            _thread_profiles.pop(thread_id, None)
+            if sampler is not None:
+                sampler.stop()
+                with self.lock:
+                    self.worker_samplers.append(sampler)
+
+    def stop(self, **extra):
+        """Stop profiling and store the result; returns the profile id"""
+        duration = time.perf_counter() - self.started
+        _thread_profiles.pop(self.thread_id, None)
+        entry = {
+            'id': self.id,
+            'kind': self.kind,
+            'description': self.description,
+            'mode': self.mode,
+            'createdAt': datetime.now().isoformat(),
+            'durationMs': round(duration * 1000, 1),
+            'stageSeconds': {stage: round(seconds, 4) for stage, seconds in self.stage_seconds.items()}
+        }
+        entry.update(extra)
+        if self.profiler is not None:
+            self.profiler.disable()
+            _cprofile_lock.release()
+            entry['stats'] = pstats.Stats(self.profiler).stats
+            entry['stacks'] = _stacks_from_stats(entry['stats'])
+        else:
+            self.sampler.stop()
+            stacks, samples = dict(self.sampler.stacks), self.sampler.samples
+            with self.lock:
+                for sampler in self.worker_samplers:
+                    for stack, count in sampler.stacks.items():
+                        stacks[stack] = stacks.get(stack, 0) + count
+                    samples += sampler.samples
+            entry['stacks'] = stacks
+            entry['samples'] = samples
+            entry['intervalMs'] = config.profiling_interval_ms
+        profile_store.put(entry)
+        return self.id
+
+
+def _stacks_from_stats(stats):
+    """Caller;callee pairs weighted by time (cProfile keeps no full stacks)"""
+    stacks = {}
+    for (filename, line, name), (_, _, inline_time, _, callers) in stats.items():
+        callee = f"{name} ({os.path.basename(filename)}:{line})"
+        if not callers:
+            stacks[callee] = stacks.get(callee, 0) + int(inline_time * 1e6)
+        for (caller_file, caller_line, caller_name), caller_stats in callers.items():
+            key = f"{caller_name} ({os.path.basename(caller_file)}:{caller_line});{callee}"
+            stacks[key] = stacks.get(key, 0) + int(caller_stats[2] * 1e6)
+    return {key: value for key, value in stacks.items() if value > 0}
+
+
+class ProfileStore:
+    """Bounded in-memory store of finished profiles, oldest dropped first"""
+
+    def __init__(self, max_profiles):
+        self.max_profiles = max_profiles
+        self.profiles = OrderedDict()
+        self.lock = threading.Lock()
+
+    def put(self, entry):
+        with self.lock:
+            self.profiles[entry['id']] = entry
+            while len(self.profiles) > self.max_profiles:
+                self.profiles.popitem(last=False)
+
+    def get(self, profile_id):
+        with self.lock:
+            return self.profiles.get(profile_id)
+
+    def list(self):
+        with self.lock:
+            return [{key: value for key, value in entry.items() if key not in ('stacks', 'stats')}
+                    for entry in reversed(self.profiles.values())]
+
+
+profile_store = ProfileStore(config.profiling_max_profiles)
+
+
+@contextmanager
+def profile_stage(name):
+    """Tag the calling thread's samples with a stage; nested stages join with '/'"""
+    thread_id = threading.get_ident()
+    parent = _thread_stages.get(thread_id)
+    _thread_stages[thread_id] = f"{parent}/{name}" if parent else name
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        active = _thread_profiles.get(thread_id)
+        if active is not None:
+            active.add_stage_seconds(_thread_stages[thread_id], time.perf_counter() - start)
+        if parent:
+            _thread_stages[thread_id] = parent
+        else:
+            _thread_stages.pop(thread_id, None)
+
+
+def render_collapsed(entry):
+    """Collapsed-stack text (one ``frame;frame count`` line per stack)"""
+    return ''.join(f"{stack} {count}\n" for stack, count in
+                   sorted(entry['stacks'].items(), key=lambda item: -item[1]))
+
+
+def render_pstats(entry, sort='cumulative', limit=60):
+    """Text report of a cProfile profile"""
+    output = io.StringIO()
+    stats = pstats.Stats(_StatsHolder(entry['stats']), stream=output)
+    stats.sort_stats(sort).print_stats(limit)
+    return output.getvalue()
+
+
+def dump_pstats(entry):
+    """Binary pstats file content (loadable with pstats.Stats / snakeviz)"""
+    return marshal.dumps(entry['stats'])
+
+
+class _StatsHolder:
+    """Minimal object pstats.Stats accepts in place of a profiler"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
@@ -0,0 +1,215 @@
+from collections import defaultdict
+from rdflib import RDF, Literal
+from rdflib.namespace import XSD
+from labels import uri_fragment
+from virtuoso import query_sparql
+
+RDF_TYPE = str(RDF.type)
+RDF_LANG_STRING = str(RDF.langString)
+XSD_STRING = str(XSD.string)
+
+
+def _new_property_stats():
+    return {
+        'subjectCount': 0,
+        'valueCount': 0,
+        'literalCount': 0,
+        'minCardinality': None,
+        'maxCardinality': 0,
+        'datatypes': defaultdict(int),
+        'languages': defaultdict(int),
+        'objectClasses': defaultdict(int)
+    }
+
+
+def _literal_datatype(literal):
+    """Datatype of an rdflib literal following RDF 1.1 (as SPARQL DATATYPE())"""
+    if literal.language:
+        return RDF_LANG_STRING
+    if literal.datatype:
+        return str(literal.datatype)
+    return XSD_STRING
+
+
+def _finalize_profile(class_counts, class_stats, graph_uri=None):
+    """Turn raw accumulators into the JSON profile structure"""
+    classes = {}
+    for class_uri, instance_count in class_counts.items():
+        properties = []
+        for pred_uri, stats in class_stats.get(class_uri, {}).items():
+            subject_count = stats['subjectCount']
+            properties.append({
+                'uri': pred_uri,
+                'label': uri_fragment(pred_uri),
+                'subjectCount': subject_count,
+                'valueCount': stats['valueCount'],
+                'fillRate': round(subject_count / instance_count, 4) if instance_count else 0.0,
+                'minCardinality': stats['minCardinality'] or 0,
+                'maxCardinality': stats['maxCardinality'],
+                'avgCardinality': round(stats['valueCount'] / subject_count, 2) if subject_count else 0.0,
+                'literalCount': stats['literalCount'],
+                'iriCount': stats['valueCount'] - stats['literalCount'],
+                'datatypes': dict(stats['datatypes']),
+                'languages': dict(stats['languages']),
+                'objectClasses': dict(stats['objectClasses'])
+            })
+        properties.sort(key=lambda p: (-p['fillRate'], p['uri']))
+        classes[class_uri] = {
+            'uri': class_uri,
+            'label': uri_fragment(class_uri),
+            'instanceCount': instance_count,
+            'properties': properties
+        }
+
+    return {
+        'graphUri': graph_uri,
+        'classCount': len(classes),
+        'classes': classes
+    }
+
+
+def _query_aggregate(query, template):
+    """Run an aggregate query, raising instead of returning partial profiles"""
+    results = query_sparql(query, timeout_seconds=120, origin=f'profile_graph_via_sparql.{template}')
+    if results is None:
+        raise RuntimeError("Property profile query failed")
+    return results
+
+
+def profile_graph_object(graph, graph_uri=None):
+    """Compute per-class property profiles from an rdflib graph (upload path).
+
+    Type assertions are collected first; afterwards every typed subject is
+    visited once and its predicate/object pairs are folded into the profile
+    of each of its classes. Cardinalities are computed over the instances
+    that actually use a predicate; ``fillRate`` covers the ones that don't.
+    """
+    subject_types = defaultdict(set)
+    for subj, _, obj in graph.triples((None, RDF.type, None)):
+        subject_types[subj].add(str(obj))
+
+    class_counts = defaultdict(int)
+    class_stats = defaultdict(lambda: defaultdict(_new_property_stats))
+
+    for subj, classes in subject_types.items():
+        # Summarize this subject once, then merge into each of its classes
+        per_predicate = defaultdict(lambda: {
+            'values': 0,
+            'literals': 0,
+            'datatypes': defaultdict(int),
+            'languages': defaultdict(int),
+            'objectClasses': defaultdict(int)
+        })
+        for pred, obj in graph.predicate_objects(subj):
+            if pred == RDF.type:
+                continue
+            summary = per_predicate[str(pred)]
+            summary['values'] += 1
+            if isinstance(obj, Literal):
+                summary['literals'] += 1
+                summary['datatypes'][_literal_datatype(obj)] += 1
+                if obj.language:
+                    summary['languages'][obj.language] += 1
+            else:
+                for object_class in subject_types.get(obj, ()):
+                    summary['objectClasses'][object_class] += 1
+
+        for class_uri in classes:
+            class_counts[class_uri] += 1
+            for pred_uri, summary in per_predicate.items():
+                stats = class_stats[class_uri][pred_uri]
+                stats['subjectCount'] += 1
+                stats['valueCount'] += summary['values']
+                stats['literalCount'] += summary['literals']
+                if stats['minCardinality'] is None or summary['values'] < stats['minCardinality']:
+                    stats['minCardinality'] = summary['values']
+                stats['maxCardinality'] = max(stats['maxCardinality'], summary['values'])
+                for key in ('datatypes', 'languages', 'objectClasses'):
+                    for value, count in summary[key].items():
+                        stats[key][value] += count
+
+    return _finalize_profile(class_counts, class_stats, graph_uri)
+
+
+def profile_graph_via_sparql(graph_uri):
+    """Compute per-class property profiles for an existing graph.
+
+    Uses a fixed number of aggregate queries (independent of the number of
+    classes): instance counts, per-(class, predicate) cardinalities, literal
+    datatype/language distribution and object class distribution.
+    """
+    class_counts = {}
+    class_stats = defaultdict(lambda: defaultdict(_new_property_stats))
+
+    counts_query = f"""
+    SELECT ?class (COUNT(DISTINCT ?s) AS ?count)
+    FROM <{graph_uri}>
+    WHERE {{ ?s a ?class }}
+    GROUP BY ?class
+    """
+    for binding in _query_aggregate(counts_query, 'counts'):
+        class_counts[binding['class']['value']] = int(binding['count']['value'])
+
+    cardinality_query = f"""
+    SELECT ?class ?predicate (COUNT(?s) AS ?subjects) (SUM(?n) AS ?total)
+           (MIN(?n) AS ?minN) (MAX(?n) AS ?maxN)
+    FROM <{graph_uri}>
+    WHERE {{
+      {{
+        SELECT ?s ?predicate (COUNT(?o) AS ?n)
+        WHERE {{
+          ?s ?predicate ?o
+          FILTER(?predicate != <{RDF_TYPE}>)
+        }}
+        GROUP BY ?s ?predicate
+      }}
+      ?s a ?class .
+    }}
+    GROUP BY ?class ?predicate
+    """
+    for binding in _query_aggregate(cardinality_query, 'cardinality'):
+        stats = class_stats[binding['class']['value']][binding['predicate']['value']]
+        stats['subjectCount'] = int(binding['subjects']['value'])
+        stats['valueCount'] = int(binding['total']['value'])
+        stats['minCardinality'] = int(binding['minN']['value'])
+        stats['maxCardinality'] = int(binding['maxN']['value'])
+
+    literals_query = f"""
+    SELECT ?class ?predicate ?datatype ?lang (COUNT(*) AS ?count)
+    FROM <{graph_uri}>
+    WHERE {{
+      ?s a ?class .
+      ?s ?predicate ?o .
+      FILTER(isLiteral(?o))
+      BIND(DATATYPE(?o) AS ?datatype)
+      BIND(LANG(?o) AS ?lang)
+    }}
+    GROUP BY ?class ?predicate ?datatype ?lang
+    """
+    for binding in _query_aggregate(literals_query, 'literals'):
+        stats = class_stats[binding['class']['value']][binding['predicate']['value']]
+        count = int(binding['count']['value'])
+        stats['literalCount'] += count
+        datatype = binding.get('datatype', {}).get('value')
+        lang = binding.get('lang', {}).get('value')
+        if lang:
+            datatype = datatype or RDF_LANG_STRING
+            stats['languages'][lang] += count
+        stats['datatypes'][datatype or XSD_STRING] += count
+
+    object_classes_query = f"""
+    SELECT ?class ?predicate ?objectClass (COUNT(*) AS ?count)
+    FROM <{graph_uri}>
+    WHERE {{
+      ?s a ?class .
+      ?s ?predicate ?o .
+      ?o a ?objectClass .
+      FILTER(?predicate != <{RDF_TYPE}>)
+    }}
+    GROUP BY ?class ?predicate ?objectClass
+    """
+    for binding in _query_aggregate(object_classes_query, 'object_classes'):
+        stats = class_stats[binding['class']['value']][binding['predicate']['value']]
+        stats['objectClasses'][binding['objectClass']['value']] += int(binding['count']['value'])
+
+    return _finalize_profile(class_counts, class_stats, graph_uri)
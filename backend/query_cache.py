@@ -0,0 +1,154 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_GRAPH_IRI = re.compile(r'\b(?:FROM(?:\s+NAMED)?|GRAPH|INTO|WITH)\s*<([^>]+)>', re.IGNORECASE)
+_UPDATE_KEYWORDS = re.compile(r'^\s*(?:(?:PREFIX|BASE)\b[^\n]*\n\s*)*(INSERT|DELETE|CLEAR|DROP|LOAD|CREATE|COPY|MOVE|ADD)\b',
+                              re.IGNORECASE)
+ALL_GRAPHS = '*'  # Tag of queries that don't name their graph
+
+
+def normalize_query(query):
+    """Collapse whitespace so formatting differences don't defeat the cache"""
+    return ' '.join(query.split())
+
+
+def query_graphs(query):
+    """Graph IRIs a query reads from or writes to"""
+    graphs = set(_GRAPH_IRI.findall(query))
+    return graphs or {ALL_GRAPHS}
+
+
+def is_update(query):
+    return bool(_UPDATE_KEYWORDS.match(query))
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class QueryCache:
+    """Single-flight coalescing plus short-TTL memoization of SPARQL reads.
+
+    Concurrent identical queries share one in-flight request. Successful
+    results are kept for ``ttl_seconds`` within a byte budget (LRU
+    eviction). Writes invalidate the entries of the graphs they touch;
+    a per-graph generation counter keeps a read that raced with a write
+    from storing its (possibly stale) result.
+    """
+
+    def __init__(self, ttl_seconds, max_bytes):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (expires, size, graphs, result)
+        self.inflight = {}
+        self.generations = {}
+        self.epoch = 0
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0 and self.max_bytes > 0
+
+    def _generation(self, graphs):
+        return (self.epoch,) + tuple(self.generations.get(graph, 0) for graph in sorted(graphs))
+
+    def _remove(self, key):
+        _, size, _, _ = self.entries.pop(key)
+        self.total_bytes -= size
+
+    def execute(self, query, run):
+        """Run ``run()`` for a read query through the cache.
+
+        ``run`` returns ``(result, size_in_bytes)``; a result of None marks
+        a failure, which is shared with coalesced callers but not memoized.
+        """
+        key = normalize_query(query)
+        graphs = query_graphs(query)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[3]
+            if entry:
+                self._remove(key)
+
+            flight = self.inflight.get(key)
+            if flight:
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self.inflight[key] = _Flight()
+                self.misses += 1
+                leader = True
+                generation = self._generation(graphs)
+
+        if not leader:
+            flight.done.wait()
+            return flight.result
+
+        result = None
+        try:
+            result, size = run()
+            flight.result = result
+            if result is not None and self.enabled:
+                self._store(key, graphs, result, size, generation)
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+            flight.done.set()
+        return result
+
+    def _store(self, key, graphs, result, size, generation):
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if self._generation(graphs) != generation:
+                return  # A write happened while the query ran
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, size, graphs, result)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def invalidate(self, graph_uri=None):
+        """Drop cached reads of a graph (and graph-agnostic reads); all if None"""
+        with self.lock:
+            if graph_uri is None:
+                self.entries.clear()
+                self.total_bytes = 0
+                self.epoch += 1
+                return
+            for graph in (graph_uri, ALL_GRAPHS):
+                self.generations[graph] = self.generations.get(graph, 0) + 1
+            stale = [key for key, entry in self.entries.items()
+                     if graph_uri in entry[2] or ALL_GRAPHS in entry[2]]
+            for key in stale:
+                self._remove(key)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'enabled': self.enabled,
+                'ttlSeconds': self.ttl_seconds,
+                'maxBytes': self.max_bytes,
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'inflight': len(self.inflight),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions
+            }
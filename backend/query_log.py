@@ -0,0 +1,143 @@
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from collections import deque
+from config import config
+
+# IRIs, string literals (short and long quotes, escape aware) and numbers are
+# replaced so queries built from the same template share a fingerprint
+_IRI = re.compile(r'<[^<>\s"{}|^`\\]*>')
+_LONG_STRING = re.compile(r'"""(?:[^"\\]|\\.|"(?!""))*"""|\'\'\'(?:[^\'\\]|\\.|\'(?!\'\'))*\'\'\'', re.DOTALL)
+_STRING = re.compile(r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'')
+_LANG_OR_TYPE = re.compile(r"('LIT')(?:@[A-Za-z]+(?:-[A-Za-z0-9]+)*|\^\^<IRI>)")
+_NUMBER = re.compile(r'(?<![\w?$:])[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b')
+# VALUES blocks and IN lists collapse to one placeholder whatever their length
+_TERM_LIST = re.compile(r"(<IRI>|'LIT'|N)(?:\s*,?\s*(?:<IRI>|'LIT'|N))+")
+
+MAX_FINGERPRINTS = 2000
+MAX_LOGGED_QUERY_CHARS = 2000
+
+slow_query_logger = logging.getLogger('kgviewer.slow_queries')
+if not slow_query_logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    slow_query_logger.addHandler(_handler)
+    slow_query_logger.setLevel(logging.INFO)
+    slow_query_logger.propagate = False
+
+
+def normalize_template(query):
+    """Query text with literals, IRIs and numbers stripped"""
+    text = _IRI.sub('<IRI>', query)
+    text = _LONG_STRING.sub("'LIT'", text)
+    text = _STRING.sub("'LIT'", text)
+    text = _LANG_OR_TYPE.sub(r'\1', text)
+    text = _NUMBER.sub('N', text)
+    text = ' '.join(text.split())
+    return _TERM_LIST.sub(r'\1...', text)
+
+
+def _template_key(template):
+    return hashlib.sha1(template.encode('utf-8')).hexdigest()[:16]
+
+
+def fingerprint(query):
+    """Short stable id of a query's template"""
+    return _template_key(normalize_template(query))
+
+
+class QueryLog:
+    """Per-fingerprint SPARQL statistics plus a structured slow-query log.
+
+    Only requests that reach Virtuoso are recorded; cache hits and
+    coalesced callers cost nothing there.
+    """
+
+    def __init__(self, slow_threshold_ms, recent_slow=100):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.fingerprints = {}
+        self.recent_slow = deque(maxlen=recent_slow)
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def record(self, query, origin, duration_ms, rows, size, success):
+        template = normalize_template(query)
+        key = _template_key(template)
+        slow = self.slow_threshold_ms > 0 and duration_ms >= self.slow_threshold_ms
+
+        with self.lock:
+            entry = self.fingerprints.get(key)
+            if entry is None:
+                if len(self.fingerprints) >= MAX_FINGERPRINTS:
+                    self.dropped += 1
+                else:
+                    entry = self.fingerprints[key] = {
+                        'fingerprint': key,
+                        'template': template,
+                        'origins': {},
+                        'count': 0,
+                        'errors': 0,
+                        'slowCount': 0,
+                        'totalMs': 0.0,
+                        'maxMs': 0.0,
+                        'totalRows': 0,
+                        'totalBytes': 0
+                    }
+            if entry is not None:
+                entry['origins'][origin] = entry['origins'].get(origin, 0) + 1
+                entry['count'] += 1
+                entry['errors'] += 0 if success else 1
+                entry['slowCount'] += 1 if slow else 0
+                entry['totalMs'] += duration_ms
+                entry['maxMs'] = max(entry['maxMs'], duration_ms)
+                entry['totalRows'] += rows
+                entry['totalBytes'] += size
+
+        if slow:
+            event = {
+                'event': 'slow_query',
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'fingerprint': key,
+                'origin': origin,
+                'durationMs': round(duration_ms, 1),
+                'thresholdMs': self.slow_threshold_ms,
+                'rows': rows,
+                'bytes': size,
+                'success': success,
+                'query': query[:MAX_LOGGED_QUERY_CHARS]
+            }
+            with self.lock:
+                self.recent_slow.append(event)
+            slow_query_logger.info(json.dumps(event))
+
+    def top(self, limit=20, sort='totalMs'):
+        """The ``limit`` most expensive fingerprints, by total time by default"""
+        with self.lock:
+            entries = [dict(entry, origins=dict(entry['origins'])) for entry in self.fingerprints.values()]
+            recent = list(self.recent_slow)
+            dropped = self.dropped
+        for entry in entries:
+            entry['avgMs'] = round(entry['totalMs'] / entry['count'], 1) if entry['count'] else 0.0
+            entry['totalMs'] = round(entry['totalMs'], 1)
+            entry['maxMs'] = round(entry['maxMs'], 1)
+        entries.sort(key=lambda entry: entry.get(sort, 0), reverse=True)
+        return {
+            'slowThresholdMs': self.slow_threshold_ms,
+            'fingerprintCount': len(entries),
+            'droppedFingerprints': dropped,
+            'fingerprints': entries[:limit],
+            'recentSlow': recent[-limit:]
+        }
+
+    def reset(self):
+        with self.lock:
+            self.fingerprints.clear()
+            self.recent_slow.clear()
+            self.dropped = 0
+
+
+query_log = QueryLog(config.slow_query_threshold_ms)
@@ -0,0 +1,214 @@
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from query_cache import ALL_GRAPHS
+
+VERSION_PREDICATE = 'http://kgviewer.local/ns#dataVersion'
+FAILURES_BEFORE_UNHEALTHY = 3
+EWMA_WEIGHT = 0.2
+
+
+class ReadEndpoint:
+    """A SPARQL read endpoint with its load, latency and health state"""
+
+    def __init__(self, url, primary=False):
+        self.url = url.rstrip('/')
+        self.sparql_url = f"{self.url}/sparql"
+        self.primary = primary
+        self.outstanding = 0
+        self.latency_ms = None  # EWMA of successful requests
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.last_error = None
+        self.graph_versions = {}  # graph URI -> data version seen on this endpoint
+        self.requests = 0
+        self.failures = 0
+
+    def status(self):
+        return {
+            'url': self.url,
+            'primary': self.primary,
+            'healthy': self.healthy,
+            'outstanding': self.outstanding,
+            'latencyMs': round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            'requests': self.requests,
+            'failures': self.failures,
+            'lastError': self.last_error
+        }
+
+
+class ReplicaRouter:
+    """Routes SPARQL reads across read replicas, writes stay on the primary.
+
+    Healthy replicas are picked by fewest outstanding requests (ties by
+    latency) or, with the ``latency`` strategy, at random weighted by the
+    inverse of their latency. Failed requests fail over to the next
+    candidate and finally the primary; repeated failures take a replica
+    out of rotation until a health check succeeds again.
+
+    Read-your-writes: every write records a new data version for the
+    graph, stored as a marker triple in the meta graph on the primary.
+    Replication carries the marker to the replicas; until a replica reports
+    at least that version, reads of the graph go to the primary.
+    """
+
+    def __init__(self, primary_url, read_urls, meta_graph_uri, strategy='least-outstanding',
+                 health_interval_seconds=5.0):
+        self.primary = ReadEndpoint(primary_url, primary=True)
+        self.replicas = [ReadEndpoint(url) for url in read_urls if url.rstrip('/') != self.primary.url]
+        self.meta_graph_uri = meta_graph_uri
+        self.strategy = strategy
+        self.health_interval_seconds = health_interval_seconds
+        self.required_versions = {}  # graph URI -> version replicas must reach
+        self.lock = threading.Lock()
+        self.rng = random.Random()
+        # Failover replaces retries, so replica requests are not retried
+        self.session = requests.Session()
+        adapter = HTTPAdapter(max_retries=0, pool_connections=10, pool_maxsize=50)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.health_thread = None
+
+    @property
+    def enabled(self):
+        return bool(self.replicas)
+
+    def start(self):
+        if self.enabled and self.health_thread is None:
+            self.health_thread = threading.Thread(target=self._health_loop, daemon=True)
+            self.health_thread.start()
+        return self
+
+    # Routing
+
+    def _is_fresh(self, endpoint, graphs):
+        for graph in graphs:
+            if graph == ALL_GRAPHS:
+                # A query without FROM/GRAPH may read any graph
+                if any(endpoint.graph_versions.get(pending, 0) < version
+                       for pending, version in self.required_versions.items()):
+                    return False
+            elif endpoint.graph_versions.get(graph, 0) < self.required_versions.get(graph, 0):
+                return False
+        return True
+
+    def candidates(self, graphs):
+        """Endpoints to try for a read of ``graphs``, best first, primary last"""
+        with self.lock:
+            replicas = [replica for replica in self.replicas
+                        if replica.healthy and self._is_fresh(replica, graphs)]
+            if self.strategy == 'latency' and len(replicas) > 1:
+                ordered = []
+                while replicas:
+                    weights = [1.0 / max(replica.latency_ms or 1.0, 1.0) for replica in replicas]
+                    ordered.append(replicas.pop(self._weighted_index(weights)))
+                replicas = ordered
+            else:
+                replicas.sort(key=lambda replica: (replica.outstanding, replica.latency_ms or 0.0))
+        return replicas + [self.primary]
+
+    def _weighted_index(self, weights):
+        point = self.rng.uniform(0, sum(weights))
+        for index, weight in enumerate(weights):
+            point -= weight
+            if point <= 0:
+                return index
+        return len(weights) - 1
+
+    def begin(self, endpoint):
+        with self.lock:
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+
+    def finish(self, endpoint, elapsed_ms, error=None):
+        """Record the outcome of a request started with ``begin``"""
+        with self.lock:
+            endpoint.outstanding -= 1
+            if error is None:
+                endpoint.consecutive_failures = 0
+                endpoint.latency_ms = (elapsed_ms if endpoint.latency_ms is None else
+                                       (1 - EWMA_WEIGHT) * endpoint.latency_ms + EWMA_WEIGHT * elapsed_ms)
+                return
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            endpoint.last_error = error
+            if not endpoint.primary and endpoint.consecutive_failures >= FAILURES_BEFORE_UNHEALTHY:
+                endpoint.healthy = False
+
+    # Read-your-writes
+
+    def version_marker_update(self, graph_uri):
+        """Record a write to a graph; returns the SPARQL update storing its marker"""
+        version = time.time_ns()
+        with self.lock:
+            self.required_versions[graph_uri] = max(self.required_versions.get(graph_uri, 0), version)
+        return f"""
+        DELETE WHERE {{ GRAPH <{self.meta_graph_uri}> {{ <{graph_uri}> <{VERSION_PREDICATE}> ?version }} }} ;
+        INSERT DATA {{ GRAPH <{self.meta_graph_uri}> {{ <{graph_uri}> <{VERSION_PREDICATE}> {version} }} }}
+        """
+
+    def _read_versions(self, endpoint, timeout=3):
+        query = f"""
+        SELECT ?graph ?version
+        FROM <{self.meta_graph_uri}>
+        WHERE {{ ?graph <{VERSION_PREDICATE}> ?version }}
+        """
+        response = self.session.post(endpoint.sparql_url, data={'query': query},
+                                     headers={'Accept': 'application/sparql-results+json'}, timeout=timeout)
+        response.raise_for_status()
+        return {binding['graph']['value']: int(binding['version']['value'])
+                for binding in response.json()['results']['bindings']}
+
+    def check_health(self):
+        """Probe every replica and refresh the graph versions it has caught up to"""
+        try:
+            # Writes made by other worker processes show up in the primary's markers
+            primary_versions = self._read_versions(self.primary)
+            with self.lock:
+                for graph, version in primary_versions.items():
+                    if version > self.required_versions.get(graph, 0):
+                        self.required_versions[graph] = version
+        except (requests.RequestException, ValueError, KeyError) as e:
+            print(f"Could not read data versions from primary {self.primary.url}: {e}")
+
+        for replica in self.replicas:
+            try:
+                versions = self._read_versions(replica)
+            except (requests.RequestException, ValueError, KeyError) as e:
+                with self.lock:
+                    replica.healthy = False
+                    replica.last_error = str(e)
+                continue
+            with self.lock:
+                replica.graph_versions = versions
+                replica.healthy = True
+                replica.consecutive_failures = 0
+
+        with self.lock:
+            # Forget versions every replica has reached
+            caught_up = [graph for graph, version in self.required_versions.items()
+                         if all(replica.graph_versions.get(graph, 0) >= version for replica in self.replicas)]
+            for graph in caught_up:
+                del self.required_versions[graph]
+
+    def _health_loop(self):
+        while True:
+            try:
+                self.check_health()
+            except Exception as e:
+                print(f"Replica health check failed: {e}")
+            time.sleep(self.health_interval_seconds)
+
+    def status(self):
+        with self.lock:
+            return {
+                'enabled': self.enabled,
+                'strategy': self.strategy,
+                'primary': self.primary.status(),
+                'replicas': [dict(replica.status(), laggingGraphs=sorted(
+                    graph for graph, version in self.required_versions.items()
+                    if replica.graph_versions.get(graph, 0) < version)) for replica in self.replicas],
+                'pendingGraphs': len(self.required_versions)
+            }
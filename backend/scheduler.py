@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from config import config
+from virtuoso import query_sparql
+
+# Niceness added to warmer threads (Linux schedules threads individually)
+THREAD_NICENESS = 10
+# Completed task runs kept for the status endpoint
+MAX_RECENT_RUNS = 200
+# Weight of the latest probe in the latency estimate
+EWMA_WEIGHT = 0.5
+
+
+def probe_latency() -> Optional[float]:
+    """Round trip of a trivial query in milliseconds, or None if Virtuoso did not answer"""
+    start = time.perf_counter()
+    result = query_sparql('SELECT (1 AS ?ok) WHERE {}', timeout_seconds=10, use_cache=False,
+                          origin='scheduler.probe')
+    return (time.perf_counter() - start) * 1000 if result is not None else None
+
+
+class PrecomputeScheduler:
+    """Background warmer recomputing heavy per-graph artifacts.
+
+    Tasks are registered by kind and queued per graph (``None`` for
+    catalog-wide tasks); a task that is already queued is not queued
+    twice. A few low-priority worker threads run the queue. Before each
+    task a worker probes Virtuoso's latency and, while the estimate is
+    above ``max_latency_ms`` (or Virtuoso does not answer), pauses and
+    probes again instead of adding load, so interactive requests keep
+    priority. A task's queries are not interrupted once it has started.
+    """
+
+    def __init__(self, workers: int, max_latency_ms: float, pause_seconds: float,
+                 latency_probe: Optional[Callable[[], Optional[float]]] = probe_latency):
+        self.workers = workers
+        self.max_latency_ms = max_latency_ms
+        self.pause_seconds = pause_seconds
+        self.latency_probe = latency_probe
+        self.latency_ms = None
+        self.tasks: Dict[str, Callable] = {}
+        self.queue = deque()
+        self.queued = set()
+        self.running: Dict[tuple, float] = {}
+        self.last_runs: Dict[tuple, dict] = {}
+        self.condition = threading.Condition()
+        self.started = False
+        self.paused_since = None
+        self.pauses = 0
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def enabled(self):
+        return self.workers > 0
+
+    def register(self, kind: str, task: Callable[[Optional[str]], None]):
+        """Register a task kind; ``task`` is called with the graph name (None for catalog tasks)"""
+        self.tasks[kind] = task
+
+    def enqueue(self, graph_name: Optional[str], *kinds: str):
+        """Queue tasks for a graph; returns how many were newly queued"""
+        if not self.enabled:
+            return 0
+        added = 0
+        with self.condition:
+            for kind in kinds:
+                key = (kind, graph_name)
+                if key in self.queued:
+                    continue
+                self.queued.add(key)
+                self.queue.append(key)
+                added += 1
+            self.condition.notify_all()
+        return added
+
+    def start(self):
+        if not self.enabled or self.started:
+            return self
+        self.started = True
+        for index in range(self.workers):
+            threading.Thread(target=self._worker, name=f'warmer-{index}', daemon=True).start()
+        return self
+
+    def _lower_priority(self):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), THREAD_NICENESS)
+        except (AttributeError, OSError):
+            pass  # Not supported on this platform
+
+    def _wait_for_quiet(self):
+        """Block while Virtuoso is slow or unreachable"""
+        if not self.latency_probe:
+            return
+        while True:
+            latency = self.latency_probe()
+            with self.condition:
+                if latency is not None:
+                    self.latency_ms = (latency if self.latency_ms is None else
+                                       (1 - EWMA_WEIGHT) * self.latency_ms + EWMA_WEIGHT * latency)
+                if latency is not None and self.latency_ms <= self.max_latency_ms:
+                    self.paused_since = None
+                    return
+                if self.paused_since is None:
+                    self.paused_since = time.time()
+                    self.pauses += 1
+            time.sleep(self.pause_seconds)
+
+    def _worker(self):
+        self._lower_priority()
+        while True:
+            with self.condition:
+                while not self.queue:
+                    self.condition.wait()
+            self._wait_for_quiet()
+            with self.condition:
+                if not self.queue:
+                    continue
+                key = self.queue.popleft()
+                # Runs queued again while running start afresh once the current run is done
+                if key in self.running:
+                    self.queue.append(key)
+                    self.condition.wait(timeout=1)
+                    continue
+                self.queued.discard(key)
+                self.running[key] = time.time()
+            kind, graph_name = key
+            started = time.perf_counter()
+            error = None
+            try:
+                self.tasks[kind](graph_name)
+            except Exception as e:
+                error = str(e)
+                print(f"Warmer task {kind} for graph {graph_name or '*'} failed: {e}")
+            with self.condition:
+                del self.running[key]
+                if error:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+                self.last_runs.pop(key, None)
+                self.last_runs[key] = {
+                    'kind': kind,
+                    'graphName': graph_name,
+                    'finishedAt': datetime.now().isoformat(),
+                    'seconds': round(time.perf_counter() - started, 3),
+                    'status': 'failed' if error else 'success',
+                    'error': error
+                }
+                while len(self.last_runs) > MAX_RECENT_RUNS:
+                    self.last_runs.pop(next(iter(self.last_runs)))
+
+    def status(self):
+        with self.condition:
+            return {
+                'enabled': self.enabled,
+                'workers': self.workers,
+                'maxLatencyMs': self.max_latency_ms,
+                'latencyMs': round(self.latency_ms, 1) if self.latency_ms is not None else None,
+                'paused': self.paused_since is not None,
+                'pausedSince': datetime.fromtimestamp(self.paused_since).isoformat() if self.paused_since else None,
+                'pauses': self.pauses,
+                'queue': [{'kind': kind, 'graphName': graph_name} for kind, graph_name in self.queue],
+                'running': [{'kind': kind, 'graphName': graph_name,
+                             'startedAt': datetime.fromtimestamp(started).isoformat()}
+                            for (kind, graph_name), started in self.running.items()],
+                'completed': self.completed,
+                'failed': self.failed,
+                'lastRuns': list(reversed(self.last_runs.values()))
+            }
+
+
+precompute = PrecomputeScheduler(config.warmer_workers, config.warmer_max_latency_ms, config.warmer_pause_seconds)
@@ -0,0 +1,37 @@
+def build_schema_summary(profile):
+    """Build a class-level link summary from a property profile.
+
+    Every (subject class, predicate, object class) combination seen in the
+    profile becomes one edge carrying the number of links, so the whole
+    shape of a graph fits in a payload the graph viewer can render as is.
+    """
+    nodes = []
+    edges = []
+
+    for class_uri, class_profile in profile.get('classes', {}).items():
+        nodes.append({
+            'id': class_uri,
+            'label': class_profile['label'],
+            'uri': class_uri,
+            'instanceCount': class_profile['instanceCount']
+        })
+        for prop in class_profile['properties']:
+            for object_class, count in prop['objectClasses'].items():
+                edges.append({
+                    'id': f"{class_uri}--{prop['uri']}--{object_class}",
+                    'source': class_uri,
+                    'target': object_class,
+                    'label': prop['label'],
+                    'uri': prop['uri'],
+                    'count': count
+                })
+
+    nodes.sort(key=lambda n: n['instanceCount'], reverse=True)
+    edges.sort(key=lambda e: e['count'], reverse=True)
+
+    return {
+        'nodes': nodes,
+        'edges': edges,
+        'nodeCount': len(nodes),
+        'edgeCount': len(edges)
+    }
@@ -0,0 +1,157 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from config import config
+from entity_details import is_safe_iri
+from labels import LABEL_PREDICATES, resolve_labels
+from virtuoso import query_sparql
+
+# Match kinds, best first; a hit's score is (kind, label length, label)
+EXACT_IRI, EXACT_LABEL, PREFIX, WORD_START, CONTAINS = range(5)
+MATCH_NAMES = ['iri', 'exact', 'prefix', 'word', 'contains']
+
+# Shared by all searches so concurrent requests can't multiply the load on Virtuoso
+_executor = ThreadPoolExecutor(max_workers=config.search_workers, thread_name_prefix='search')
+
+
+def list_graph_names():
+    """Names of the catalogued graphs (those under graph_base_uri)"""
+    results = query_sparql("""
+    SELECT DISTINCT ?graph
+    WHERE {
+      GRAPH ?graph { ?s ?p ?o }
+    }
+    ORDER BY ?graph
+    """, origin='search.graphs') or []
+    prefix = f'{config.graph_base_uri}/'
+    return [binding['graph']['value'][len(prefix):] for binding in results
+            if binding['graph']['value'].startswith(prefix)]
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _match_kind(label, needle):
+    label = label.lower()
+    if label == needle:
+        return EXACT_LABEL
+    if label.startswith(needle):
+        return PREFIX
+    index = label.find(needle)
+    if index > 0 and not label[index - 1].isalnum():
+        return WORD_START
+    return CONTAINS
+
+
+def search_graph(graph_name, text, limit, budget_seconds):
+    """Entities of one graph whose label contains ``text`` (or that are the IRI ``text``).
+
+    Returns ``(hits, timed_out)``; hits are dicts with uri, label, match and
+    score, best first. Shorter labels are fetched first so the LIMIT keeps
+    exact and prefix matches.
+    """
+    graph_uri = config.get_graph_uri(graph_name)
+    deadline = time.monotonic() + budget_seconds
+    needle = text.lower()
+    hits = {}
+
+    if is_safe_iri(text) and ':' in text:
+        found = query_sparql(f"""
+        SELECT ?p WHERE {{ GRAPH <{graph_uri}> {{ {{ <{text}> ?p ?o }} UNION {{ ?s ?p <{text}> }} }} }} LIMIT 1
+        """, timeout_seconds=budget_seconds, origin='search.iri')
+        if found:
+            label = resolve_labels(graph_uri, [text]).get(text, text)
+            hits[text] = (EXACT_IRI, len(label), label)
+
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return _format_hits(hits), True
+    results = query_sparql(f"""
+    SELECT DISTINCT ?entity ?label
+    WHERE {{
+        GRAPH <{graph_uri}> {{
+            ?entity ?labelPred ?label .
+            FILTER(?labelPred IN ({', '.join(f'<{p}>' for p in LABEL_PREDICATES)}))
+            FILTER(isLiteral(?label) && CONTAINS(LCASE(STR(?label)), "{_escape(needle)}"))
+        }}
+    }}
+    ORDER BY STRLEN(STR(?label))
+    LIMIT {limit}
+    """, timeout_seconds=remaining, origin='search.labels')
+    timed_out = results is None and time.monotonic() >= deadline
+    for binding in results or []:
+        uri, label = binding['entity']['value'], binding['label']['value']
+        score = (_match_kind(label, needle), len(label), label)
+        if uri not in hits or score < hits[uri]:
+            hits[uri] = score
+    return _format_hits(hits), timed_out
+
+
+def _format_hits(hits):
+    return [{'uri': uri, 'label': label, 'match': MATCH_NAMES[kind], 'score': [kind, length]}
+            for uri, (kind, length, label) in sorted(hits.items(), key=lambda item: item[1])]
+
+
+def search_all_graphs(text, k=20, graph_names=None, budget_seconds=None):
+    """Search every catalogued graph concurrently; yields events as graphs answer.
+
+    Each finished graph yields ``{'type': 'hits', 'graph', 'hits', 'elapsedMs'}``
+    (or ``'timeout'`` / ``'error'``). Hits are merged per entity as they
+    arrive; once ``k`` entities with a label or IRI match at least as good
+    as a prefix match are found, graphs not searched yet are skipped. The
+    last event is ``{'type': 'done', 'results': [...]}`` with the top ``k``
+    entities, each listing the graphs it was found in.
+    """
+    budget_seconds = budget_seconds or config.search_graph_budget_ms / 1000
+    started = time.monotonic()
+    if graph_names is None:
+        graph_names = list_graph_names()
+    yield {'type': 'start', 'query': text, 'k': k, 'graphs': len(graph_names)}
+
+    merged = {}
+    searched, timed_out, failed = [], [], []
+    futures = {_executor.submit(search_graph, name, text, k, budget_seconds): name for name in graph_names}
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                graph_name = futures[future]
+                elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+                try:
+                    hits, graph_timed_out = future.result()
+                except Exception as e:
+                    print(f"Search failed in graph {graph_name}: {e}")
+                    failed.append(graph_name)
+                    yield {'type': 'error', 'graph': graph_name, 'error': str(e), 'elapsedMs': elapsed_ms}
+                    continue
+                (timed_out if graph_timed_out else searched).append(graph_name)
+                for hit in hits:
+                    entry = merged.get(hit['uri'])
+                    if entry is None:
+                        merged[hit['uri']] = entry = {**hit, 'graphs': []}
+                    elif hit['score'] < entry['score']:
+                        entry.update(label=hit['label'], match=hit['match'], score=hit['score'])
+                    entry['graphs'].append(graph_name)
+                yield {'type': 'timeout' if graph_timed_out else 'hits', 'graph': graph_name,
+                       'hits': hits, 'elapsedMs': elapsed_ms}
+            # Stop early once k strong (prefix or better) matches are in
+            good = sum(1 for entry in merged.values() if entry['score'][0] <= PREFIX)
+            if good >= k:
+                break
+    finally:
+        # Graphs already being searched finish in the background; their results are dropped
+        for future in pending:
+            future.cancel()
+
+    results = sorted(merged.values(), key=lambda entry: (entry['score'], entry['uri']))[:k]
+    yield {
+        'type': 'done',
+        'results': results,
+        'graphsSearched': len(searched),
+        'graphsTimedOut': timed_out,
+        'graphsFailed': failed,
+        'graphsSkipped': len(pending),
+        'complete': not pending and not timed_out and not failed,
+        'elapsedMs': round((time.monotonic() - started) * 1000, 1)
+    }
@@ -0,0 +1,101 @@
+import hashlib
+import math
+from typing import Dict, List, Tuple
+
+
+def _hash64(value: str, seed: int = 0) -> int:
+    """Stable 64-bit hash of a string (independent of PYTHONHASHSEED)"""
+    digest = hashlib.blake2b(value.encode('utf-8'), digest_size=8,
+                             salt=seed.to_bytes(16, 'little')).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter with 2^precision registers.
+
+    The relative standard error is about 1.04 / sqrt(2^precision),
+    i.e. ~1.6% for the default precision of 12 (4096 registers).
+    """
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.num_registers = 1 << precision
+        self.registers = bytearray(self.num_registers)
+
+    def add(self, value: str):
+        hashed = _hash64(value)
+        index = hashed & (self.num_registers - 1)
+        remaining = hashed >> self.precision
+        # Position of the leftmost 1-bit in the remaining (64 - p) bits
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog'):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.num_registers)
+
+    def count(self) -> int:
+        m = self.num_registers
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class CountMinSketch:
+    """Count-min sketch with a small candidate set for heavy-hitter queries.
+
+    Point estimates never underestimate; with width w and depth d they
+    overestimate by at most e/w * total with probability 1 - e^-d.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4, heavy_hitters: int = 100):
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.tables = [[0] * width for _ in range(depth)]
+        self.max_candidates = heavy_hitters
+        self.candidates: Dict[str, int] = {}
+
+    def _cells(self, value: str):
+        for row in range(self.depth):
+            yield row, _hash64(value, seed=row + 1) % self.width
+
+    def add(self, value: str, count: int = 1):
+        self.total += count
+        estimate = None
+        for row, col in self._cells(value):
+            self.tables[row][col] += count
+            cell = self.tables[row][col]
+            estimate = cell if estimate is None else min(estimate, cell)
+
+        # Keep the top candidates; evict the smallest when over capacity
+        if value in self.candidates or len(self.candidates) < self.max_candidates:
+            self.candidates[value] = estimate
+        else:
+            smallest = min(self.candidates, key=self.candidates.get)
+            if estimate > self.candidates[smallest]:
+                del self.candidates[smallest]
+                self.candidates[value] = estimate
+
+    def estimate(self, value: str) -> int:
+        return min(self.tables[row][col] for row, col in self._cells(value))
+
+    @property
+    def error_bound(self) -> float:
+        """Additive overestimation bound (e/w * total)"""
+        return math.e / self.width * self.total
+
+    def heavy_hitters(self, limit: int = None) -> List[Tuple[str, int]]:
+        ranked = sorted(((value, self.estimate(value)) for value in self.candidates),
+                        key=lambda item: item[1], reverse=True)
+        return ranked[:limit] if limit else ranked
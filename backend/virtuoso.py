@@ -5,6 +5,12 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import time
 from config import config
+from query_cache import QueryCache, is_update, query_graphs
+from metrics import observe_sparql, observe_batch
+from query_log import query_log
+from profiling import profile_stage
+from replicas import ReplicaRouter
+from batching import batch_sizer, estimate_triple_bytes
 
 VIRTUOSO_URL = config.virtuoso_url
 SPARQL_ENDPOINT = f"{VIRTUOSO_URL}/sparql"
@@ -25,15 +31,25 @@ adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=10, pool_maxs
 session.mount("http://", adapter)
 session.mount("https://", adapter)
 
-def storeDataToGraph(graph, data, timeout_seconds=300):
+# Reads are spread over the read replicas; writes always go to VIRTUOSO_URL
+router = ReplicaRouter(VIRTUOSO_URL, config.virtuoso_read_urls, config.meta_graph_uri,
+					   strategy=config.virtuoso_read_balancing,
+					   health_interval_seconds=config.virtuoso_health_check_seconds).start()
+
+# Coalescing and short-TTL memoization of identical SPARQL reads
+query_cache = QueryCache(config.query_cache_ttl_seconds, config.query_cache_max_bytes)
+
+def storeDataToGraph(graph, data, timeout_seconds=300, retries=retry):
 	"""Store serialized RDF data to Virtuoso under the given graph name.
 
 	Args:
 		graph: Graph URI to store data in
 		data: Serialized RDF data (Turtle format)
 		timeout_seconds: Request timeout in seconds (default 300 = 5 minutes)
+		retries: Attempts before giving up
 
-	Returns True on success (HTTP 200/201), False on failure.
+	Returns True on success (HTTP 200/201), False on failure. The caller
+	records the write (record_write) once it has stored all its batches.
 	"""
 
 	if not graph:
@@ -42,10 +58,12 @@ def storeDataToGraph(graph, data, timeout_seconds=300):
 	api_url = endpoint + '?graph=' + graph
 	headers = {'Content-type': 'text/turtle'}
 	response = None
+	# Cached reads of this graph become stale with this write
+	query_cache.invalidate(graph)
 	
-	print(f"Uploading data to Virtuoso graph: {graph} (timeout: {timeout_seconds}s)")
+	print(f"Uploading data to Virtuoso graph: {graph} (timeout: {timeout_seconds:.0f}s)")
 	
-	for i in range(retry):
+	for i in range(retries):
 		try:
 			response = session.post(api_url, data=data, headers=headers, 
 								   auth=HTTPDigestAuth(username, password), 
@@ -53,12 +71,12 @@ def storeDataToGraph(graph, data, timeout_seconds=300):
 			break
 		except requests.exceptions.Timeout:
 			print(f"Upload attempt {i+1} timed out after {timeout_seconds} seconds")
-			if i < retry - 1:
+			if i < retries - 1:
 				print("Retrying...")
 				time.sleep(5)
 		except Exception as e:
 			print(f"Upload attempt {i+1} failed: {str(e)}")
-			if i < retry - 1:
+			if i < retries - 1:
 				time.sleep(2)
 
 	if response is None:
@@ -73,95 +91,172 @@ def storeDataToGraph(graph, data, timeout_seconds=300):
 		print(response.text, flush=True)
 		return False
 
-def storeDataToGraphInBatches(graph, rdf_graph, batch_size=10000, progress_callback=None):
-	"""Store large RDF graph data to Virtuoso in smaller batches.
+def storeDataToGraphInBatches(graph, rdf_graph, progress_callback=None):
+	"""Store large RDF graph data to Virtuoso in batches sized by the batch sizer.
+
+	Batches are filled up to the sizer's byte budget, so many short triples
+	share one request and large literals get batches of their own. Each
+	batch is posted once with a timeout scaled to its size; a failed batch
+	is split in halves and retried, and the sizer shrinks later batches.
 
 	Args:
 		graph: Graph URI to store data in
 		rdf_graph: rdflib.Graph object containing the data
-		batch_size: Number of triples per batch (default 10000)
-		progress_callback: Optional callback function (batch_num, processed_triples, total_triples)
+		progress_callback: Optional callback function (batch_num, processed_triples, total_triples, total_batches),
+			total_batches being the current estimate
 
 	Returns True on success, False on failure.
 	"""
 	if not graph:
 		raise ValueError("No graph specified for virtuoso storage")
 	
+	from rdflib import Graph
 	total_triples = len(rdf_graph)
-	print(f"Uploading {total_triples} triples in batches of {batch_size}...")
-	
-	if total_triples <= batch_size:
-		# Small enough to upload in one go
-		print("File small enough for single upload")
-		data = rdf_graph.serialize(format='turtle')
-		success = storeDataToGraph(graph, data)
-		if success and progress_callback:
-			progress_callback(1, total_triples, total_triples)
-		return success
-	
-	# Split into batches - process iteratively to reduce memory usage
-	total_batches = (total_triples + batch_size - 1) // batch_size
-	print(f"Splitting into {total_batches} batches...")
+	print(f"Uploading {total_triples} triples in batches of ~{batch_sizer.status()['targetBytes'] // 1024} KiB...")
 	
 	processed_triples = 0
+	batch_num = 0
+	failures_in_row = 0
 	triples_iter = iter(rdf_graph)
+	retry_chunks = []  # halves of failed batches, sent before new triples
 	
-	for batch_num in range(total_batches):
-		print(f"Uploading batch {batch_num+1}/{total_batches}...")
-		
-		# Create a new graph for this batch
-		from rdflib import Graph
-		batch_graph = Graph()
-		
-		# Add triples to batch graph (up to batch_size)
-		batch_triples_count = 0
-		try:
-			while batch_triples_count < batch_size:
-				triple = next(triples_iter)
-				batch_graph.add(triple)
-				batch_triples_count += 1
-		except StopIteration:
-			# End of triples reached
-			pass
-		
-		if batch_triples_count == 0:
+	while True:
+		with profile_stage('batch'):
+			if retry_chunks:
+				batch = retry_chunks.pop(0)
+				estimated_bytes = sum(estimate_triple_bytes(triple) for triple in batch)
+			else:
+				batch, estimated_bytes = _next_batch(triples_iter, batch_sizer.estimate_budget())
+		if not batch:
 			break  # No more triples to process
 		
-		print(f"Batch {batch_num+1} contains {batch_triples_count} triples")
-		
 		# Serialize and upload
-		batch_data = batch_graph.serialize(format='turtle')
-		success = storeDataToGraph(graph, batch_data, timeout_seconds=10)
+		batch_graph = Graph()
+		for triple in batch:
+			batch_graph.add(triple)
+		serialize_start = time.perf_counter()
+		with profile_stage('serialize'):
+			batch_data = batch_graph.serialize(format='turtle').encode('utf-8')
+		store_start = time.perf_counter()
+		with profile_stage('post'):
+			success = storeDataToGraph(graph, batch_data, timeout_seconds=batch_sizer.timeout_for(len(batch_data)),
+									   retries=1)
+		store_seconds = time.perf_counter() - store_start
+		observe_batch(len(batch), store_start - serialize_start, store_seconds, success, len(batch_data))
+		batch_sizer.record(len(batch), estimated_bytes, len(batch_data), store_seconds, success)
 		
 		if not success:
-			print(f"Failed to upload batch {batch_num+1}")
-			return False
+			failures_in_row += 1
+			if len(batch) == 1 or failures_in_row >= retry:
+				print(f"Failed to upload batch of {len(batch)} triples after {failures_in_row} attempts")
+				return False
+			# Retry the batch in halves; the sizer already shrank the batches after them
+			half = len(batch) // 2
+			retry_chunks[:0] = [batch[:half], batch[half:]]
+			print(f"Batch of {len(batch)} triples failed, retrying in halves")
+			continue
 		
-		processed_triples += batch_triples_count
-		print(f"Batch {batch_num+1}/{total_batches} uploaded successfully")
+		failures_in_row = 0
+		batch_num += 1
+		processed_triples += len(batch)
+		remaining_triples = total_triples - processed_triples
+		total_batches = batch_num + (batch_sizer.estimate_batches(remaining_triples) if remaining_triples > 0 else 0)
+		print(f"Batch {batch_num}/~{total_batches} uploaded: {len(batch)} triples, "
+			  f"{len(batch_data) // 1024} KiB in {store_seconds:.2f}s")
 		
 		# Update progress
 		if progress_callback:
-			progress_callback(batch_num + 1, processed_triples, total_triples)
-		
-		# Small delay between batches to avoid overwhelming the server
-		if batch_num < total_batches - 1:  # Don't sleep after the last batch
-			time.sleep(1)
+			progress_callback(batch_num, processed_triples, total_triples, total_batches)
 	
-	print(f"All {total_batches} batches uploaded successfully!")
+	print(f"All {batch_num} batches uploaded successfully!")
 	return True
 
-def query_sparql(query_string, timeout_seconds=30):
+def _next_batch(triples_iter, budget_bytes):
+	"""Take triples until their estimated size reaches the budget (at least one triple)"""
+	batch = []
+	estimated_bytes = 0
+	for triple in triples_iter:
+		batch.append(triple)
+		estimated_bytes += estimate_triple_bytes(triple)
+		if estimated_bytes >= budget_bytes:
+			break
+	return batch, estimated_bytes
+
+def query_sparql(query_string, timeout_seconds=30, use_cache=True, origin=None):
 	"""Execute SPARQL query against Virtuoso endpoint.
 	
+	Reads go through the query cache: concurrent identical queries share
+	one request and results are memoized for a short TTL. Updates bypass
+	the cache and invalidate the graphs they touch.
+	
 	Args:
 		query_string: SPARQL query to execute
 		timeout_seconds: Request timeout in seconds
+		use_cache: Set to False for one-off reads (exports, random samples)
+			that would only evict useful entries
+		origin: Caller and query template id ("handler.template") used to
+			attribute the query in the slow-query log
 	
 	Returns:
 		List of result bindings or None on failure
 	"""
 	
+	origin = origin or 'untagged'
+	
+	if is_update(query_string):
+		graphs = query_graphs(query_string)
+		for graph in graphs:
+			query_cache.invalidate(None if graph == '*' else graph)
+		result, _ = _execute_sparql(query_string, timeout_seconds, origin)
+		if result is not None:
+			for graph in graphs - {'*'}:
+				record_write(graph)
+		return result
+	
+	if not use_cache:
+		result, _ = _execute_sparql(query_string, timeout_seconds, origin)
+		return result
+	
+	return query_cache.execute(query_string, lambda: _execute_sparql(query_string, timeout_seconds, origin))
+
+def _execute_sparql(query_string, timeout_seconds, origin='untagged'):
+	"""Send a query to the SPARQL endpoint, returning (bindings, response size)
+
+	Updates go to the primary. Reads try the replicas the router picks,
+	failing over to the next one and finally to the primary.
+	"""
+	
+	start = time.perf_counter()
+	if is_update(query_string) or not router.enabled:
+		result, size = _post_sparql(query_string, timeout_seconds)
+	else:
+		for target in router.candidates(query_graphs(query_string)):
+			router.begin(target)
+			attempt_start = time.perf_counter()
+			result, size = _post_sparql(query_string, timeout_seconds, target.sparql_url)
+			router.finish(target, (time.perf_counter() - attempt_start) * 1000,
+						  None if result is not None else 'query failed')
+			if result is not None:
+				break
+	elapsed = time.perf_counter() - start
+	observe_sparql(query_string, elapsed, size, result is not None)
+	query_log.record(query_string, origin, elapsed * 1000, len(result or []), size, result is not None)
+	return result, size
+
+def record_write(graph):
+	"""Note a write to a graph so its reads stay on the primary until replicas catch up"""
+	if not router.enabled:
+		return
+	try:
+		response = session.post(SPARQL_ENDPOINT, data=router.version_marker_update(graph),
+								headers={'Content-Type': 'application/sparql-update'},
+								auth=HTTPDigestAuth(username, password), timeout=10)
+		if response.status_code not in (200, 204):
+			print(f"Failed to record data version of {graph}: status {response.status_code}")
+	except Exception as e:
+		print(f"Failed to record data version of {graph}: {e}")
+
+def _post_sparql(query_string, timeout_seconds, url=SPARQL_ENDPOINT):
 	try:
 		headers = {
 			'Accept': 'application/sparql-results+json',
@@ -170,7 +265,9 @@ def query_sparql(query_string, timeout_seconds=30):
 		
 		data = {'query': query_string}
 		
-		response = session.post(SPARQL_ENDPOINT, 
+		# Replicas fail over instead of retrying
+		http = session if url == SPARQL_ENDPOINT else router.session
+		response = http.post(url, 
 							   data=data, 
 							   headers=headers,
 							   timeout=timeout_seconds)
@@ -178,14 +275,55 @@ def query_sparql(query_string, timeout_seconds=30):
 		if response.status_code == 200:
 			result_data = response.json()
 			if 'results' in result_data and 'bindings' in result_data['results']:
-				return result_data['results']['bindings']
+				return result_data['results']['bindings'], len(response.content)
 			else:
 				print(f"Unexpected SPARQL response format: {result_data}")
-				return []
+				return [], len(response.content)
 		else:
 			print(f"SPARQL query failed with status {response.status_code}: {response.text}")
-			return None
+			return None, 0
 			
 	except Exception as e:
 		print(f"Error executing SPARQL query: {e}")
-		return None
\ No newline at end of file
+		return None, 0
+
+# Characters decoded per chunk of a streamed graph
+STREAM_CHUNK_CHARS = 64 * 1024
+
+def stream_graph(graph, mimetype, timeout_seconds=120):
+	"""Stream a whole graph from the Graph Store endpoint as text in the given RDF format.
+
+	Virtuoso writes the graph in one pass over its quad index, so nothing is
+	sorted or paged. The timeout applies to each read, not the whole stream.
+	Raises RuntimeError if Virtuoso refuses the request.
+	"""
+	response = session.get(endpoint, params={'graph': graph}, headers={'Accept': mimetype},
+						   auth=HTTPDigestAuth(username, password), stream=True, timeout=timeout_seconds)
+	yield from _stream_text(response, f"graph {graph}")
+
+def stream_query(query_string, mimetype, timeout_seconds=120, origin=None):
+	"""Stream the result of a query as text in the given format (RDF for CONSTRUCT, e.g. TSV for SELECT)"""
+	start = time.perf_counter()
+	response = session.post(SPARQL_ENDPOINT, data={'query': query_string},
+							headers={'Accept': mimetype, 'Content-Type': 'application/x-www-form-urlencoded'},
+							stream=True, timeout=timeout_seconds)
+	size = 0
+	success = False
+	try:
+		for text in _stream_text(response, "query"):
+			size += len(text)
+			yield text
+		success = True
+	finally:
+		elapsed = time.perf_counter() - start
+		observe_sparql(query_string, elapsed, size, success)
+		query_log.record(query_string, origin or 'untagged', elapsed * 1000, 0, size, success)
+
+def _stream_text(response, what):
+	try:
+		if response.status_code != 200:
+			raise RuntimeError(f"Reading {what} failed with status {response.status_code}: {response.text[:500]}")
+		response.encoding = 'utf-8'
+		yield from response.iter_content(STREAM_CHUNK_CHARS, decode_unicode=True)
+	finally:
+		response.close()
@@ -11,6 +11,9 @@ import { MatSnackBar, MatSnackBarModule } from '@angular/material/snack-bar';
 import { MatTooltipModule } from '@angular/material/tooltip';
 import { DocumentService } from '../../services/document.service';
 
+// Extensions accepted by /upload_file; quad formats may fill several graphs
+const RDF_EXTENSIONS = ['.ttl', '.nt', '.nq', '.trig', '.rdf', '.owl', '.xml', '.jsonld', '.json'];
+
 @Component({
   selector: 'app-document-uploader',
   standalone: true,
@@ -29,7 +32,7 @@ import { DocumentService } from '../../services/document.service';
   template: `
     <mat-card>
       <mat-card-header>
-        <mat-card-title>TTL File Upload</mat-card-title>
+        <mat-card-title>RDF File Upload</mat-card-title>
       </mat-card-header>
       
       <mat-card-content>
@@ -52,7 +55,7 @@ import { DocumentService } from '../../services/document.service';
             type="file" 
             #fileInput 
             (change)="onFileSelected($event)"
-            accept=".ttl"
+            [accept]="acceptedExtensions"
             style="display: none">
           
           <button 
@@ -141,6 +144,8 @@ export class DocumentUploaderComponent {
     private documentService: DocumentService
   ) {}
 
+  readonly acceptedExtensions = RDF_EXTENSIONS.join(',');
+
   getUploadButtonText(): string {
     if (this.isProcessing) {
       return 'Processing...';
@@ -148,7 +153,7 @@ export class DocumentUploaderComponent {
     if (this.disabled) {
       return 'Upload in progress...';
     }
-    return 'Upload TTL File';
+    return 'Upload RDF File';
   }
 
   clearGraphName() {
@@ -157,16 +162,16 @@ export class DocumentUploaderComponent {
 
   onFileSelected(event: any) {
     const file = event.target.files[0];
-    if (file && file.name.toLowerCase().endsWith('.ttl')) {
+    if (file && RDF_EXTENSIONS.some(extension => file.name.toLowerCase().endsWith(extension))) {
       this.selectedFile = file;
       this.newUploadStarted.emit(); // Clear previous results
-      this.snackBar.open('TTL File Selected', 'Close', {
+      this.snackBar.open('RDF File Selected', 'Close', {
         duration: 2000
       });
       // Automatically start upload when file is selected
       this.uploadFile();
     } else {
-      this.snackBar.open('Please select a valid TTL file', 'Close', {
+      this.snackBar.open('Please select a Turtle, N-Triples, N-Quads, TriG, RDF/XML or JSON-LD file', 'Close', {
         duration: 3000
       });
       // Reset the file input using our helper method
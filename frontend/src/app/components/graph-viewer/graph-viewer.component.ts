@@ -7,7 +7,7 @@ import { MatIconModule } from '@angular/material/icon';
 import { MatListModule } from '@angular/material/list';
 import { MatProgressSpinnerModule } from '@angular/material/progress-spinner';
 import { MatTooltipModule } from '@angular/material/tooltip';
-import { GraphVisualizationService, GraphData, LiteralProperty } from '../../services/graph-visualization.service';
+import { GraphVisualizationService, GraphData, LiteralProperty, EntityDetails } from '../../services/graph-visualization.service';
 import { ContentNavigable, ContentNavigationEvent } from '../../services/content-navigation.interface';
 
 declare var cytoscape: any;
@@ -302,6 +302,9 @@ export class GraphViewerComponent implements OnInit, AfterViewInit, OnDestroy, C
   isFullscreen = false;
   expandedNodes = new Set<string>(); // Track which nodes have been expanded
   expandedNodesData = new Map<string, any>(); // Store original expansion data
+  entityDetailsCache = new Map<string, EntityDetails>(); // Neighborhood + literals from batch requests
+  private pendingPrefetch = new Set<string>();
+  private prefetchTimer: any = null;
   includeBidirectionalRelationships = false;
   lastSelectedNode: string | null = null; // Track last clicked node for orange color
 
@@ -405,7 +408,8 @@ export class GraphViewerComponent implements OnInit, AfterViewInit, OnDestroy, C
         container: this.cytoscapeContainer.nativeElement,
         elements: this.graphElements,
         style: this.graphStyle,
-        layout: this.layout,
+        // Positions computed by the backend only need rendering
+        layout: this.hasServerPositions() ? { name: 'preset', fit: true, padding: 30 } : this.layout,
         zoom: this.zoom,
         pan: this.pan,
         userZoomingEnabled: true,
@@ -489,14 +493,18 @@ export class GraphViewerComponent implements OnInit, AfterViewInit, OnDestroy, C
 
     // Add nodes
     data.nodes.forEach(node => {
-      elements.push({
+      const element: any = {
         data: {
           id: node.uri,
           label: node.label || this.getUriFragment(node.uri),
           uri: node.uri,
           isCentral: node.isCentral ? 'true' : 'false'
         }
-      });
+      };
+      if (node.position) {
+        element.position = { ...node.position };
+      }
+      elements.push(element);
     });
 
     // Add edges
@@ -534,15 +542,43 @@ export class GraphViewerComponent implements OnInit, AfterViewInit, OnDestroy, C
     // Track the last selected node
     this.lastSelectedNode = nodeUri;
     
-    // Expand the node's connections
-    this.expandNodeConnections(nodeUri);
-    
-    // Load and display node properties
-    this.loadEntityLiterals(nodeUri);
+    // Expand the node's connections and show its properties (one batch request)
     this.selectedNodeLabel = nodeLabel;
+    this.loadNodeDetails(nodeUri);
   }
 
-  expandNodeConnections(nodeUri: string) {
+  loadNodeDetails(nodeUri: string) {
+    const cached = this.entityDetailsCache.get(nodeUri);
+    if (cached) {
+      this.showNodeDetails(nodeUri, cached);
+      return;
+    }
+
+    this.graphService.getEntityDetailsBatch(this.graphName, [nodeUri])
+      .subscribe({
+        next: (response) => {
+          Object.entries(response.entities).forEach(([uri, details]) => this.entityDetailsCache.set(uri, details));
+          const details = response.entities[nodeUri];
+          if (details) {
+            this.showNodeDetails(nodeUri, details);
+          }
+        },
+        error: (err) => {
+          console.error('Error loading entity details:', err);
+          // Fall back to the single-entity endpoints
+          this.expandNodeConnections(nodeUri);
+          this.loadEntityLiterals(nodeUri);
+        }
+      });
+  }
+
+  private showNodeDetails(nodeUri: string, details: EntityDetails) {
+    this.selectedNodeLiterals = details.literals;
+    this.cd.detectChanges();
+    this.expandNodeConnections(nodeUri, details);
+  }
+
+  expandNodeConnections(nodeUri: string, preloaded?: GraphData) {
     // Don't expand the central node - its connections are already loaded
     if (nodeUri === this.entityUri) {
       console.log('Skipping expansion of central node:', nodeUri);
@@ -559,47 +595,54 @@ export class GraphViewerComponent implements OnInit, AfterViewInit, OnDestroy, C
 
     console.log('Expanding graph for node:', nodeUri);
     
+    if (preloaded) {
+      this.applyNodeExpansion(nodeUri, preloaded);
+      return;
+    }
+    
     // Load connected nodes for the clicked node (depth=1 for single level expansion)
     this.graphService.getEntityGraph(this.graphName, nodeUri, 1)
       .subscribe({
-        next: (newGraphData) => {
-          console.log('Received expansion data for node:', nodeUri);
-          console.log('New nodes:', newGraphData.nodes.length);
-          console.log('New edges:', newGraphData.edges.length);
-          console.log('Current graph has nodes:', this.cy.nodes().length);
-          console.log('Current graph has edges:', this.cy.edges().length);
-          
-          // Store the original expansion data with consistent node structure
-          const normalizedData = {
-            ...newGraphData,
-            nodes: newGraphData.nodes.map((node: any) => ({
-              ...node,
-              id: node.uri || node.id,
-              uri: node.uri || node.id
-            })),
-            edges: newGraphData.edges.map((edge: any) => ({
-              ...edge,
-              source: edge.source,
-              target: edge.target
-            }))
-          };
-          
-          this.expandedNodesData.set(nodeUri, normalizedData);
-          console.log('Stored expansion data for:', nodeUri);
-          
-          // Filter based on bidirectional setting
-          const filteredGraphData = this.filterGraphData(normalizedData, nodeUri);
-          
-          console.log('Filtered edges (outward only):', filteredGraphData.edges.length);
-          console.log('Filtered nodes (connected only):', filteredGraphData.nodes.length);
-          this.mergeGraphData(filteredGraphData, nodeUri);
-        },
+        next: (newGraphData) => this.applyNodeExpansion(nodeUri, newGraphData),
         error: (err) => {
           console.error('Error expanding graph:', err);
         }
       });
   }
 
+  private applyNodeExpansion(nodeUri: string, newGraphData: GraphData) {
+    console.log('Received expansion data for node:', nodeUri);
+    console.log('New nodes:', newGraphData.nodes.length);
+    console.log('New edges:', newGraphData.edges.length);
+    console.log('Current graph has nodes:', this.cy.nodes().length);
+    console.log('Current graph has edges:', this.cy.edges().length);
+    
+    // Store the original expansion data with consistent node structure
+    const normalizedData = {
+      ...newGraphData,
+      nodes: newGraphData.nodes.map((node: any) => ({
+        ...node,
+        id: node.uri || node.id,
+        uri: node.uri || node.id
+      })),
+      edges: newGraphData.edges.map((edge: any) => ({
+        ...edge,
+        source: edge.source,
+        target: edge.target
+      }))
+    };
+    
+    this.expandedNodesData.set(nodeUri, normalizedData);
+    console.log('Stored expansion data for:', nodeUri);
+    
+    // Filter based on bidirectional setting
+    const filteredGraphData = this.filterGraphData(normalizedData, nodeUri);
+    
+    console.log('Filtered edges (outward only):', filteredGraphData.edges.length);
+    console.log('Filtered nodes (connected only):', filteredGraphData.nodes.length);
+    this.mergeGraphData(filteredGraphData, nodeUri);
+  }
+
   mergeGraphData(newGraphData: GraphData, expandedNodeUri: string) {
     if (!this.cy) {
       console.warn('Cytoscape not initialized');
@@ -692,18 +735,8 @@ export class GraphViewerComponent implements OnInit, AfterViewInit, OnDestroy, C
       // Mark the expanded node as expanded for tracking
       this.expandedNodes.add(expandedNodeUri);
       
-      // Run layout to position new nodes
-      const layout = this.cy.layout({
-        name: 'cose',
-        animate: true,
-        animationDuration: 1000,
-        fit: true,
-        padding: 30,
-        nodeRepulsion: 400000,
-        idealEdgeLength: 100,
-        edgeElasticity: 100
-      });
-      layout.run();
+      // Place the new nodes around the ones already on screen
+      this.layoutNewNodes(expandedNodeUri, elementsToAdd.filter(element => !element.data.source));
       
       console.log(`Added ${elementsToAdd.length} new elements to the graph`);
     } else {
@@ -713,8 +746,82 @@ export class GraphViewerComponent implements OnInit, AfterViewInit, OnDestroy, C
     }
   }
 
+  private hasServerPositions(): boolean {
+    const nodes = this.graphElements.filter(element => !element.data.source);
+    return nodes.length > 0 && nodes.every(element => element.position);
+  }
+
+  private layoutNewNodes(expandedNodeUri: string, newNodes: any[]) {
+    const anchor = this.cy.getElementById(expandedNodeUri);
+    const start = anchor.nonempty() ? { ...anchor.position() } : { x: 0, y: 0 };
+    newNodes.forEach(node => this.cy.getElementById(node.data.id).position(start));
+
+    const newIds = new Set(newNodes.map(node => node.data.id));
+    const fixed: { [nodeId: string]: { x: number; y: number } } = {};
+    this.cy.nodes().forEach((node: any) => {
+      if (!newIds.has(node.id())) {
+        fixed[node.id()] = { ...node.position() };
+      }
+    });
+    const edges = this.cy.edges().map((edge: any) => ({ source: edge.data('source'), target: edge.data('target') }));
+
+    this.graphService.getLayout(this.graphName, this.entityUri, this.cy.nodes().map((node: any) => node.id()), edges, fixed)
+      .subscribe({
+        next: (response) => {
+          this.cy.layout({
+            name: 'preset',
+            positions: (node: any) => response.positions[node.id()] ?? node.position(),
+            animate: true,
+            animationDuration: 500,
+            fit: true,
+            padding: 30
+          }).run();
+        },
+        error: (err) => {
+          // No server layout (numpy missing or too many nodes): lay out in the browser
+          console.warn('Server layout unavailable, using cose:', err);
+          this.cy.layout({
+            name: 'cose',
+            animate: true,
+            animationDuration: 1000,
+            fit: true,
+            padding: 30,
+            nodeRepulsion: 400000,
+            idealEdgeLength: 100,
+            edgeElasticity: 100
+          }).run();
+        }
+      });
+  }
+
   onNodeHover(event: any) {
-    // Could implement hover effects
+    // Prefetch details of hovered nodes; hovers within a short window share one request
+    const nodeUri = event.target.data('uri');
+    if (!nodeUri || this.entityDetailsCache.has(nodeUri)) {
+      return;
+    }
+    this.pendingPrefetch.add(nodeUri);
+    if (!this.prefetchTimer) {
+      this.prefetchTimer = setTimeout(() => this.flushPrefetch(), 150);
+    }
+  }
+
+  private flushPrefetch() {
+    this.prefetchTimer = null;
+    const uris = Array.from(this.pendingPrefetch).filter(uri => !this.entityDetailsCache.has(uri));
+    this.pendingPrefetch.clear();
+    if (!uris.length) {
+      return;
+    }
+    this.graphService.getEntityDetailsBatch(this.graphName, uris)
+      .subscribe({
+        next: (response) => {
+          Object.entries(response.entities).forEach(([uri, details]) => this.entityDetailsCache.set(uri, details));
+        },
+        error: (err) => {
+          console.error('Error prefetching entity details:', err);
+        }
+      });
   }
 
   navigateToNode(nodeUri: string, nodeLabel: string) {
@@ -1029,18 +1136,8 @@ export class GraphViewerComponent implements OnInit, AfterViewInit, OnDestroy, C
         this.cy.getElementById(this.lastSelectedNode).select();
       }
       
-      // Run layout
-      const layout = this.cy.layout({
-        name: 'cose',
-        animate: true,
-        animationDuration: 1000,
-        fit: true,
-        padding: 30,
-        nodeRepulsion: 400000,
-        idealEdgeLength: 100,
-        edgeElasticity: 100
-      });
-      layout.run();
+      // Every node was re-added, so the whole graph is laid out again
+      this.layoutNewNodes(this.entityUri, [...allNodes.values()]);
     }
   }
 
@@ -1057,6 +1154,9 @@ export class GraphViewerComponent implements OnInit, AfterViewInit, OnDestroy, C
     if (this.isFullscreen) {
       document.body.style.overflow = '';
     }
+    if (this.prefetchTimer) {
+      clearTimeout(this.prefetchTimer);
+    }
   }
 
   expandGraph() {
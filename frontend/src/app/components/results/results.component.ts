@@ -20,6 +20,29 @@ import { environment } from '../../../environments/environment';
 import { ContentNavigable, ContentNavigationEvent } from '../../services/content-navigation.interface';
 import { GraphViewerComponent } from '../graph-viewer/graph-viewer.component';
 
+export interface PropertyProfile {
+  uri: string;
+  label: string;
+  subjectCount: number;
+  valueCount: number;
+  fillRate: number;
+  minCardinality: number;
+  maxCardinality: number;
+  avgCardinality: number;
+  literalCount: number;
+  iriCount: number;
+  datatypes: { [datatype: string]: number };
+  languages: { [lang: string]: number };
+  objectClasses: { [classUri: string]: number };
+}
+
+export interface ClassPropertyProfile {
+  uri: string;
+  label: string;
+  instanceCount: number;
+  properties: PropertyProfile[];
+}
+
 export interface UploadInfo {
   status: string;
   message: string;
@@ -29,6 +52,7 @@ export interface UploadInfo {
   triplesCount: number;
   sparqlEndpoint: string;
   classUri?: string; // Added for server-side pagination
+  propertyProfile?: ClassPropertyProfile; // Column coverage computed with the graph
   classesOverview?: Array<{
     label: string;
     instanceCount: number;
@@ -60,7 +60,18 @@ import { DocumentService, UploadJob } from '../../services/document.service';
           </div>
           
           <div class="batch-info" *ngIf="job?.status === 'processing'">
-            Batch {{ job.current_batch }} of {{ job.total_batches }}
+            Batch {{ job.current_batch }} of ~{{ job.total_batches }}
+          </div>
+          
+          <div class="graph-progress" *ngIf="job.graphs && job.graphs.length > 1">
+            <div class="graph-row" *ngFor="let graph of job.graphs">
+              <span class="graph-name">{{ graph.graph_name }}</span>
+              <mat-progress-bar 
+                mode="determinate" 
+                [value]="graph.total_triples ? graph.processed_triples / graph.total_triples * 100 : 100">
+              </mat-progress-bar>
+              <span class="graph-status">{{ graph.processed_triples | number }} / {{ graph.total_triples | number }} ({{ graph.status }})</span>
+            </div>
           </div>
         </div>
         
@@ -159,6 +170,29 @@ import { DocumentService, UploadJob } from '../../services/document.service';
       color: #999;
     }
     
+    .graph-progress {
+      margin-top: 12px;
+    }
+    
+    .graph-row {
+      display: grid;
+      grid-template-columns: 180px 1fr auto;
+      align-items: center;
+      gap: 8px;
+      margin-bottom: 6px;
+      font-size: 12px;
+    }
+    
+    .graph-name {
+      overflow: hidden;
+      text-overflow: ellipsis;
+      white-space: nowrap;
+    }
+    
+    .graph-status {
+      color: #999;
+    }
+    
     .analysis-details {
       margin-top: 10px;
     }
@@ -17,6 +17,15 @@ export interface UploadFileResponse {
   error?: string;
 }
 
+export interface GraphUploadProgress {
+  graph_name: string;
+  total_triples: number;
+  processed_triples: number;
+  current_batch: number;
+  total_batches: number;
+  status: 'pending' | 'uploading' | 'failed' | 'success';
+}
+
 export interface UploadJob {
   job_id: string;
   filename: string;
@@ -30,6 +39,7 @@ export interface UploadJob {
   total_batches: number;
   error_message?: string;
   result_data?: any;
+  graphs?: GraphUploadProgress[];
   analysisProgress?: {
     progress: number;
     status: string;
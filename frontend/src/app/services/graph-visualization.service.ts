@@ -1,6 +1,7 @@
 import { Injectable } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
 import { Observable } from 'rxjs';
+import { map } from 'rxjs/operators';
 import { environment } from '../../environments/environment';
 
 export interface GraphNode {
@@ -9,6 +10,12 @@ export interface GraphNode {
   uri: string;
   type?: string;
   isCentral?: boolean;
+  position?: NodePosition;
+}
+
+export interface NodePosition {
+  x: number;
+  y: number;
 }
 
 export interface GraphEdge {
@@ -26,11 +33,131 @@ export interface LiteralProperty {
   datatype?: string;
 }
 
+/**
+ * Links of an entity via one predicate in one direction; `count` is the
+ * group total, `returned` how many are in the response and `nextCursor`
+ * continues the group (null once it is exhausted).
+ */
+export interface NeighborGroup {
+  direction: 'out' | 'in';
+  predicate: string;
+  label: string;
+  count?: number;
+  returned: number;
+  nextCursor: string | null;
+}
+
 export interface GraphData {
   nodes: GraphNode[];
   edges: GraphEdge[];
   centralNode: string;
   literals?: LiteralProperty[];
+  groups?: NeighborGroup[];
+  group?: NeighborGroup;
+}
+
+/**
+ * Compact wire format of graph payloads: strings are interned in `strings`,
+ * IRIs are stored as `prefix:local` against `prefixes`, nodes are
+ * [uri, label, isCentral] and edges [sourceNode, targetNode, predicate, label].
+ */
+export interface CompactGraphData {
+  format: 'compact-v1';
+  prefixes: { [prefix: string]: string };
+  strings: string[];
+  nodes: [number, number, number][];
+  edges: [number, number, number, number][];
+  centralNode: number;
+  positions?: [number, number][];
+  literals?: [number, number, number, number][];
+  groups?: NeighborGroup[];
+  group?: NeighborGroup;
+}
+
+export function decodeCompactGraph(compact: CompactGraphData): GraphData {
+  const text = (index: number): string | undefined => index >= 0 ? compact.strings[index] : undefined;
+  const iri = (index: number): string => {
+    const value = compact.strings[index];
+    const colon = value.indexOf(':');
+    const namespace = colon > 0 ? compact.prefixes[value.substring(0, colon)] : undefined;
+    return namespace !== undefined ? namespace + value.substring(colon + 1) : value;
+  };
+
+  const nodes: GraphNode[] = compact.nodes.map(([uri, label, isCentral], index) => {
+    const nodeUri = iri(uri);
+    const node: GraphNode = { id: nodeUri, label: text(label) ?? nodeUri, uri: nodeUri, isCentral: isCentral === 1 };
+    if (compact.positions) {
+      node.position = { x: compact.positions[index][0], y: compact.positions[index][1] };
+    }
+    return node;
+  });
+
+  const edges: GraphEdge[] = compact.edges.map(([source, target, predicate, label]) => {
+    const predicateUri = iri(predicate);
+    return {
+      id: `${nodes[source].id}--${predicateUri}--${nodes[target].id}`,
+      source: nodes[source].id,
+      target: nodes[target].id,
+      label: text(label) ?? predicateUri,
+      uri: predicateUri
+    };
+  });
+
+  const graph: GraphData = {
+    nodes,
+    edges,
+    centralNode: compact.centralNode >= 0 ? nodes[compact.centralNode].id : ''
+  };
+  if (compact.literals) {
+    graph.literals = compact.literals.map(([predicate, predicateLabel, value, datatype]) => ({
+      predicate: iri(predicate),
+      predicateLabel: text(predicateLabel),
+      value: text(value) ?? '',
+      datatype: text(datatype)
+    }));
+  }
+  if (compact.groups) {
+    graph.groups = compact.groups;
+  }
+  if (compact.group) {
+    graph.group = compact.group;
+  }
+  return graph;
+}
+
+export interface EntityDetails extends GraphData {
+  label: string;
+  literals: LiteralProperty[];
+}
+
+export interface EntityDetailsBatch {
+  success: boolean;
+  graphName: string;
+  entities: { [uri: string]: EntityDetails };
+}
+
+export interface LayoutResponse {
+  success: boolean;
+  positions: { [nodeId: string]: NodePosition };
+}
+
+export interface SchemaSummaryNode {
+  id: string;
+  label: string;
+  uri: string;
+  instanceCount: number;
+}
+
+export interface SchemaSummaryEdge extends GraphEdge {
+  count: number;
+}
+
+export interface SchemaSummary {
+  success: boolean;
+  graphName: string;
+  graphUri: string;
+  nodes: SchemaSummaryNode[];
+  edges: SchemaSummaryEdge[];
 }
 
 @Injectable({
@@ -45,16 +172,52 @@ export class GraphVisualizationService {
     const encodedGraphName = encodeURIComponent(graphName);
     const encodedEntityUri = encodeURIComponent(entityUri);
     
-    return this.http.get<GraphData>(
+    // Request the compact wire format and decode it transparently
+    return this.http.get<CompactGraphData>(
       `${this.apiUrl}/api/graphs/${encodedGraphName}/entities/${encodedEntityUri}/graph`,
       { 
         params: { 
           depth: depth.toString(),
           maxNodes: '50',
-          direction: direction
+          direction: direction,
+          format: 'compact',
+          layout: 'server'
         }
       }
-    );
+    ).pipe(map(decodeCompactGraph));
+  }
+
+  /**
+   * Hub-friendly neighborhood: link counts per (direction, predicate) with
+   * the first page of neighbors of the largest groups.
+   */
+  getNeighborhoodSummary(graphName: string, entityUri: string, pageSize: number = 10,
+                         maxGroups: number = 25): Observable<GraphData> {
+    const encodedGraphName = encodeURIComponent(graphName);
+    const encodedEntityUri = encodeURIComponent(entityUri);
+
+    return this.http.get<CompactGraphData>(
+      `${this.apiUrl}/api/graphs/${encodedGraphName}/entities/${encodedEntityUri}/graph`,
+      {
+        params: {
+          mode: 'summary',
+          pageSize: pageSize.toString(),
+          maxGroups: maxGroups.toString(),
+          format: 'compact'
+        }
+      }
+    ).pipe(map(decodeCompactGraph));
+  }
+
+  /** Next page of one neighbor group, continuing from a group's `nextCursor` */
+  getNeighborPage(graphName: string, entityUri: string, cursor: string, limit: number = 50): Observable<GraphData> {
+    const encodedGraphName = encodeURIComponent(graphName);
+    const encodedEntityUri = encodeURIComponent(entityUri);
+
+    return this.http.get<CompactGraphData>(
+      `${this.apiUrl}/api/graphs/${encodedGraphName}/entities/${encodedEntityUri}/neighbors`,
+      { params: { cursor, limit: limit.toString(), format: 'compact' } }
+    ).pipe(map(decodeCompactGraph));
   }
 
   getEntityLiterals(graphName: string, entityUri: string): Observable<LiteralProperty[]> {
@@ -65,4 +228,37 @@ export class GraphVisualizationService {
       `${this.apiUrl}/api/graphs/${encodedGraphName}/entities/${encodedEntityUri}/literals`
     );
   }
+
+  getEntityDetailsBatch(graphName: string, entityUris: string[], maxLinks: number = 150): Observable<EntityDetailsBatch> {
+    const encodedGraphName = encodeURIComponent(graphName);
+
+    return this.http.post<EntityDetailsBatch>(
+      `${this.apiUrl}/api/graphs/${encodedGraphName}/entities/batch`,
+      { uris: entityUris, maxLinks }
+    );
+  }
+
+  /**
+   * Server-side layout of a node set; nodes in `fixed` keep their positions
+   * and the others are placed around them.
+   */
+  getLayout(graphName: string, seed: string, nodes: string[],
+            edges: { source: string; target: string }[],
+            fixed: { [nodeId: string]: NodePosition } = {}): Observable<LayoutResponse> {
+    const encodedGraphName = encodeURIComponent(graphName);
+
+    return this.http.post<LayoutResponse>(
+      `${this.apiUrl}/api/graphs/${encodedGraphName}/layout`,
+      { seed, nodes, edges, fixed }
+    );
+  }
+
+  getSchemaSummary(graphName: string, minCount: number = 1): Observable<SchemaSummary> {
+    const encodedGraphName = encodeURIComponent(graphName);
+
+    return this.http.get<SchemaSummary>(
+      `${this.apiUrl}/api/graphs/${encodedGraphName}/schema-summary`,
+      { params: { minCount: minCount.toString() } }
+    );
+  }
 }
\ No newline at end of file
@@ -21,6 +21,8 @@ export interface GraphAnalysisResponse {
   graphUri: string;
   tabs: any[];
   analysis?: any;
+  approximate?: boolean;
+  refinementPending?: boolean;
   error?: string;
 }
 
@@ -36,11 +38,31 @@ export class GraphsService {
     return this.http.get<GraphsResponse>(`${this.apiUrl}/api/graphs`);
   }
 
-  getGraphAnalysis(graphName: string): Observable<GraphAnalysisResponse> {
-    return this.http.get<GraphAnalysisResponse>(`${this.apiUrl}/api/graphs/${encodeURIComponent(graphName)}/analysis`);
+  getGraphAnalysis(graphName: string, mode: 'exact' | 'approximate' = 'exact', budgetMs?: number): Observable<GraphAnalysisResponse> {
+    const params: { [key: string]: string } = { mode };
+    if (budgetMs) {
+      params['budgetMs'] = budgetMs.toString();
+    }
+    return this.http.get<GraphAnalysisResponse>(
+      `${this.apiUrl}/api/graphs/${encodeURIComponent(graphName)}/analysis`,
+      { params }
+    );
   }
 
   deleteGraph(graphName: string): Observable<{success: boolean, message: string}> {
     return this.http.delete<{success: boolean, message: string}>(`${this.apiUrl}/api/graphs/${encodeURIComponent(graphName)}`);
   }
+
+  getExportUrl(graphName: string, format: 'ntriples' | 'turtle' | 'csv' = 'ntriples', classUri?: string, predicates: string[] = [], gzip: boolean = false): string {
+    const base = `${this.apiUrl}/api/graphs/${encodeURIComponent(graphName)}`;
+    const path = classUri ? `${base}/class/${encodeURIComponent(classUri)}/export` : `${base}/export`;
+    const params = new URLSearchParams({ format });
+    if (predicates.length) {
+      params.set('predicates', predicates.join(','));
+    }
+    if (gzip) {
+      params.set('gzip', 'true');
+    }
+    return `${path}?${params.toString()}`;
+  }
 }
\ No newline at end of file